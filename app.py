@@ -1,31 +1,47 @@
 from flask import Flask
 from flask_cors import CORS
+from flask_migrate import Migrate
 from config import Config
 from models import db, init_models
+from models.user_search_model import include_in_migrations
 from controllers.user_controller import user_controller 
 from controllers.auth_controller import auth_controller 
 from controllers.credit_card_controller import credit_card_controller
 from controllers.friendship_controller import friendship_controller
 from controllers.transaction_controller import transaction_controller
 from controllers.api_controller import api_controller
+from controllers.job_controller import job_controller
+from controllers.paypal_controller import paypal_controller
+from controllers.metrics_controller import metrics_controller
 from os import getenv
 from dotenv import load_dotenv
 from configuration.auth_filter import verify_token
+from configuration.database import init_storage
+from configuration.logging_setup import init_logging
+from configuration.metrics import init_metrics
+from commands import register_commands
+from services.job_service import JobService
+import logging
 
 # Load enviorement variables
 load_dotenv()
 
 app = Flask(__name__)
 app.config.from_object(Config)  # Load configuration from config.py
+init_logging(app)  # JSON logs written by a background thread, request ids
+logger = logging.getLogger(__name__)
 
 # Enable CORS for all routes
 # CORS(app) # Allows all origins
 CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"]}}) # Restrict to a single origin
 db.init_app(app)  # Initialize SQLAlchemy 
+init_storage(app)  # SQLite PRAGMAs (WAL, synchronous...) or pooled server backend
+migrate = Migrate(app, db, render_as_batch=True, include_name=include_in_migrations)  # Alembic migrations (flask db upgrade)
 
 
 # Register the middleware (apply before every request)
 # ✅ This ensures token validation before each request
+init_metrics(app)  # Per-endpoint latency, status and SQL metrics (runs before the token check, so 401s count too)
 app.before_request(verify_token)
 
 # Register the user controller blueprint
@@ -35,17 +51,26 @@ app.register_blueprint(credit_card_controller, url_prefix='/credit_cards')
 app.register_blueprint(friendship_controller, url_prefix='/friendship')
 app.register_blueprint(transaction_controller, url_prefix='/transactions')
 app.register_blueprint(api_controller, url_prefix='/api')  
+app.register_blueprint(job_controller, url_prefix='/jobs')
+app.register_blueprint(paypal_controller, url_prefix='/paypal')
+app.register_blueprint(metrics_controller)
+
+# Worker pool for the PayPal calls (card validation, funds charges)
+JobService.init_app(app)
+
+# Register the `flask <command>` CLI commands
+register_commands(app)
 
 
 # Check if we should create the database on startup
 if getenv('CREATE_DB_ON_STARTUP', False):
-    print("🚀 Creating database...")
+    logger.info("Creating database...")
     with app.app_context():
         init_models()  
         db.create_all()
-        print("✅ Database created!")
+        logger.info("Database created")
 else:
-    print(" ⚠️  Database creation skipped.")
+    logger.info("Database creation skipped")
     
       
 if __name__ == '__main__':
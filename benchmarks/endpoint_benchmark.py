@@ -0,0 +1,660 @@
+"""Endpoint benchmark suite.
+
+Builds a seeded SQLite database (commands.seed_dataset), starts the local PayPal stand-in
+and drives every blueprint endpoint through the Flask test client. For each endpoint it
+reports p50/p95/p99 latency, requests per second and SQL statements per request.
+
+Results are saved as JSON. With --baseline, the run fails (exit code 1) when an
+endpoint's p95 grows more than --threshold (and --min-delta-ms) or it issues more SQL
+statements per request than in the baseline.
+
+    python -m benchmarks.endpoint_benchmark --users 500 --transactions 20000 --output bench.json
+    python -m benchmarks.endpoint_benchmark --baseline bench.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from benchmarks.paypal_stub import start_stub
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    """Register a scenario: a function(ctx) returning (acting user index or None, method, url, json body)."""
+    def register(build):
+        SCENARIOS[name] = build
+        return build
+    return register
+
+
+class Context:
+    """Seeded data and helpers shared by the scenarios."""
+
+    def __init__(self, app, engine, users, rnd):
+        self.app = app
+        self.engine = engine
+        self.users = users
+        self.rnd = rnd  # Picks users and amounts only: ids of inserted rows are uuid4, a seeded id would repeat across runs
+        self.tokens = {}
+        self.sequence = 0
+        self.deactivated = []
+        self.idempotent_requests = {}
+
+    def next_id(self):
+        self.sequence += 1
+        return self.sequence
+
+    def user(self):
+        """A random regular user (user 0 is the administrator)"""
+        return self.rnd.randrange(1, self.users)
+
+    def pair(self):
+        return tuple(self.rnd.sample(range(1, self.users), 2))
+
+    def token(self, index):
+        from configuration.auth_filter import create_jwt_token
+        from commands.seed_dataset import user_dni
+
+        if index not in self.tokens:
+            with self.app.test_request_context():
+                response = create_jwt_token({"dni": user_dni(index), "email": f"user{index}@bench.local"})
+                self.tokens[index] = response.get_json()["token"]
+        return self.tokens[index]
+
+    def execute(self, statement, rows=None):
+        """Untimed setup through Core, outside the measured request"""
+        with self.engine.begin() as connection:
+            result = connection.execute(statement, rows) if rows is not None else connection.execute(statement)
+            return result.inserted_primary_key[0] if rows is not None and isinstance(rows, dict) else result
+
+
+# --- users -------------------------------------------------------------------------------
+
+@scenario("users.ping")
+def users_ping(ctx):
+    return ctx.user(), "GET", "/users/ping", None
+
+
+@scenario("users.get")
+def users_get(ctx):
+    from commands.seed_dataset import user_dni
+    return ctx.user(), "GET", f"/users/{user_dni(ctx.user())}", None
+
+
+@scenario("users.me")
+def users_me(ctx):
+    return ctx.user(), "GET", "/users/me", None
+
+
+@scenario("users.me_sparse")
+def users_me_sparse(ctx):
+    return ctx.user(), "GET", "/users/me?fields=dni,name,amount", None
+
+
+@scenario("users.all_sparse")
+def users_all_sparse(ctx):
+    return ctx.user(), "GET", "/users/all?fields=dni,name", None
+
+
+@scenario("users.all_ndjson")
+def users_all_ndjson(ctx):
+    return ctx.user(), "GET", "/users/all?fields=dni,name&format=ndjson", None
+
+
+@scenario("users.all_page")
+def users_all_page(ctx):
+    return ctx.user(), "GET", "/users/all?limit=100&include=friends", None
+
+
+@scenario("users.search")
+def users_search(ctx):
+    return ctx.user(), "GET", f"/users/search?q=User {ctx.rnd.randrange(1, 100)}", None
+
+
+@scenario("users.search_page")
+def users_search_page(ctx):
+    return ctx.user(), "GET", "/users/search?q=bench.local&limit=20&offset=100", None
+
+
+@scenario("users.create")
+def users_create(ctx):
+    n = ctx.next_id()
+    return None, "POST", "/users/create", {
+        "dni": f"N{n:08d}", "name": f"New {n}", "email": f"new{n}@bench.local", "pwd": "password",
+        "birth_date": "1990-01-01", "phone": "600000000", "address": "Street",
+    }
+
+
+@scenario("users.update")
+def users_update(ctx):
+    from commands.seed_dataset import user_dni
+    index = ctx.user()
+    return index, "PUT", f"/users/{user_dni(index)}/update", {"name": f"Renamed {ctx.next_id()}"}
+
+
+@scenario("users.image")
+def users_image(ctx):
+    return ctx.user(), "PUT", "/users/image", {"image": f"https://img.bench.local/{ctx.next_id()}.png"}
+
+
+@scenario("users.check_password")
+def users_check_password(ctx):
+    from commands.seed_dataset import user_dni
+    index = ctx.user()
+    return index, "POST", f"/users/{user_dni(index)}/check_password", {"password": "password"}
+
+
+@scenario("users.delete")
+def users_delete(ctx):
+    from commands.seed_dataset import user_dni
+    index = ctx.user()
+    ctx.deactivated.append(index)
+    return 0, "DELETE", f"/users/{user_dni(index)}/delete", None
+
+
+@scenario("users.active")
+def users_active(ctx):
+    from commands.seed_dataset import user_dni
+    index = ctx.deactivated.pop() if ctx.deactivated else ctx.user()
+    return 0, "GET", f"/users/{user_dni(index)}/active", None
+
+
+# --- auth --------------------------------------------------------------------------------
+
+@scenario("auth.ping")
+def auth_ping(ctx):
+    return ctx.user(), "GET", "/auth/ping", None
+
+
+@scenario("auth.authenticate")
+def auth_authenticate(ctx):
+    return None, "POST", "/auth/authenticate", {"email": f"user{ctx.user()}@bench.local", "password": "password"}
+
+
+# --- credit cards ------------------------------------------------------------------------
+
+def _insert_card(ctx, index):
+    from models.credit_card_model import CreditCard
+    from commands.seed_dataset import user_dni
+    number = 5_000_000_000_000_000 + ctx.next_id()
+    ctx.execute(CreditCard.__table__.insert(), {
+        "number": number, "cvv": "123", "type": "visa", "expiration_date": datetime(2030, 12, 31).date(),
+        "active": True, "card_holder_name": "Bench", "paypal_token": f"extra-{number}", "user_dni": user_dni(index),
+    })
+    return number
+
+
+@scenario("credit_cards.get")
+def credit_cards_get(ctx):
+    from commands.seed_dataset import card_number
+    index = ctx.user()
+    return index, "GET", f"/credit_cards/card/{card_number(index)}", None
+
+
+@scenario("credit_cards.all")
+def credit_cards_all(ctx):
+    return 0, "GET", "/credit_cards/all", None
+
+
+@scenario("credit_cards.export")
+def credit_cards_export(ctx):
+    return 0, "GET", "/credit_cards/export?format=csv", None
+
+
+@scenario("credit_cards.export_since")
+def credit_cards_export_since(ctx):
+    return 0, "GET", "/credit_cards/export?updated_since=2026-01-01", None
+
+
+@scenario("credit_cards.update")
+def credit_cards_update(ctx):
+    from commands.seed_dataset import card_number
+    index = ctx.user()
+    return index, "PUT", f"/credit_cards/card/{card_number(index)}", {"card_holder_name": f"Holder {ctx.next_id()}"}
+
+
+@scenario("credit_cards.create")
+def credit_cards_create(ctx):
+    return ctx.user(), "POST", "/credit_cards/card", {
+        "number": str(6_000_000_000_000_000 + ctx.next_id()), "cvv": "123", "type": "visa",
+        "expiration_date": "31/12/2030", "card_holder_name": "Bench",
+    }
+
+
+@scenario("credit_cards.delete")
+def credit_cards_delete(ctx):
+    index = ctx.user()
+    return index, "DELETE", f"/credit_cards/card/{_insert_card(ctx, index)}", None
+
+
+# --- friendship --------------------------------------------------------------------------
+
+def _insert_friendship_request(ctx, sender, receiver):
+    from models.friendship_request_model import FriendshipRequest
+    from commands.seed_dataset import user_dni
+    return ctx.execute(FriendshipRequest.__table__.insert(), {
+        "sender_dni": user_dni(sender), "receiver_dni": user_dni(receiver), "status": "PENDING",
+        "created_at": datetime.utcnow(),
+    })
+
+
+@scenario("friendship.pending")
+def friendship_pending(ctx):
+    return ctx.user(), "GET", "/friendship/pending", None
+
+
+@scenario("friendship.suggestions")
+def friendship_suggestions(ctx):
+    return ctx.user(), "GET", "/friendship/suggestions", None
+
+
+@scenario("friendship.new")
+def friendship_new(ctx):
+    from commands.seed_dataset import user_dni
+    sender, receiver = ctx.pair()
+    return sender, "POST", "/friendship/new", {"friend_dni": user_dni(receiver)}
+
+
+@scenario("friendship.accept")
+def friendship_accept(ctx):
+    sender, receiver = ctx.pair()
+    return receiver, "POST", f"/friendship/accept/{_insert_friendship_request(ctx, sender, receiver)}", None
+
+
+@scenario("friendship.reject")
+def friendship_reject(ctx):
+    sender, receiver = ctx.pair()
+    return receiver, "POST", f"/friendship/reject/{_insert_friendship_request(ctx, sender, receiver)}", None
+
+
+@scenario("friendship.accept_bulk")
+def friendship_accept_bulk(ctx):
+    receiver = ctx.user()
+    senders = [sender for sender in ctx.rnd.sample(range(1, ctx.users), min(51, ctx.users - 1)) if sender != receiver][:50]
+    request_ids = [_insert_friendship_request(ctx, sender, receiver) for sender in senders]
+    return receiver, "POST", "/friendship/accept", {"request_ids": request_ids}
+
+
+@scenario("friendship.favourite")
+def friendship_favourite(ctx):
+    from commands.seed_dataset import user_dni
+    user, other = ctx.pair()
+    return user, "POST", "/friendship/favourite?fields=dni", {"favourite_dni": user_dni(other)}
+
+
+@scenario("friendship.favourite_remove")
+def friendship_favourite_remove(ctx):
+    from commands.seed_dataset import user_dni
+    user, other = ctx.pair()
+    return user, "POST", "/friendship/favourite/remove?fields=dni", {"favourite_dni": user_dni(other)}
+
+
+@scenario("friendship.block")
+def friendship_block(ctx):
+    from commands.seed_dataset import user_dni
+    user, other = ctx.pair()
+    return user, "POST", "/friendship/block?fields=dni", {"blocked_dni": user_dni(other)}
+
+
+@scenario("friendship.unblock")
+def friendship_unblock(ctx):
+    from commands.seed_dataset import user_dni
+    user, other = ctx.pair()
+    return user, "POST", "/friendship/unblock?fields=dni", {"blocked_dni": user_dni(other)}
+
+
+@scenario("friendship.delete")
+def friendship_delete(ctx):
+    from commands.seed_dataset import user_dni
+    user, other = ctx.pair()
+    return user, "DELETE", f"/friendship/delete/{user_dni(other)}", None
+
+
+# --- transactions ------------------------------------------------------------------------
+
+def _insert_transaction_request(ctx, payer, requester):
+    from models.transaction_model import Transaction
+    from commands.seed_dataset import user_dni
+    return ctx.execute(Transaction.__table__.insert(), {
+        "amount": 5, "transaction_type": "REQUEST", "message": "bench", "date": datetime.utcnow(),
+        "status": "PENDING", "sender_dni": user_dni(payer), "receiver_dni": user_dni(requester),
+    })
+
+
+@scenario("transactions.me")
+def transactions_me(ctx):
+    return ctx.user(), "GET", "/transactions/me", None
+
+
+@scenario("transactions.me_page")
+def transactions_me_page(ctx):
+    return ctx.user(), "GET", "/transactions/me?limit=50", None
+
+
+@scenario("transactions.get")
+def transactions_get(ctx):
+    from models.transaction_model import Transaction
+    from sqlalchemy import select
+    # The endpoint only serves pending requests
+    row = ctx.execute(select(Transaction.id, Transaction.sender_dni).where(Transaction.status == "PENDING")
+                      .order_by(Transaction.id).offset(ctx.rnd.randrange(100)).limit(1)).first()
+    return int(row.sender_dni[1:]), "GET", f"/transactions/{row.id}", None
+
+
+@scenario("transactions.balance")
+def transactions_balance(ctx):
+    return ctx.user(), "GET", "/transactions/balance", None
+
+
+@scenario("transactions.balance_at")
+def transactions_balance_at(ctx):
+    return ctx.user(), "GET", f"/transactions/balance?at=2025-{ctx.rnd.randrange(1, 13):02d}-15T12:00:00", None
+
+
+@scenario("transactions.stats")
+def transactions_stats(ctx):
+    return ctx.user(), "GET", "/transactions/stats?from=2025-01&to=2025-12", None
+
+
+@scenario("transactions.pending")
+def transactions_pending(ctx):
+    return ctx.user(), "GET", "/transactions/pending", None
+
+
+@scenario("transactions.create")
+def transactions_create(ctx):
+    from commands.seed_dataset import user_dni, card_number
+    sender, receiver = ctx.pair()
+    return sender, "POST", "/transactions/create", {
+        "receiver_dni": user_dni(receiver), "amount": 5, "message": "bench", "credit_card_number": card_number(sender),
+    }
+
+
+@scenario("transactions.create_idempotent")
+def transactions_create_idempotent(ctx):
+    """Transfers sent with an Idempotency-Key, most of them retries served from the stored response"""
+    key = f"bench-{ctx.rnd.randrange(5)}"
+    if key not in ctx.idempotent_requests:
+        ctx.idempotent_requests[key] = transactions_create(ctx)
+    return (*ctx.idempotent_requests[key], {"Idempotency-Key": key})
+
+
+@scenario("transactions.batch")
+def transactions_batch(ctx):
+    from commands.seed_dataset import user_dni, card_number
+    sender = ctx.user()
+    receivers = [index for index in ctx.rnd.sample(range(1, ctx.users), 6) if index != sender][:5]
+    return sender, "POST", "/transactions/batch", {
+        "credit_card_number": card_number(sender),
+        "transfers": [{"receiver_dni": user_dni(index), "amount": 1, "message": "bench"} for index in receivers],
+    }
+
+
+@scenario("transactions.createrequest")
+def transactions_createrequest(ctx):
+    from commands.seed_dataset import user_dni
+    requester, payer = ctx.pair()
+    return requester, "POST", "/transactions/createrequest", {"sender_dni": user_dni(payer), "amount": 5, "message": "bench"}
+
+
+@scenario("transactions.acceptrequest")
+def transactions_acceptrequest(ctx):
+    from commands.seed_dataset import card_number
+    payer, requester = ctx.pair()
+    request_id = _insert_transaction_request(ctx, payer, requester)
+    return payer, "POST", f"/transactions/acceptrequest/{request_id}", {"card_number": card_number(payer)}
+
+
+@scenario("transactions.rejectrequest")
+def transactions_rejectrequest(ctx):
+    payer, requester = ctx.pair()
+    return payer, "POST", f"/transactions/rejectrequest/{_insert_transaction_request(ctx, payer, requester)}", None
+
+
+@scenario("transactions.chargefunds")
+def transactions_chargefunds(ctx):
+    from commands.seed_dataset import card_number
+    index = ctx.user()
+    return index, "POST", "/transactions/chargefunds", {"amount": 10, "credit_card_number": card_number(index)}
+
+
+# --- jobs, API keys, PayPal, metrics ------------------------------------------------------
+
+@scenario("jobs.get")
+def jobs_get(ctx):
+    from models.job_model import Job
+    from commands.seed_dataset import user_dni
+    index = ctx.user()
+    job_id = str(uuid.uuid4())
+    ctx.execute(Job.__table__.insert(), {
+        "id": job_id, "user_dni": user_dni(index), "kind": "charge_funds", "status": "SUCCEEDED",
+        "payload": "{}", "result": "{\"amount\": 10}", "created_at": datetime.utcnow(),
+    })
+    return index, "GET", f"/jobs/{job_id}", None
+
+
+@scenario("api.getkeys")
+def api_getkeys(ctx):
+    return ctx.user(), "GET", "/api/getkeys", None
+
+
+@scenario("api.requestkey")
+def api_requestkey(ctx):
+    from models.apikey_model import ApiKey
+    from commands.seed_dataset import user_dni
+    from sqlalchemy import delete
+    index = ctx.user()
+    # Keep the user under the 5 keys limit: drop the keys added by earlier iterations
+    ctx.execute(delete(ApiKey).where(ApiKey.user_dni == user_dni(index), ApiKey.name != "bench"))
+    return index, "POST", "/api/requestkey", {"application_name": "bench-app"}
+
+
+def _insert_api_key(ctx, index):
+    from models.apikey_model import ApiKey
+    from commands.seed_dataset import user_dni
+    key_id = str(uuid.uuid4())
+    ctx.execute(ApiKey.__table__.insert(), {
+        "id": key_id, "user_dni": user_dni(index), "key_hash": ApiKey.hash_key(key_id), "name": "extra",
+        "created_at": datetime.utcnow(),
+    })
+    return key_id
+
+
+@scenario("api.updatekey")
+def api_updatekey(ctx):
+    index = ctx.user()
+    return index, "PUT", "/api/updatekey", {"api_key_id": _insert_api_key(ctx, index)}
+
+
+@scenario("api.deletekey")
+def api_deletekey(ctx):
+    index = ctx.user()
+    return index, "DELETE", f"/api/deletekey/{_insert_api_key(ctx, index)}", None
+
+
+@scenario("api.payments_request")
+def api_payments_request(ctx):
+    from commands.seed_dataset import user_dni, api_key
+    receiver, sender = ctx.pair()
+    return None, "POST", "/api/payments/request", {
+        "api_key": api_key(receiver), "sender_dni": user_dni(sender), "amount": 5, "message": "bench",
+    }
+
+
+@scenario("paypal.status")
+def paypal_status(ctx):
+    return 0, "GET", "/paypal/status", None
+
+
+@scenario("metrics")
+def metrics(ctx):
+    return None, "GET", "/metrics", None
+
+
+# --- runner ------------------------------------------------------------------------------
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def run_scenario(ctx, client, counter, name, iterations):
+    latencies, queries, statuses = [], [], {}
+    for _ in range(iterations):
+        built = SCENARIOS[name](ctx)
+        user, method, url, body = built[:4]
+        headers = dict(built[4]) if len(built) > 4 else {}
+        if user is not None:
+            headers["Authorization"] = f"Bearer {ctx.token(user)}"
+
+        before = counter["statements"]
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body, headers=headers)
+        response.get_data()  # Drain streamed bodies inside the timed section
+        elapsed = time.perf_counter() - started
+
+        latencies.append(elapsed)
+        queries.append(counter["statements"] - before)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    ordered = sorted(latencies)
+    total = sum(latencies)
+    return {
+        "requests": iterations,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(total / iterations * 1000, 3),
+        "rps": round(iterations / total, 1) if total else None,
+        "queries_per_request": round(sum(queries) / iterations, 2),
+        "statuses": statuses,
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Regressions of this run against a baseline result file"""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold) and current["p95_ms"] - previous["p95_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current["queries_per_request"] > previous["queries_per_request"]:
+            regressions.append(f"{name}: queries/request {previous['queries_per_request']} -> {current['queries_per_request']}")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--friend-density", type=float, default=0.05, help="fraction of the other users each user befriends")
+    parser.add_argument("--iterations", type=int, default=30, help="requests per endpoint")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="comma-separated scenario names (default: all)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="result file of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative p95 growth")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore p95 changes smaller than this")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    stub = start_stub()
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    # The app reads these at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["PAYPAL_BASE_URL"] = stub.url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("JWT_EXPIRATION_DAYS", "3600")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    try:
+        from sqlalchemy import event
+        from app import app
+        from models import db, init_models
+        from commands.seed_dataset import build_dataset
+
+        app.config["PAYPAL_JOBS_INLINE"] = True  # Count the job's queries in the request that submits it
+        with app.app_context():
+            init_models()
+            db.create_all()
+            engine = db.engine
+        started = time.perf_counter()
+        dataset = build_dataset(engine, args.users, args.transactions, args.friend_density, args.seed)
+        print(f"Seeded {dataset} in {time.perf_counter() - started:.1f}s")
+
+        counter = {"statements": 0}
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def count_statement(*_):
+            counter["statements"] += 1
+
+        ctx = Context(app, engine, args.users, random.Random(args.seed))
+        client = app.test_client()
+        endpoints = {}
+        for name in names:
+            endpoints[name] = run_scenario(ctx, client, counter, name, args.iterations)
+            result = endpoints[name]
+            print(f"{name:32} p50={result['p50_ms']:8.2f} p95={result['p95_ms']:8.2f} p99={result['p99_ms']:8.2f} ms "
+                  f"rps={result['rps']:8.1f} q/req={result['queries_per_request']:6.2f} {result['statuses']}")
+
+        total_time = sum(r["mean_ms"] * r["requests"] for r in endpoints.values()) / 1000
+        results = {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "args": vars(args),
+                "dataset": dataset,
+            },
+            "summary": {
+                "requests": sum(r["requests"] for r in endpoints.values()),
+                "rps": round(sum(r["requests"] for r in endpoints.values()) / total_time, 1) if total_time else None,
+            },
+            "endpoints": endpoints,
+        }
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"Saved {args.output}: {results['summary']}")
+
+        with app.app_context():
+            db.engine.dispose()
+
+        if args.baseline:
+            with open(args.baseline) as baseline_file:
+                regressions = compare(results, json.load(baseline_file), args.threshold, args.min_delta_ms)
+            if regressions:
+                print("❌ Regressions against the baseline:")
+                for line in regressions:
+                    print(f"   {line}")
+                sys.exit(1)
+            print("✅ No regressions against the baseline")
+    finally:
+        stub.shutdown()
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Request-worker throughput while PayPal is slow.
+
+Starts the local PayPal stand-in (benchmarks.paypal_stub) with the given latency and
+drives the real app with a fixed number of request workers, each sending a mix of
+GET /users/me and POST /transactions/chargefunds. Compares running the PayPal call in
+the request thread (PAYPAL_JOBS_INLINE) with the background job pool.
+
+    python -m benchmarks.paypal_latency_benchmark --latency 0.5 --workers 8 --seconds 10
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from benchmarks.paypal_stub import start_stub
+
+MODES = ("inline", "jobs")
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def seed(app, workers):
+    from models import db, init_models
+    from models.user_model import User
+    from models.credit_card_model import CreditCard
+    from configuration.auth_filter import create_jwt_token
+
+    tokens = []
+    with app.app_context():
+        init_models()
+        db.create_all()
+        for i in range(workers):
+            db.session.add(User(dni=f"P{i}", name=f"User {i}", email=f"p{i}@bench", pwd="-",
+                                birth_date=date(1990, 1, 1), amount=0, phone="-", address="-"))
+            db.session.add(CreditCard(number=4000000000000000 + i, cvv="123", type="VISA",
+                                      expiration_date=date(2030, 1, 1), card_holder_name=f"User {i}",
+                                      paypal_token=f"bench-token-{i}", user_dni=f"P{i}"))
+        db.session.commit()
+        with app.test_request_context():
+            for i in range(workers):
+                tokens.append(create_jwt_token({"dni": f"P{i}", "email": f"p{i}@bench"}).get_json()["token"])
+    return tokens
+
+
+def run(app, mode, tokens, seconds, charge_every):
+    app.config["PAYPAL_JOBS_INLINE"] = mode == "inline"
+    latencies = {"me": [], "charge": []}
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {tokens[index]}"}
+        sent = 0
+        while time.perf_counter() < deadline:
+            sent += 1
+            started = time.perf_counter()
+            if sent % charge_every == 0:
+                kind = "charge"
+                response = client.post("/transactions/chargefunds", headers=headers,
+                                       json={"amount": 10, "credit_card_number": 4000000000000000 + index})
+            else:
+                kind = "me"
+                response = client.get("/users/me", headers=headers)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[kind].append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(tokens))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = len(latencies["me"]) + len(latencies["charge"])
+    return {
+        "mode": mode,
+        "requests_per_s": round(total / elapsed, 1),
+        "me_p50_ms": round(statistics.median(latencies["me"]) * 1000, 1) if latencies["me"] else None,
+        "me_p95_ms": round(percentile(latencies["me"], 0.95) * 1000, 1) if latencies["me"] else None,
+        "charge_p95_ms": round(percentile(latencies["charge"], 0.95) * 1000, 1) if latencies["charge"] else None,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds the stand-in waits before answering")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent request workers")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--charge-every", type=int, default=10, help="one chargefunds call every N requests")
+    parser.add_argument("--mode", choices=["both", *MODES], default="both")
+    args = parser.parse_args()
+
+    stub = start_stub(latency=args.latency)
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    # The app reads these at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["PAYPAL_BASE_URL"] = stub.url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("JWT_EXPIRATION_DAYS", "3600")
+    try:
+        from app import app
+        from models import db
+
+        tokens = seed(app, args.workers)
+        modes = list(MODES) if args.mode == "both" else [args.mode]
+        for mode in modes:
+            result = run(app, mode, tokens, args.seconds, args.charge_every)
+            print(" ".join(f"{key}={value}" for key, value in result.items()))
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        stub.shutdown()
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
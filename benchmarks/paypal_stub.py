@@ -0,0 +1,92 @@
+"""Local PayPal stand-in with configurable latency.
+
+Answers the OAuth token, vault payment-token and create-order calls used by
+PaypalService, sleeping `--latency` seconds before each response. Point the app at it
+with PAYPAL_BASE_URL=http://127.0.0.1:<port>.
+
+    python -m benchmarks.paypal_stub --port 8099 --latency 2
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PaypalStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        time.sleep(self.server.latency)
+        self.server.count_request()
+
+        if self.path.startswith("/v1/oauth2/token"):
+            body = {"access_token": "stub-token", "token_type": "Bearer", "expires_in": 32400}
+        elif self.path.startswith("/v3/vault/payment-tokens"):
+            body = {"id": uuid.uuid4().hex[:20], "customer": {"id": "stub"}}
+        elif self.path.startswith("/v2/checkout/orders"):
+            body = {"id": uuid.uuid4().hex[:17].upper(), "status": "COMPLETED"}
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(201 if not self.path.startswith("/v1/") else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PaypalStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0):
+        super().__init__(address, PaypalStubHandler)
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients that hit their read timeout hang up before the delayed answer is written
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub(latency=0.0, port=0):
+    """Start the stand-in in a background thread and return the server (use .url and .shutdown())."""
+    server = PaypalStubServer(("127.0.0.1", port), latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    args = parser.parse_args()
+    server = PaypalStubServer(("127.0.0.1", args.port), args.latency)
+    print(f"PayPal stand-in listening on {server.url} (latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
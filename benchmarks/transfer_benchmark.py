@@ -0,0 +1,141 @@
+"""Concurrency benchmark for balance transfers.
+
+Compares the previous flow (commit the Transaction, then read-modify-write each
+balance with its own commit) with TransferService (conditional UPDATE, one commit)
+on a throw-away SQLite database, and checks that no money is created or lost.
+
+    python -m benchmarks.transfer_benchmark --threads 8 --transfers 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from models import db, init_models
+from models.user_model import User
+from models.transaction_model import Transaction
+from models.enums import RequestStatusEnum, TransactionTypeEnum
+from models.errors.custom_exception_model import CustomException
+from configuration.database import init_storage
+from config import Config
+from services.transfer_service import TransferService
+
+INITIAL_BALANCE = 1000
+
+
+def legacy_transfer(sender_dni, receiver_dni, amount):
+    """The flow used by the controllers before TransferService: three commits and a read-modify-write."""
+    sender = db.session.get(User, sender_dni)
+    receiver = db.session.get(User, receiver_dni)
+    if sender.amount < amount:
+        raise CustomException("Insufficient funds", 400)
+    db.session.add(Transaction(
+        amount=amount, transaction_type=TransactionTypeEnum.SENT, message="bench",
+        sender_dni=sender_dni, receiver_dni=receiver_dni, status=RequestStatusEnum.COMPLETED
+    ))
+    db.session.commit()
+    new_sender_amount = sender.amount - amount
+    new_receiver_amount = receiver.amount + amount
+    sender.amount = new_sender_amount
+    db.session.commit()
+    receiver.amount = new_receiver_amount
+    db.session.commit()
+
+
+def atomic_transfer(sender_dni, receiver_dni, amount):
+    TransferService.transfer(sender_dni, receiver_dni, amount, "bench", None)
+
+
+STRATEGIES = {"legacy": legacy_transfer, "atomic": atomic_transfer}
+
+
+def create_app(db_path, threads):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_size": threads, "connect_args": {"timeout": 30}}
+    app.config["SQLITE_PRAGMAS"] = Config.SQLITE_PRAGMAS
+    db.init_app(app)
+    init_storage(app)
+    return app
+
+
+def seed(app, users):
+    with app.app_context():
+        init_models()
+        db.create_all()
+        db.session.add_all([
+            User(dni=f"U{i}", name=f"User {i}", email=f"u{i}@bench", pwd="-", birth_date=date(1990, 1, 1),
+                 amount=INITIAL_BALANCE, phone="-", address="-")
+            for i in range(users)
+        ])
+        db.session.commit()
+
+
+def run(strategy, threads, transfers, users, seed_value):
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        app = create_app(db_path, threads)
+        seed(app, users)
+        counters = {"committed": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(index):
+            rnd = random.Random(seed_value + index)
+            with app.app_context():
+                for _ in range(transfers // threads):
+                    sender, receiver = rnd.sample(range(users), 2)
+                    outcome = "committed"
+                    try:
+                        STRATEGIES[strategy](f"U{sender}", f"U{receiver}", rnd.randint(1, 50))
+                    except CustomException:
+                        outcome = "rejected"
+                    except OperationalError:
+                        db.session.rollback()
+                        outcome = "errors"
+                    with lock:
+                        counters[outcome] += 1
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            total = float(db.session.query(db.func.sum(User.amount)).scalar())
+            db.engine.dispose()
+        return {
+            "strategy": strategy,
+            "elapsed_s": round(elapsed, 3),
+            "transfers_per_s": round(counters["committed"] / elapsed, 1),
+            **counters,
+            "money_drift": total - users * INITIAL_BALANCE,
+        }
+    finally:
+        os.remove(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--transfers", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--strategy", choices=["both", *STRATEGIES], default="both")
+    args = parser.parse_args()
+
+    strategies = list(STRATEGIES) if args.strategy == "both" else [args.strategy]
+    for strategy in strategies:
+        result = run(strategy, args.threads, args.transfers, args.users, args.seed)
+        print(" ".join(f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+def register_commands(app):
+    """Registrar los comandos de `flask <comando>` de la aplicación"""
+    from .query_plan_command import check_query_plans_command
+    from .idempotency_command import purge_idempotency_keys_command
+    from .seed_command import seed_data_command
+    from .ledger_command import take_balance_snapshots_command, check_ledger_command
+    from .rollup_command import rebuild_rollups_command
+    from .user_search_command import rebuild_user_search_command
+    from .friend_suggestion_command import refresh_friend_suggestions_command
+
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(seed_data_command)
+    app.cli.add_command(take_balance_snapshots_command)
+    app.cli.add_command(check_ledger_command)
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(rebuild_user_search_command)
+    app.cli.add_command(refresh_friend_suggestions_command)
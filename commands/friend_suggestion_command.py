@@ -0,0 +1,16 @@
+# commands/friend_suggestion_command.py
+import click
+from flask.cli import with_appcontext
+from services.friend_suggestion_service import FriendSuggestionService, REFRESH_CHUNK_SIZE
+
+
+@click.command("refresh-friend-suggestions")
+@click.option("--chunk-size", default=REFRESH_CHUNK_SIZE, show_default=True, help="Users recomputed per commit")
+@with_appcontext
+def refresh_friend_suggestions_command(chunk_size):
+    """Recompute the mutual friend counts of /friendship/suggestions from the friends table."""
+    def progress(users_done):
+        click.echo(f"  {users_done:,} users")
+
+    users = FriendSuggestionService.refresh(chunk_size=chunk_size, progress=progress)
+    click.echo(f"🤝 Refreshed the friend suggestions of {users:,} users")
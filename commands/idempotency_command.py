@@ -0,0 +1,13 @@
+# commands/idempotency_command.py
+import click
+from flask.cli import with_appcontext
+from services.idempotency_service import IdempotencyService
+
+
+@click.command("purge-idempotency-keys")
+@click.option("--batch-size", default=1000, show_default=True, help="Rows deleted per commit")
+@with_appcontext
+def purge_idempotency_keys_command(batch_size):
+    """Delete stored Idempotency-Key responses whose TTL has passed."""
+    deleted = IdempotencyService.purge_expired(batch_size)
+    click.echo(f"🧹 Deleted {deleted} expired idempotency keys")
@@ -0,0 +1,27 @@
+# commands/ledger_command.py
+import click
+from flask.cli import with_appcontext
+from services.ledger_service import LedgerService
+
+
+@click.command("take-balance-snapshots")
+@with_appcontext
+def take_balance_snapshots_command():
+    """Snapshot the balance of every account with new ledger entries (run it periodically, e.g. from cron)."""
+    created = LedgerService.take_snapshots()
+    click.echo(f"📸 Took {created} balance snapshots")
+
+
+@click.command("check-ledger")
+@with_appcontext
+def check_ledger_command():
+    """Fail if a posting does not add up to zero or a user's balance differs from the ledger."""
+    unbalanced, mismatched = LedgerService.find_inconsistencies()
+    for posting_id in unbalanced:
+        click.echo(f"[FAIL] posting {posting_id} does not add up to zero")
+    for user in mismatched:
+        click.echo(f"[FAIL] user {user['dni']}: amount {user['amount']} != ledger {user['ledger_balance']}")
+
+    if unbalanced or mismatched:
+        raise click.ClickException(f"{len(unbalanced)} unbalanced postings, {len(mismatched)} users out of sync")
+    click.echo("✅ Ledger is consistent")
@@ -0,0 +1,87 @@
+# commands/query_plan_command.py
+import re
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+from models import db
+from services.transaction_service import TransactionService, HISTORY_DEFAULT_LIMIT
+from services.user_service import UserService
+from services.api_service import ApiService
+from services.credit_card_service import CreditCardService
+from services.relationship_service import RelationshipService
+from services.friend_suggestion_service import FriendSuggestionService, SUGGESTIONS_DEFAULT_LIMIT
+from models.user_model import User
+from models.user_relations import Friends
+from models.credit_card_model import CreditCard
+from models.apikey_model import ApiKey
+from models.idempotency_key_model import IdempotencyKey
+from models.ledger_model import LedgerEntry, BalanceSnapshot
+from models.rollup_model import MonthlyRollup, MonthlyCounterparty
+
+# Hot queries issued by the services and controllers, built with placeholder values (ORM queries or Core selects)
+HOT_QUERIES = {
+    "transaction history": lambda: TransactionService.history_query("dni", limit=HISTORY_DEFAULT_LIMIT + 1),
+    "transaction history page": lambda: TransactionService.history_query("dni", (datetime(2026, 1, 1), 1), HISTORY_DEFAULT_LIMIT + 1),
+    "pending transaction requests": lambda: TransactionService.pending_requests_query("dni"),
+    "pending friendship requests": lambda: UserService.pending_friendship_requests_query("dni"),
+    "api key lookup": lambda: ApiKey.query.filter_by(key_hash=ApiKey.hash_key("key")),
+    "user api keys": lambda: ApiService.user_api_keys_query("dni"),
+    "user credit cards": lambda: CreditCardService.user_credit_cards_query("dni"),
+    "credit card export since": lambda: CreditCardService.export_query(db.func.current_date()),
+    "credit card of user": lambda: CreditCard.query.filter_by(number=1, user_dni="dni"),
+    "user by email": lambda: User.query.filter_by(email="email"),
+    "block status": lambda: RelationshipService.block_status_query("dni", "other"),
+    "friendship check": lambda: RelationshipService.exists_query(Friends.c.user_dni, Friends.c.friend_dni, "dni", "other"),
+    "friend suggestions": lambda: FriendSuggestionService.suggestions_query("dni").limit(SUGGESTIONS_DEFAULT_LIMIT),
+    "user search": lambda: UserService.search_query("dni", "query").limit(21),
+    "idempotency key lookup": lambda: IdempotencyKey.query.filter_by(owner="dni", key="key"),
+    "expired idempotency keys": lambda: db.session.query(IdempotencyKey.id).filter(IdempotencyKey.expires_at <= db.func.now()).limit(1000),
+    "latest balance snapshot": lambda: BalanceSnapshot.query.filter(BalanceSnapshot.account == "dni", BalanceSnapshot.taken_at <= db.func.now()).order_by(BalanceSnapshot.taken_at.desc()).limit(1),
+    "ledger entries since snapshot": lambda: db.session.query(db.func.sum(LedgerEntry.amount)).filter(LedgerEntry.account == "dni", LedgerEntry.created_at > db.func.now(), LedgerEntry.created_at <= db.func.now()),
+    "monthly rollups": lambda: MonthlyRollup.query.filter(MonthlyRollup.user_dni == "dni", MonthlyRollup.month.between("2026-01", "2026-12")),
+    "monthly counterparties": lambda: MonthlyCounterparty.query.filter(MonthlyCounterparty.user_dni == "dni", MonthlyCounterparty.month.between("2026-01", "2026-12")),
+    "ledger entries to snapshot": lambda: db.session.query(LedgerEntry.account, db.func.sum(LedgerEntry.amount)).filter(LedgerEntry.created_at > db.func.now(), LedgerEntry.created_at <= db.func.now()).group_by(LedgerEntry.account),
+}
+
+
+def explain(statement):
+    """Return the plan lines of a statement and the ones that scan a whole table"""
+    engine = db.engine
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+            plan = [row[-1] for row in rows]
+            # FTS5 tables always report SCAN, but VIRTUAL TABLE INDEX means MATCH is served by their own index.
+            # Scanning a subquery (anon_N) only reads the rows its own, already checked, plan produced
+            scans = [
+                line for line in plan
+                if line.startswith("SCAN ") and "CONSTANT ROW" not in line and "VIRTUAL TABLE INDEX" not in line
+                and not re.match(r"SCAN anon_\d+", line)
+            ]
+        else:
+            rows = connection.exec_driver_sql(f"EXPLAIN {sql}").mappings().all()
+            plan = [f"{row['table']}: type={row['type']} key={row['key']}" for row in rows]
+            # Derived tables and union results (<derived2>, <union2,3>) are the output of the rows above them
+            scans = [line for line, row in zip(plan, rows) if row["type"] == "ALL" and not str(row["table"]).startswith("<")]
+    return plan, scans
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans_command():
+    """Fail if any hot query would scan a whole table instead of using an index."""
+    failures = 0
+    for name, build in HOT_QUERIES.items():
+        query = build()
+        plan, scans = explain(getattr(query, "statement", query))
+        status = "FAIL" if scans else "ok"
+        failures += bool(scans)
+        click.echo(f"[{status}] {name}")
+        for line in plan:
+            click.echo(f"    {line}")
+
+    if failures:
+        raise click.ClickException(f"{failures} hot queries do not use an index")
+    click.echo("✅ All hot queries use an index")
@@ -0,0 +1,16 @@
+# commands/rollup_command.py
+import click
+from flask.cli import with_appcontext
+from services.rollup_service import RollupService, REBUILD_CHUNK_SIZE
+
+
+@click.command("rebuild-rollups")
+@click.option("--chunk-size", default=REBUILD_CHUNK_SIZE, show_default=True, help="Transaction ids aggregated per commit")
+@with_appcontext
+def rebuild_rollups_command(chunk_size):
+    """Recompute the monthly rollups of /transactions/stats from the existing transactions."""
+    def progress(done_id, last_id):
+        click.echo(f"  {done_id:,}/{last_id:,} transaction ids")
+
+    last_id = RollupService.rebuild(chunk_size=chunk_size, progress=progress)
+    click.echo(f"📊 Rebuilt the monthly rollups up to transaction {last_id}")
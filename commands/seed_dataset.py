@@ -0,0 +1,252 @@
+"""Seeded bulk dataset.
+
+Generates users (with one credit card and one API key each), a random friend graph,
+favourites, blocks, pending friendship requests, transactions with their ledger entries
+and monthly rollups from a fixed seed, so the same arguments always produce the same database. Rows are produced lazily and
+inserted in chunks with Core executemany, one database transaction per table, and every
+user shares one precomputed password hash: a million transactions load in about a minute.
+
+Used by the endpoint benchmark and by `flask seed-data`.
+"""
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from itertools import islice
+from werkzeug.security import generate_password_hash
+from models.user_model import User
+from models.user_relations import Friends, Blocked, Favourites
+from models.credit_card_model import CreditCard
+from models.apikey_model import ApiKey
+from models.transaction_model import Transaction
+from models.ledger_model import LedgerEntry, OPENING_ACCOUNT
+from models.friendship_request_model import FriendshipRequest
+from models.enums import RequestStatusEnum, TransactionTypeEnum, LedgerEntryKindEnum
+from models.rollup_model import MonthlyRollup
+from models.friend_suggestion_model import FriendSuggestion
+from services.rollup_service import RollupService
+from services.friend_suggestion_service import FriendSuggestionService
+from sqlalchemy import func, select
+
+PASSWORD = "password"
+INITIAL_BALANCE = 1_000_000
+CARD_NUMBER_BASE = 4_000_000_000_000_000
+INSERT_CHUNK = 10000
+# Deterministic API keys and key ids: uuid5(namespace, dni) and uuid5(namespace, "id:" + dni)
+API_KEY_NAMESPACE = uuid.UUID("0b5a4c1e-6f0e-4b8e-9c43-5b7f1e2d9a01")
+DATASET_NOW = datetime(2026, 1, 1)
+OPENED_AT = DATASET_NOW - timedelta(days=366)  # Before every generated transaction
+
+
+def user_dni(index):
+    return f"U{index:08d}"
+
+
+def card_number(index):
+    return CARD_NUMBER_BASE + index
+
+
+def api_key(index):
+    return str(uuid.uuid5(API_KEY_NAMESPACE, user_dni(index)))
+
+
+def api_key_id(index):
+    return str(uuid.uuid5(API_KEY_NAMESPACE, "id:" + user_dni(index)))
+
+
+def _user_rows(rnd, users, pwd):
+    today = DATASET_NOW.date()
+    for i in range(users):
+        yield {
+            "dni": user_dni(i), "name": f"User {i}", "email": f"user{i}@bench.local", "pwd": pwd,
+            "birth_date": date(1970, 1, 1) + timedelta(days=rnd.randrange(15000)), "active": True,
+            "image": None, "amount": INITIAL_BALANCE, "administrator": i == 0,
+            "created_at": today, "phone": f"600{i:06d}", "address": f"Street {i}",
+        }
+
+
+def _card_rows(users):
+    today = DATASET_NOW.date()
+    for i in range(users):
+        yield {
+            "number": card_number(i), "cvv": "123", "type": "visa", "expiration_date": date(2030, 12, 31),
+            "active": True, "card_holder_name": f"User {i}", "paypal_token": f"bench-{i}",
+            "created_at": today, "user_dni": user_dni(i),
+        }
+
+
+def _api_key_rows(users):
+    for i in range(users):
+        yield {
+            "id": api_key_id(i), "user_dni": user_dni(i),
+            "key_hash": ApiKey.hash_key(api_key(i)), "name": "bench", "created_at": DATASET_NOW,
+        }
+
+
+def friend_edges(rnd, users, friends_per_user):
+    """Undirected friend pairs (i < j) averaging `friends_per_user` friends per user, encoded as i * users + j"""
+    edges = set()
+    target = users * friends_per_user // 2
+    attempts = 0
+    while len(edges) < target and attempts < target * 4:
+        attempts += 1
+        i, j = rnd.randrange(users), rnd.randrange(users)
+        if i != j:
+            edges.add(min(i, j) * users + max(i, j))
+    return sorted(edges)
+
+
+def _friend_rows(edges, users):
+    # Friendships are stored in both directions, like UserService.accept_friendship_request does
+    for edge in edges:
+        i, j = divmod(edge, users)
+        yield {"user_dni": user_dni(i), "friend_dni": user_dni(j)}
+        yield {"user_dni": user_dni(j), "friend_dni": user_dni(i)}
+
+
+def _favourite_rows(rnd, edges, users):
+    for edge in edges:
+        if rnd.random() < 0.1:
+            i, j = divmod(edge, users)
+            yield {"user_dni": user_dni(i), "favourite_dni": user_dni(j)}
+
+
+def _random_pairs(rnd, users, count, exclude):
+    pairs = set()
+    for _ in range(count):
+        i, j = rnd.randrange(users), rnd.randrange(users)
+        if i != j and min(i, j) * users + max(i, j) not in exclude:
+            pairs.add((i, j))
+    return sorted(pairs)
+
+
+def _transaction_rows(rnd, users, transactions):
+    completed, pending = RequestStatusEnum.COMPLETED.value, RequestStatusEnum.PENDING.value
+    sent, request = TransactionTypeEnum.SENT.value, TransactionTypeEnum.REQUEST.value
+    year = 365 * 24 * 3600
+    for transaction_id in range(1, transactions + 1):
+        sender = rnd.randrange(users)
+        receiver = (sender + 1 + rnd.randrange(users - 1)) % users
+        is_request = rnd.random() < 0.1
+        yield {
+            "id": transaction_id,
+            "amount": rnd.randint(1, 200),
+            "transaction_type": request if is_request else sent,
+            "message": "bench",
+            "date": DATASET_NOW - timedelta(seconds=rnd.randrange(year)),
+            "status": pending if is_request else completed,
+            "credit_card_number": None if is_request else card_number(sender),
+            "sender_dni": user_dni(sender),
+            "receiver_dni": user_dni(receiver),
+        }
+
+
+def _ledger_rows(users, transaction_rows):
+    # Opening balances first, then a posting per COMPLETED transaction, like TransferService writes them
+    opening = LedgerEntryKindEnum.OPENING.value
+    for i in range(users):
+        dni = user_dni(i)
+        posting_id = f"opening:{dni}"
+        yield {"posting_id": posting_id, "account": OPENING_ACCOUNT, "amount": -INITIAL_BALANCE, "kind": opening,
+               "transaction_id": None, "created_at": OPENED_AT}
+        yield {"posting_id": posting_id, "account": dni, "amount": INITIAL_BALANCE, "kind": opening,
+               "transaction_id": None, "created_at": OPENED_AT}
+    completed, transfer = RequestStatusEnum.COMPLETED.value, LedgerEntryKindEnum.TRANSFER.value
+    for row in transaction_rows:
+        if row["status"] == completed:
+            posting_id = f"seed:{row['id']}"
+            yield {"posting_id": posting_id, "account": row["sender_dni"], "amount": -row["amount"], "kind": transfer,
+                   "transaction_id": row["id"], "created_at": row["date"]}
+            yield {"posting_id": posting_id, "account": row["receiver_dni"], "amount": row["amount"], "kind": transfer,
+                   "transaction_id": row["id"], "created_at": row["date"]}
+
+
+def _sync_balances(engine):
+    """user.amount = ledger balance, for every user"""
+    user_table = User.__table__
+    ledger_balance = (
+        select(func.sum(LedgerEntry.amount))
+        .where(LedgerEntry.account == user_table.c.dni)
+        .scalar_subquery()
+    )
+    with engine.begin() as connection:
+        connection.execute(user_table.update().values(amount=ledger_balance))
+
+
+def _insert(engine, table, rows):
+    """executemany in chunks of INSERT_CHUNK rows, all in one database transaction. Returns the row count.
+
+    The secondary indexes are dropped during the load and built again at the end: sorting the whole
+    table once is much cheaper than updating the index B-trees row by row.
+    """
+    count = 0
+    statement = table.insert()
+    with engine.begin() as connection:
+        for index in table.indexes:
+            index.drop(connection)
+        while True:
+            chunk = list(islice(rows, INSERT_CHUNK))
+            if not chunk:
+                break
+            connection.execute(statement, chunk)
+            count += len(chunk)
+        for index in table.indexes:
+            index.create(connection)
+    return count
+
+
+def build_dataset(engine, users=200, transactions=5000, friend_density=0.05, seed=42, friends_per_user=None, progress=None):
+    """
+    Fill an empty schema. User 0 is an administrator. Each user gets `friends_per_user`
+    friends on average (by default `friend_density` of the other users).
+    `progress(table, rows, seconds)` is called after each table. Returns the row count per table.
+    """
+    if users < 2:
+        raise ValueError("At least two users are needed")
+    rnd = random.Random(seed)
+    if friends_per_user is None:
+        friends_per_user = round(friend_density * (users - 1))
+    pwd = generate_password_hash(PASSWORD)  # One PBKDF2 run shared by every user
+
+    edges = friend_edges(rnd, users, friends_per_user)
+    edge_set = set(edges)
+    transaction_seed = rnd.getrandbits(64)  # The ledger replays the same transaction stream
+    tables = [
+        ("users", User.__table__, lambda: _user_rows(rnd, users, pwd)),
+        ("credit_cards", CreditCard.__table__, lambda: _card_rows(users)),
+        ("api_keys", ApiKey.__table__, lambda: _api_key_rows(users)),
+        ("friends", Friends, lambda: _friend_rows(edges, users)),
+        ("favourites", Favourites, lambda: _favourite_rows(rnd, edges, users)),
+        ("blocked", Blocked, lambda: ({"user_dni": user_dni(i), "blocked_dni": user_dni(j)}
+                                      for i, j in _random_pairs(rnd, users, max(1, users // 50), edge_set))),
+        ("friendship_requests", FriendshipRequest.__table__, lambda: (
+            {"sender_dni": user_dni(i), "receiver_dni": user_dni(j), "status": RequestStatusEnum.PENDING.name,
+             "created_at": DATASET_NOW}
+            for i, j in _random_pairs(rnd, users, users, edge_set))),
+        ("transactions", Transaction.__table__, lambda: _transaction_rows(random.Random(transaction_seed), users, transactions)),
+        ("ledger_entries", LedgerEntry.__table__, lambda: _ledger_rows(
+            users, _transaction_rows(random.Random(transaction_seed), users, transactions))),
+    ]
+
+    summary = {}
+    for name, table, rows in tables:
+        started = time.perf_counter()
+        summary[name] = _insert(engine, table, rows())
+        if progress:
+            progress(name, summary[name], time.perf_counter() - started)
+    _sync_balances(engine)
+
+    started = time.perf_counter()
+    RollupService.rebuild(engine)
+    with engine.connect() as connection:
+        summary["monthly_rollups"] = connection.execute(select(func.count()).select_from(MonthlyRollup)).scalar()
+    if progress:
+        progress("monthly_rollups", summary["monthly_rollups"], time.perf_counter() - started)
+
+    started = time.perf_counter()
+    FriendSuggestionService.refresh(engine)
+    with engine.connect() as connection:
+        summary["friend_suggestions"] = connection.execute(select(func.count()).select_from(FriendSuggestion)).scalar()
+    if progress:
+        progress("friend_suggestions", summary["friend_suggestions"], time.perf_counter() - started)
+    return summary
@@ -0,0 +1,19 @@
+# commands/user_search_command.py
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from models import db
+from models.user_search_model import USER_SEARCH_DDL, USER_SEARCH_DROP_DDL, USER_SEARCH_POPULATE
+
+
+@click.command("rebuild-user-search")
+@with_appcontext
+def rebuild_user_search_command():
+    """Recreate the user search index (SQLite FTS5) and its triggers from the users table."""
+    if db.engine.dialect.name != "sqlite":
+        raise click.ClickException("The user search index only exists on SQLite; other databases search with LIKE")
+    with db.engine.begin() as connection:
+        for statement in USER_SEARCH_DROP_DDL + USER_SEARCH_DDL + (USER_SEARCH_POPULATE,):
+            connection.execute(text(statement))
+        indexed = connection.execute(text("SELECT count(*) FROM users_fts")).scalar()
+    click.echo(f"🔎 Indexed {indexed} users")
@@ -2,9 +2,25 @@ from jwt import encode, decode
 from os import getenv
 from datetime import datetime, timedelta
 from jwt import exceptions
+from hashlib import sha256
+from configuration.cache import TTLCache
 from models.errors.error_response_model import ErrorResponse
 from models.errors.custom_exception_model import CustomException
-from flask import jsonify, request
+from flask import g, jsonify, request
+from services.user_service import UserService
+
+# Verified tokens, keyed by digest and dropped at their `exp`, so repeated calls skip the HS256 check.
+# A token without `exp` is kept for at most TOKEN_CACHE_TTL seconds
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL = 300
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_SIZE, default_ttl=TOKEN_CACHE_TTL)
+
+def token_digest(token: str):
+    return sha256(token.encode("utf-8")).hexdigest()
+
+def forget_token(token: str):
+    """ Drop a token from the verified cache (e.g. when it is revoked). """
+    token_cache.invalidate(token_digest(token))
 
 def expired_token():
     current_date = datetime.now()
@@ -13,7 +29,8 @@ def expired_token():
     
     return expiration_date
 
-def create_jwt_token(data: dict):    
+def create_jwt_token(data: dict):
+    """ Build the login response. `data` holds the claims: the user's `dni` (and `email` for display). """
     token = encode(payload={**data, "exp":expired_token()}, key=getenv("SECRET_KEY"), algorithm='HS256')
     response = {
         "token": token.encode("UTF-8") if isinstance(token, bytes) else token,
@@ -27,9 +44,13 @@ def create_jwt_token(data: dict):
 
 def validate_jwt_token(token: str, output=False):
     try:
+       digest = token_digest(token)
+       decoded = token_cache.get(digest)
+       if decoded is None:
+           decoded = decode(token, key=getenv('SECRET_KEY'), algorithms=['HS256'])
+           token_cache.set(digest, decoded, expires_at=decoded.get("exp"))
        if output:
-           return decode(token, key=getenv('SECRET_KEY'), algorithms=['HS256'])
-       decode(token, key=getenv('SECRET_KEY'), algorithms=['HS256'])
+           return decoded
        
     except exceptions.DecodeError as e:
         exception = Exception("Invalid token")
@@ -45,13 +66,10 @@ def validate_jwt_token(token: str, output=False):
     
 def verify_token():
     """ Middleware to verify JWT before each request. """
-    print("🔍 Verifying request...")
-    print(f"🔗 Path: {request.path}")
-    
     if request.method == 'OPTIONS':
         return None
     
-    if request.path in ['/auth/authenticate', '/users/create', 'public_route', '/api/payments/request']:  # Exclude public routes
+    if request.path in ['/auth/authenticate', '/users/create', 'public_route', '/api/payments/request', '/metrics']:  # Exclude public routes
         return
     
     try:
@@ -65,7 +83,16 @@ def verify_token():
         if isinstance(decoded, tuple):  # If validation failed, return the response
             return decoded
         
+        if not decoded.get("dni"):  # Tokens issued before the dni claim existed
+            raise CustomException("Token is no longer valid. Please log in again.", 401)
+        
+        # Resolve the principal once by primary key; controllers reuse it through g.current_user
+        principal = UserService.get_principal(decoded["dni"])
+        if not principal:
+            raise CustomException("User not found", 401)
+        
         request.user = decoded  # Attach user info to the request
+        g.current_user = principal
 
     except CustomException as e:
         error_response = ErrorResponse.from_exception(e, e.status_code)
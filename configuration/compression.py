@@ -0,0 +1,22 @@
+import zlib
+from flask import request
+
+GZIP_LEVEL = 6
+
+
+def accepts_gzip():
+    """ True when the client sent Accept-Encoding: gzip. """
+    return "gzip" in request.accept_encodings
+
+
+def gzip_stream(chunks, level=GZIP_LEVEL):
+    """
+    Compress a streamed body (str or bytes chunks) into a single gzip member as it is produced,
+    so a response of any size is compressed in constant memory. Pair it with Content-Encoding: gzip.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16+: gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
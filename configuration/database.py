@@ -0,0 +1,20 @@
+from sqlalchemy import event
+from models import db
+
+
+def init_storage(app):
+    """ Apply the storage profile of the app config to the engine created by db.init_app. """
+    with app.app_context():
+        engine = db.engine
+
+    if engine.dialect.name != "sqlite":
+        return  # Server backends are tuned through SQLALCHEMY_ENGINE_OPTIONS (pool settings)
+
+    pragmas = app.config.get("SQLITE_PRAGMAS", {})
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
@@ -0,0 +1,53 @@
+from functools import wraps
+from flask import g, jsonify, make_response, request
+from models.errors.custom_exception_model import CustomException
+from models.errors.error_response_model import ErrorResponse
+from services.idempotency_service import IdempotencyService
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def current_user_owner():
+    """ Idempotency keys of JWT-authenticated routes belong to the logged-in user. """
+    user = g.get("current_user")
+    return user.dni if user else None
+
+
+def idempotent(owner=current_user_owner):
+    """
+    Make a route safe to retry. When the request carries an Idempotency-Key header, the first
+    response is stored and returned again to later requests with the same key and body,
+    without running the route again. `owner` returns who the key belongs to (None skips it).
+    Inside the route, g.paypal_request_id holds the PayPal request id derived from the key.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            key_owner = owner() if key is not None else None
+            if key_owner is None:
+                return view(*args, **kwargs)
+
+            try:
+                request_hash = IdempotencyService.request_hash(request.method, request.path, request.get_data())
+                record, replay = IdempotencyService.begin(key_owner, key, request_hash)
+            except CustomException as e:
+                error_response = ErrorResponse.from_exception(e, e.status_code)
+                return jsonify(error_response.to_dict()), e.status_code
+
+            if replay:
+                response = make_response(record.response_body, record.response_status, IdempotencyService.replayed_headers(record))
+                response.mimetype = "application/json"
+                response.headers["Idempotent-Replayed"] = "true"
+                return response
+
+            g.paypal_request_id = IdempotencyService.paypal_request_id(key_owner, key)
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                IdempotencyService.complete(record, 500, None)
+                raise
+            IdempotencyService.complete(record, response.status_code, response.get_data(as_text=True), response.headers)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = "X-Request-Id"
+# Access log: one line per request, the highest-volume event (sample it with LOG_SAMPLING="access=0.1")
+access_logger = logging.getLogger("access")
+
+# Attributes every LogRecord has; anything else was passed with `extra=` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """ One JSON object per line: timestamp, level, logger, message, request id and `extra` fields. """
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestIdFilter(logging.Filter):
+    """ Stamp records with the id of the request being served (runs in the emitting thread). """
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = g.get("request_id") if has_request_context() else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """ Keep only a fraction of the records of some loggers. Warnings and errors are always kept. """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """ Hand records to the listener thread. When the queue is full the record is dropped, never waited on. """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and the traceback here: the arguments may not be safe to use from another thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(value):
+    """ "payesi=INFO,access=WARNING" -> {"payesi": "INFO", "access": "WARNING"} """
+    levels = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def parse_rates(value):
+    """ "access=0.1" -> {"access": 0.1} """
+    return {name: float(rate) for name, rate in parse_levels(value).items()}
+
+
+def init_logging(app):
+    """
+    Route every log record through a queue to a single listener thread that writes JSON lines
+    to stdout, and give each request an id (X-Request-Id header, generated when missing).
+    """
+    log_queue = queue.Queue(maxsize=app.config.get("LOG_QUEUE_SIZE", 10000))
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter(parse_rates(app.config.get("LOG_SAMPLING"))))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(app.config.get("LOG_LEVEL", "INFO").upper())
+    for name, level in parse_levels(app.config.get("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level)
+
+    app.extensions["log_queue_handler"] = queue_handler
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        response.headers[REQUEST_ID_HEADER] = g.get("request_id", "")
+        if access_logger.isEnabledFor(logging.INFO):
+            access_logger.info("%s %s %s", request.method, request.path, response.status_code, extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - g.get("request_started", time.perf_counter())) * 1000, 2),
+            })
+        return response
@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from models import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+SLOW_REQUEST_TOP_STATEMENTS = 5
+slow_request_logger = logging.getLogger("slow_request")
+
+
+class Histogram:
+    """ Prometheus-style histogram: per-bucket counts, sum and count. Not thread-safe on its own. """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+    """ In-process request metrics, keyed by endpoint (the URL rule, e.g. /users/<dni>) and method. """
+
+    _lock = threading.Lock()
+    latency = {}  # (endpoint, method) -> Histogram of seconds
+    statuses = {}  # (endpoint, method, status) -> count
+    sql_queries = {}  # (endpoint, method) -> Histogram of statements per request
+    sql_seconds = {}  # (endpoint, method) -> total seconds spent in SQL
+
+    @staticmethod
+    def observe(endpoint, method, status, seconds, queries, sql_seconds):
+        key = (endpoint, method)
+        with RequestMetrics._lock:
+            histogram = RequestMetrics.latency.get(key)
+            if histogram is None:
+                histogram = RequestMetrics.latency[key] = Histogram(LATENCY_BUCKETS)
+                RequestMetrics.sql_queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+                RequestMetrics.sql_seconds[key] = 0.0
+            histogram.observe(seconds)
+            RequestMetrics.sql_queries[key].observe(queries)
+            RequestMetrics.sql_seconds[key] += sql_seconds
+            status_key = (endpoint, method, status)
+            RequestMetrics.statuses[status_key] = RequestMetrics.statuses.get(status_key, 0) + 1
+
+    @staticmethod
+    def snapshot():
+        with RequestMetrics._lock:
+            copy = lambda h: (list(h.cumulative()), h.sum, h.count)
+            return (
+                {key: copy(h) for key, h in RequestMetrics.latency.items()},
+                dict(RequestMetrics.statuses),
+                {key: copy(h) for key, h in RequestMetrics.sql_queries.items()},
+                dict(RequestMetrics.sql_seconds),
+            )
+
+
+def _labels(**labels):
+    escape = lambda value: str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name, series):
+    """ series: {labels dict as tuple of pairs: (cumulative buckets, sum, count)} """
+    lines = []
+    for labels, (buckets, total, count) in series.items():
+        labels = dict(labels)
+        for bound, cumulative in buckets:
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {total}")
+        lines.append(f"{name}_count{_labels(**labels)} {count}")
+    return lines
+
+
+def render_metrics(app):
+    """ All metrics of this process in the Prometheus text exposition format. """
+    from services.paypal_transport import PaypalTransport, LATENCY_BUCKETS as PAYPAL_BUCKETS
+
+    latency, statuses, sql_queries, sql_seconds = RequestMetrics.snapshot()
+    lines = [
+        "# HELP http_request_duration_seconds Request latency per endpoint.",
+        "# TYPE http_request_duration_seconds histogram",
+        *_histogram_lines("http_request_duration_seconds", {
+            (("endpoint", endpoint), ("method", method)): value for (endpoint, method), value in latency.items()
+        }),
+        "# HELP http_requests_total Responses per endpoint and status code.",
+        "# TYPE http_requests_total counter",
+        *(f"http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}"
+          for (endpoint, method, status), count in statuses.items()),
+        "# HELP http_request_sql_queries SQL statements executed per request.",
+        "# TYPE http_request_sql_queries histogram",
+        *_histogram_lines("http_request_sql_queries", {
+            (("endpoint", endpoint), ("method", method)): value for (endpoint, method), value in sql_queries.items()
+        }),
+        "# HELP http_request_sql_seconds_total Time spent executing SQL per endpoint.",
+        "# TYPE http_request_sql_seconds_total counter",
+        *(f"http_request_sql_seconds_total{_labels(endpoint=endpoint, method=method)} {seconds}"
+          for (endpoint, method), seconds in sql_seconds.items()),
+    ]
+
+    paypal = PaypalTransport.stats()
+    lines += [
+        "# HELP paypal_call_duration_seconds Latency of PayPal API calls per operation.",
+        "# TYPE paypal_call_duration_seconds histogram",
+        *_histogram_lines("paypal_call_duration_seconds", {
+            (("operation", name),): (list(zip(PAYPAL_BUCKETS, metric["buckets"].values())), metric["sum"], metric["count"])
+            for name, metric in paypal["operations"].items()
+        }),
+        "# HELP paypal_call_errors_total Failed PayPal API calls per operation.",
+        "# TYPE paypal_call_errors_total counter",
+        *(f"paypal_call_errors_total{_labels(operation=name)} {metric['errors']}"
+          for name, metric in paypal["operations"].items()),
+        "# HELP paypal_circuit_state Circuit breaker state (1 for the current one).",
+        "# TYPE paypal_circuit_state gauge",
+        *(f"paypal_circuit_state{_labels(state=state)} {int(paypal['breaker']['state'] == state)}"
+          for state in ("closed", "open", "half_open")),
+        "# HELP paypal_circuit_rejected_total Calls rejected while the circuit was open.",
+        "# TYPE paypal_circuit_rejected_total counter",
+        f"paypal_circuit_rejected_total {paypal['breaker']['rejected']}",
+    ]
+
+    queue_handler = app.extensions.get("log_queue_handler")
+    if queue_handler is not None:
+        lines += [
+            "# HELP log_records_dropped_total Log records dropped because the log queue was full.",
+            "# TYPE log_records_dropped_total counter",
+            f"log_records_dropped_total {queue_handler.dropped}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app):
+    """
+    Time every request and count the SQL it runs (through engine events). Requests slower than
+    SLOW_REQUEST_MS are logged with their most expensive statements.
+    """
+    slow_request_seconds = (app.config.get("SLOW_REQUEST_MS") or 0) / 1000
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["statement_started"].pop()
+        if not has_request_context() or "sql_queries" not in g:
+            return  # Background jobs and CLI commands
+        g.sql_queries += 1
+        g.sql_seconds += elapsed
+        if slow_request_seconds:
+            stats = g.sql_statements.setdefault(statement, [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.sql_queries = 0
+        g.sql_seconds = 0.0
+        g.sql_statements = {}
+
+    @app.after_request
+    def record_request(response):
+        if "metrics_started" not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_started
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        RequestMetrics.observe(endpoint, request.method, response.status_code, elapsed, g.sql_queries, g.sql_seconds)
+
+        if slow_request_seconds and elapsed >= slow_request_seconds:
+            top = sorted(g.sql_statements.items(), key=lambda item: item[1][1], reverse=True)[:SLOW_REQUEST_TOP_STATEMENTS]
+            slow_request_logger.warning("Slow request %s %s took %.0f ms", request.method, request.path, elapsed * 1000, extra={
+                "endpoint": endpoint,
+                "duration_ms": round(elapsed * 1000, 2),
+                "sql_queries": g.sql_queries,
+                "sql_ms": round(g.sql_seconds * 1000, 2),
+                "top_sql": [
+                    {"statement": " ".join(statement.split())[:300], "count": count, "ms": round(seconds * 1000, 2)}
+                    for statement, (count, seconds) in top
+                ],
+            })
+        return response
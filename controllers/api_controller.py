@@ -1,13 +1,15 @@
 # controllers/api_controller.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, g, request, jsonify
 from flask_cors import cross_origin
 from services.user_service import UserService
+from services.relationship_service import RelationshipService
 from models.errors.custom_exception_model import CustomException
 from models.errors.error_response_model import ErrorResponse
 from models.user_model import User
 from models.apikey_model import ApiKey
 from services.api_service import ApiService
 from services.transaction_service import TransactionService
+from configuration.idempotency import idempotent
 from models.enums import TransactionTypeEnum, RequestStatusEnum
 from models.transaction_model import Transaction
 import uuid
@@ -26,10 +28,10 @@ def request_key():
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user's email from the request
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
-        if len(ApiKey.query.filter_by(user_dni=current_user.dni).all()) >= 5:
+        if ApiService.user_api_keys_query(current_user.dni).count() >= 5:
             raise CustomException("You have reached the maximum number of API keys", 400)
         
         # Get the payment request data from the request body
@@ -40,13 +42,12 @@ def request_key():
         if not app_name:
             raise CustomException("Application name is required", 400)
         
-        key = str(uuid.uuid4())
         # Create a new API key for the user
         new_api_key = ApiKey(
             name=app_name,
-            api_key=key,
             user_dni=current_user.dni
         )
+        new_api_key.set_key(str(uuid.uuid4()))
         # Save the API key to the database
         ApiService.save_api_key(new_api_key)
         return jsonify(new_api_key.recently_created_to_json()), 200
@@ -66,12 +67,12 @@ def get_keys():
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user's email from the request
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
         # Get all API keys for the user
-        api_keys = ApiKey.query.filter_by(user_dni=current_user.dni).all()
+        api_keys = ApiService.user_api_keys_query(current_user.dni).all()
         return jsonify([key.to_json() for key in api_keys]), 200
     except CustomException as e:
         error_response = ErrorResponse.from_exception(e,e.status_code)
@@ -89,7 +90,7 @@ def update_key():
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user's email from the request
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
@@ -105,7 +106,7 @@ def update_key():
         if not api_key_data:
             raise CustomException("API key not found", 404)
         
-        api_key_data.api_key = str(uuid.uuid4())  # Generate a new API key
+        api_key_data.set_key(str(uuid.uuid4()))  # Generate a new API key
 
         ApiService.update_api_key(api_key_data)
         return jsonify(api_key_data.recently_created_to_json()), 200
@@ -125,7 +126,7 @@ def delete_key(api_key_id):
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user's email from the request
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
@@ -142,24 +143,36 @@ def delete_key(api_key_id):
         error_response = ErrorResponse.from_exception(e, 500)
         return jsonify(error_response.to_dict()), 500
     
+def api_key_owner():
+    """ Idempotency keys of API clients belong to the owner of the API key sent in the body. """
+    # A malformed key is left to the route, which answers it with a 400
+    data = request.get_json(silent=True)
+    api_key = data.get("api_key") if isinstance(data, dict) else None
+    if not isinstance(api_key, str) or not api_key:
+        return None
+    principal = ApiService.resolve_api_key(api_key)
+    return principal.user_dni if principal else None
+
 @api_controller.route('/payments/request', methods=['POST'])
+@idempotent(owner=api_key_owner)  # Retries with the same Idempotency-Key get the stored response
 def request_payment():
     """ Create a new transaction request from sender to api client. """
     try:
         # Get the data from the request
         data = request.get_json()
-        if not data:
+        if not data or not isinstance(data, dict):
             raise CustomException("Invalid request data", 400)
         
         request_api_key = data.get("api_key")
-        user_dni = ApiKey.query.filter_by(api_key=request_api_key).first()
-        if not user_dni:
+        if request_api_key is None:
+            raise CustomException("Invalid API key", 401)
+        if not isinstance(request_api_key, str) or not request_api_key:
+            raise CustomException("API key must be a non-empty string", 400)
+        principal = ApiService.resolve_api_key(request_api_key)
+        if not principal:
             raise CustomException("Invalid API key", 401)
-        current_user = UserService.get_user_by_dni(user_dni.user_dni)
-        if not current_user:
-            raise CustomException("User not found", 404)
         
-        receiver_dni = current_user.dni
+        receiver_dni = principal.user_dni
         sender_dni = data.get("sender_dni")
         if receiver_dni == sender_dni:
             raise CustomException("Cannot send money to yourself", 400)
@@ -171,10 +184,11 @@ def request_payment():
         if not sender:
             raise CustomException(f"Sender not found", 400)
         
-        if current_user in sender.blocked_users:
+        blocked_me, i_blocked = RelationshipService.block_status(sender.dni, receiver_dni)
+        if blocked_me:
             raise CustomException("Cannot request transaction. You have been blocked by the other user.", 403)
         
-        if sender in current_user.blocked_users:
+        if i_blocked:
             raise CustomException("Cannot request transaction. You have blocked the other user.", 403)
             
         # Create the transaction record
@@ -32,7 +32,7 @@ def authenticate():
         if not user.active:
             raise CustomException("Your account is disabled. To be able to operate, you must speak with the administrator.", 500)
         
-        return create_jwt_token(data =request.get_json())
+        return create_jwt_token(data={"dni": user.dni, "email": user.email})
         
     except CustomException as e:
         error_response = ErrorResponse.from_exception(e, e.status_code)
@@ -1,10 +1,11 @@
 # controllers/credit_card_controller.py
-from flask import Blueprint, request, jsonify
-from services.credit_card_service import CreditCardService
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
+from services.credit_card_service import CreditCardService, EXPORT_FORMATS
+from configuration.compression import accepts_gzip, gzip_stream
 from models.errors.error_response_model import ErrorResponse
 from models.errors.custom_exception_model import CustomException
 from services.user_service import UserService
-from services.paypal_service import PaypalService
+from services.job_service import JobService
 from flask_cors import cross_origin
 
 credit_card_controller = Blueprint('credit_card_controller', __name__)
@@ -18,7 +19,7 @@ def create_credit_card():
         if not hasattr(request, "user"):  # Ensure user is set
             return jsonify({"error": "Unauthorized"}), 401
 
-        user = UserService.get_user_by_email(request.user.get("email"))
+        user = g.get("current_user")
         if not user:
             raise CustomException("User not found", 404)
         
@@ -42,17 +43,12 @@ def create_credit_card():
         except ValueError:
             raise CustomException("Invalid expiration date format. Use 'DD/MM/YYYY'", 400)
 
-        card_data['user_dni'] = user.dni
         card_data['number'] = card_data['number'].replace(" ", "")
 
-        print(card_data)
-        result = PaypalService.validate_card(card_data)
-        card_data['paypal_token'] = result
-
-        # Call the CreditCardService to create the card
-        new_card = CreditCardService.create_credit_card(card_data)
+        # PayPal validation and card creation run in the background; poll /jobs/<id> for the result
+        job = JobService.submit(user.dni, "validate_card", card_data)
         
-        return jsonify(new_card.to_json()), 201
+        return jsonify(job.to_json()), 202, {"Location": f"/jobs/{job.id}"}
 
     except CustomException as e:
         # Handle custom exceptions with specific error response
@@ -85,7 +81,7 @@ def get_all_credit_cards():
         if not hasattr(request, "user"):  # Ensure user is set
             return jsonify({"error": "Unauthorized"}), 401
 
-        user = UserService.get_user_by_email(request.user.get("email"))
+        user = g.get("current_user")
         if not user:
             raise CustomException("User not found", 404)
         
@@ -103,6 +99,52 @@ def get_all_credit_cards():
         error_response = ErrorResponse.from_exception(e, 500)
         return jsonify(error_response.to_dict()), 500
 
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@credit_card_controller.route('/export', methods=['GET'])
+def export_credit_cards():
+    """ Stream every credit card to administrators, for reconciliation jobs.
+
+    - ``?format=ndjson`` (default) or ``?format=csv``.
+    - ``?updated_since=YYYY-MM-DD`` solo exporta las tarjetas creadas o modificadas desde ese día (incluido).
+    - Con ``Accept-Encoding: gzip`` la respuesta se comprime a medida que se genera.
+    """
+    try:
+        if not hasattr(request, "user"):  # Ensure user is set
+            return jsonify({"error": "Unauthorized"}), 401
+
+        user = g.get("current_user")
+        if not user:
+            raise CustomException("User not found", 404)
+
+        if not user.administrator:
+            raise CustomException("Unauthorized", 401)
+
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            raise CustomException(f"format must be one of: {', '.join(EXPORT_FORMATS)}", 400)
+        updated_since = CreditCardService.parse_updated_since(request.args.get("updated_since"))
+
+        # Las tarjetas se leen por lotes y cada lote se serializa (y comprime) antes de leer el siguiente
+        chunks = CreditCardService.export_chunks(export_format, updated_since)
+        headers = {
+            "Content-Disposition": f"attachment; filename=credit_cards.{export_format}",
+            "Vary": "Accept-Encoding"
+        }
+        if accepts_gzip():
+            chunks = gzip_stream(chunks)
+            headers["Content-Encoding"] = "gzip"
+
+        return Response(stream_with_context(chunks), mimetype=EXPORT_MIMETYPES[export_format], headers=headers)
+
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
+
 # Route to update a credit card
 @credit_card_controller.route('/card/<int:number>', methods=['PUT'])
 def update_credit_card(number):
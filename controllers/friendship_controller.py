@@ -1,10 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, g, request, jsonify
 from flask_cors import cross_origin
 from models.user_model import User
 from models.friendship_request_model import FriendshipRequest, RequestStatusEnum
 from models.errors.custom_exception_model import CustomException
 from models.errors.error_response_model import ErrorResponse
 from services.user_service import UserService
+from services.relationship_service import RelationshipService
+from services.friend_suggestion_service import FriendSuggestionService, SUGGESTIONS_DEFAULT_LIMIT, SUGGESTIONS_MAX_LIMIT
 
 friendship_controller = Blueprint('friendship_controller', __name__)
 
@@ -19,23 +21,23 @@ def get_pending_friendship_requests():
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
         # Get all the pending friendship requests where the current user is the receiver
-        pending_requests = FriendshipRequest.query.filter(
-            FriendshipRequest.receiver_dni == current_user.dni,
-            FriendshipRequest.status == RequestStatusEnum.PENDING
-        ).all()
+        pending_requests = UserService.pending_friendship_requests_query(current_user.dni).all()
         
         if not pending_requests:
             return jsonify([]), 200
         
-        # Fetch the sender and receiver for each request
+        # Fetch the senders and receivers of all requests in a single query
+        users = UserService.get_users_by_dnis(
+            [req.sender_dni for req in pending_requests] + [req.receiver_dni for req in pending_requests]
+        )
         for req in pending_requests:
-            req.sender = UserService.get_user_by_dni(req.sender_dni)
-            req.receiver = UserService.get_user_by_dni(req.receiver_dni)
+            req.sender = users.get(req.sender_dni)
+            req.receiver = users.get(req.receiver_dni)
         
         # Return the results as JSON
         return jsonify([req.to_json() for req in pending_requests]), 200
@@ -44,6 +46,36 @@ def get_pending_friendship_requests():
         # Handle any exceptions and return an error response
         return jsonify({"error": str(e)}), 500
 
+@friendship_controller.route('/suggestions', methods=['GET'])
+@cross_origin(origins='http://localhost:4200')
+def get_friend_suggestions():
+    """ People the current user may know: friends of their friends, ranked by friends in common.
+
+    ``?limit=<n>`` (20 by default, at most 100). Returns ``[{"dni", "name", "image", "mutual_friends"}]``.
+    """
+    try:
+        if not hasattr(request, "user"):  # Ensure user is set
+            return jsonify({"error": "Unauthorized"}), 401
+
+        current_user = g.get("current_user")
+        if not current_user:
+            raise CustomException("User not found", 404)
+
+        limit = request.args.get("limit", SUGGESTIONS_DEFAULT_LIMIT, type=int)
+        if limit < 1:
+            raise CustomException("limit must be a positive integer", 400)
+        limit = min(limit, SUGGESTIONS_MAX_LIMIT)
+
+        return jsonify(FriendSuggestionService.get_suggestions(current_user.dni, limit)), 200
+
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
+
 @friendship_controller.route('/favourite', methods=['POST'])
 @cross_origin(origins='http://localhost:4200')
 def add_user_favourite_request():
@@ -54,9 +86,11 @@ def add_user_favourite_request():
             return jsonify({"error": "Unauthorized"}), 401
         
         # Get the logged-in user and the friend to add
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
+
+        fields = UserService.requested_fields(request.args)
         
         data = request.get_json()
         favourite_dni = data.get('favourite_dni')
@@ -66,9 +100,9 @@ def add_user_favourite_request():
             raise CustomException("Friend not found", 404)
         
         UserService.add_user_favourite(current_user.dni, favourite_dni)
-    
-        current_user = UserService.get_user_by_email(request.user.get("email"))
-        return jsonify(current_user.to_json())
+
+        # The principal is the same session object, its relationships reflect the change
+        return jsonify(current_user.to_json(fields))
     
     except CustomException as e:
         error_response = ErrorResponse.from_exception(e, e.status_code)
@@ -88,9 +122,11 @@ def remove_user_favourite_request():
             return jsonify({"error": "Unauthorized"}), 401
         
         # Get the logged-in user and the friend to remove
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
+
+        fields = UserService.requested_fields(request.args)
         
         data = request.get_json()
         favourite_dni = data.get('favourite_dni')
@@ -100,9 +136,9 @@ def remove_user_favourite_request():
             raise CustomException("Favorite not found", 404)
         
         UserService.remove_user_favourite(current_user.dni, favourite_dni)
-        
-        current_user = UserService.get_user_by_email(request.user.get("email"))
-        return jsonify(current_user.to_json())
+
+        # The principal is the same session object, its relationships reflect the change
+        return jsonify(current_user.to_json(fields))
     
     except CustomException as e:
         error_response = ErrorResponse.from_exception(e, e.status_code)
@@ -123,7 +159,7 @@ def create_friendship_request():
             return jsonify({"error": "Unauthorized"}), 401
         
         # Get the logged-in user and the friend to add
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
@@ -138,13 +174,17 @@ def create_friendship_request():
         if not friend:
             raise CustomException("Friend not found", 404)
         
-        if current_user in friend.blocked_users:
+        i_blocked, blocked_me = RelationshipService.block_status(current_user.dni, friend.dni)
+        if blocked_me:
             raise CustomException("Cannot request transaction. You have been blocked by the other user.", 403)
         
-        if friend in current_user.blocked_users:
+        if i_blocked:
             raise CustomException("Cannot request transaction. You have blocked the other user.", 403)
         
         # Check if already friends or if there's already a pending request
+        if RelationshipService.are_friends(current_user.dni, friend.dni):
+            raise CustomException("You are already friends", 400)
+
         existing_request = FriendshipRequest.query.filter(
             (FriendshipRequest.sender_dni == current_user.dni) &
             (FriendshipRequest.receiver_dni == friend.dni) &
@@ -174,6 +214,45 @@ def create_friendship_request():
         return jsonify(error_response.to_dict()), 500
 
 
+def _respond_friendship_requests(accept):
+    """ Shared body of the bulk accept and reject routes: {"request_ids": [1, 2, ...]} """
+    try:
+        if not hasattr(request, "user"):  # Ensure user is set
+            return jsonify({"error": "Unauthorized"}), 401
+
+        current_user = g.get("current_user")
+        if not current_user:
+            raise CustomException("User not found", 404)
+
+        data = request.get_json(silent=True) or {}
+        request_ids = data.get("request_ids")
+        if not isinstance(request_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in request_ids):
+            raise CustomException("request_ids must be a list of friendship request ids", 400)
+
+        senders = UserService.respond_friendship_requests(current_user.dni, request_ids, accept)
+        message = "Friendship requests accepted, users are now friends." if accept else "Friendship requests rejected."
+        return jsonify({"message": message, "request_ids": sorted(set(request_ids)), "sender_dnis": senders}), 200
+
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
+
+@friendship_controller.route('/accept', methods=['POST'])
+@cross_origin(origins='http://localhost:4200')
+def accept_friendship_requests():
+    """ Accept several pending friendship requests at once, all or nothing """
+    return _respond_friendship_requests(accept=True)
+
+@friendship_controller.route('/reject', methods=['POST'])
+@cross_origin(origins='http://localhost:4200')
+def reject_friendship_requests():
+    """ Reject several pending friendship requests at once, all or nothing """
+    return _respond_friendship_requests(accept=False)
+
 @friendship_controller.route('/accept/<int:request_id>', methods=['POST'])
 @cross_origin(origins='http://localhost:4200')  # Adjust your CORS policy as needed
 def accept_friendship_request(request_id):
@@ -184,7 +263,7 @@ def accept_friendship_request(request_id):
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
@@ -210,7 +289,7 @@ def reject_friendship_request(request_id):
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
@@ -235,7 +314,7 @@ def delete_friend(friend_dni):
             return jsonify({"error": "Unauthorized"}), 401
 
         # Obtener el usuario actual
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
@@ -246,7 +325,6 @@ def delete_friend(friend_dni):
 
         # Eliminar la relación en ambas direcciones
         UserService.remove_friendship(current_user.dni, friend_dni)
-        UserService.remove_friendship(friend_dni, current_user.dni)
 
         return jsonify({"message": "Friendship deleted successfully"}), 200
 
@@ -267,10 +345,12 @@ def block_user_request():
         if not hasattr(request, "user"):
             return jsonify({"error": "Unauthorized"}), 401
 
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
+        fields = UserService.requested_fields(request.args)
+
         data = request.get_json()
         blocked_dni = data.get('blocked_dni')
 
@@ -281,8 +361,7 @@ def block_user_request():
         UserService.block_user(current_user.dni, blocked_dni)
 
         # Optional: Return updated user info
-        current_user = UserService.get_user_by_email(current_user.email)
-        return jsonify(current_user.to_json())
+        return jsonify(current_user.to_json(fields))
 
     except CustomException as e:
         return jsonify(ErrorResponse.from_exception(e, e.status_code).to_dict()), e.status_code
@@ -298,10 +377,12 @@ def unblock_user_request():
         if not hasattr(request, "user"):
             return jsonify({"error": "Unauthorized"}), 401
 
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
+        fields = UserService.requested_fields(request.args)
+
         data = request.get_json()
         blocked_dni = data.get('blocked_dni')
 
@@ -312,8 +393,7 @@ def unblock_user_request():
         UserService.unblock_user(current_user.dni, blocked_dni)
 
         # Optional: Return updated user info
-        current_user = UserService.get_user_by_email(current_user.email)
-        return jsonify(current_user.to_json())
+        return jsonify(current_user.to_json(fields))
 
     except CustomException as e:
         return jsonify(ErrorResponse.from_exception(e, e.status_code).to_dict()), e.status_code
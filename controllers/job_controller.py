@@ -0,0 +1,33 @@
+# controllers/job_controller.py
+from flask import Blueprint, g, request, jsonify
+from flask_cors import cross_origin
+from models.errors.custom_exception_model import CustomException
+from models.errors.error_response_model import ErrorResponse
+from services.job_service import JobService
+
+job_controller = Blueprint('job_controller', __name__)
+
+@job_controller.route('/<string:job_id>', methods=['GET'])
+@cross_origin(origins='http://localhost:4200')
+def get_job(job_id):
+    """ Status of a background job (card validation, funds charge) of the current user. """
+    try:
+        if not hasattr(request, "user"):  # Ensure user is set
+            return jsonify({"error": "Unauthorized"}), 401
+
+        current_user = g.get("current_user")
+        if not current_user:
+            raise CustomException("User not found", 404)
+
+        job = JobService.get_job(job_id, current_user.dni)
+        if not job:
+            raise CustomException("Job not found", 404)
+
+        return jsonify(job.to_json()), 200
+
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
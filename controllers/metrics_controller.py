@@ -0,0 +1,11 @@
+# controllers/metrics_controller.py
+from flask import Blueprint, Response, current_app
+from configuration.metrics import render_metrics
+
+metrics_controller = Blueprint('metrics_controller', __name__)
+
+
+@metrics_controller.route('/metrics', methods=['GET'])
+def get_metrics():
+    """ Request, SQL and PayPal metrics of this process in the Prometheus text format. """
+    return Response(render_metrics(current_app), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,56 @@
+# controllers/paypal_controller.py
+from flask import Blueprint, g, request, jsonify
+from models.errors.custom_exception_model import CustomException
+from models.errors.error_response_model import ErrorResponse
+from services.paypal_transport import PaypalTransport
+
+paypal_controller = Blueprint('paypal_controller', __name__)
+
+
+def _require_administrator():
+    if not hasattr(request, "user"):  # Ensure user is set
+        raise CustomException("Unauthorized", 401)
+
+    user = g.get("current_user")
+    if not user:
+        raise CustomException("User not found", 404)
+
+    if not user.administrator:
+        raise CustomException("Unauthorized", 401)
+
+
+@paypal_controller.route('/status', methods=['GET'])
+def get_status():
+    """ PayPal transport metrics: circuit breaker state and call latency per operation. Admins only. """
+    try:
+        _require_administrator()
+        return jsonify(PaypalTransport.stats()), 200
+
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
+
+
+@paypal_controller.route('/logging', methods=['PUT'])
+def update_logging():
+    """ Turn logging of PayPal request/response bodies on or off without a restart. Admins only. """
+    try:
+        _require_administrator()
+
+        data = request.get_json()
+        log_bodies = data.get('log_bodies')
+        if not isinstance(log_bodies, bool):
+            raise CustomException("log_bodies must be true or false", 400)
+
+        PaypalTransport.set_log_bodies(log_bodies)
+        return jsonify({"log_bodies": PaypalTransport.log_bodies}), 200
+
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
@@ -1,5 +1,7 @@
 from operator import or_, and_
-from flask import Blueprint, request, jsonify
+import json
+from datetime import datetime, timezone
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
 from flask_cors import cross_origin
 from models.user_model import User
 from models.credit_card_model import CreditCard
@@ -7,50 +9,80 @@ from models.transaction_model import Transaction
 from models.enums import RequestStatusEnum, TransactionTypeEnum
 from models.errors.custom_exception_model import CustomException
 from models.errors.error_response_model import ErrorResponse
-from services.transaction_service import TransactionService
+from services.transaction_service import TransactionService, HISTORY_DEFAULT_LIMIT, HISTORY_MAX_LIMIT
 from services.user_service import UserService
-from services.paypal_service import PaypalService
+from services.relationship_service import RelationshipService
+from services.job_service import JobService
+from services.transfer_service import TransferService
+from services.ledger_service import LedgerService
+from services.rollup_service import RollupService, TOP_COUNTERPARTIES_DEFAULT, TOP_COUNTERPARTIES_MAX
+from configuration.idempotency import idempotent
 
 transaction_controller = Blueprint('transaction_controller', __name__)
 
+def _transaction_with_names(transaction, users):
+    """ Serializar una transacción añadiendo los nombres del emisor y del receptor. """
+    # Los usuarios ya están en el identity map, así que sender/receiver no lanzan consultas
+    sender = users.get(transaction.sender_dni)
+    receiver = users.get(transaction.receiver_dni)
+    transaction_json = transaction.to_json()
+    transaction_json["sender_name"] = sender.name if sender else "Unknown"
+    transaction_json["receiver_name"] = receiver.name if receiver else "Unknown"
+    return transaction_json
+
+def _transactions_with_names(transactions):
+    """ Serializar varias transacciones cargando a todos los usuarios implicados en una sola consulta. """
+    users = UserService.get_users_by_dnis(
+        [t.sender_dni for t in transactions] + [t.receiver_dni for t in transactions]
+    )
+    return [_transaction_with_names(t, users) for t in transactions]
+
 @transaction_controller.route('/me', methods=['GET'])
 @cross_origin(origins='http://localhost:4200')  # Ajusta la política CORS según sea necesario
 def get_requests():
-    """ Obtener todas las transacciones donde el usuario actual es el receptor o el emisor. """
+    """ Obtener todas las transacciones donde el usuario actual es el receptor o el emisor.
+
+    - ``?limit=<n>&cursor=<next_cursor>`` devuelve una página ``{"items", "next_cursor"}`` (keyset sobre ``(date, id)``).
+    - ``?format=ndjson`` devuelve todo el historial en streaming, una transacción por línea.
+    - Sin parámetros devuelve la lista completa, como antes.
+    """
     try:
         if not hasattr(request, "user"):
             return jsonify({"error": "Unauthorized"}), 401
 
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
-        requests = Transaction.query.filter(
-            and_(
-                or_(
-                    Transaction.sender_dni == current_user.dni,
-                    Transaction.receiver_dni == current_user.dni
-                ),
-                Transaction.status == RequestStatusEnum.COMPLETED
-            )
-        ).all()
-
-        # Añadir el nombre del emisor y receptor a cada transacción
-        requests_json = []
-        for req in requests:
-            req_json = req.to_json()
-            sender = User.query.filter_by(dni=req.sender_dni).first()
-            receiver = User.query.filter_by(dni=req.receiver_dni).first()
-            
-            # Añadir los nombres de los usuarios
-            req_json["sender_name"] = sender.name if sender else "Unknown"
-            req_json["receiver_name"] = receiver.name if receiver else "Unknown"
-            
-            requests_json.append(req_json)
+        if request.args.get("format") == "ndjson":
+            batches = TransactionService.iter_history_batches(current_user.dni)
+
+            def generate():
+                for batch in batches:
+                    yield "".join(json.dumps(req_json) + "\n" for req_json in _transactions_with_names(batch))
+
+            return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+        if "limit" in request.args or "cursor" in request.args:
+            limit = request.args.get("limit", HISTORY_DEFAULT_LIMIT, type=int)
+            if limit < 1:
+                raise CustomException("limit must be a positive integer", 400)
+            limit = min(limit, HISTORY_MAX_LIMIT)
+
+            page, next_cursor = TransactionService.get_history_page(current_user.dni, request.args.get("cursor"), limit)
+            return jsonify({
+                "items": _transactions_with_names(page),
+                "next_cursor": next_cursor
+            }), 200
+
+        requests = TransactionService.history_query(current_user.dni).all()
 
         # Devolver los resultados como JSON
-        return jsonify(requests_json), 200
+        return jsonify(_transactions_with_names(requests)), 200
 
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
     except Exception as e:
         # Manejar cualquier excepción y devolver una respuesta de error
         return jsonify({"error": str(e)}), 500
@@ -63,7 +95,7 @@ def get_transaction_by_id(transaction_id):
         if not hasattr(request, "user"):
             return jsonify({"error": "Unauthorized"}), 401
 
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
@@ -77,15 +109,7 @@ def get_transaction_by_id(transaction_id):
         if not transaction:
             raise CustomException("Transaction not found or access denied", 403) 
         
-        transaction_json = transaction.to_json()
-        
-        sender = User.query.filter_by(dni=transaction.sender_dni).first()
-        receiver = User.query.filter_by(dni=transaction.receiver_dni).first()
-        
-        transaction_json["sender_name"] = sender.name if sender else "Unknown"
-        transaction_json["receiver_name"] = receiver.name if receiver else "Unknown"
-
-        return jsonify(transaction_json), 200
+        return jsonify(_transactions_with_names([transaction])[0]), 200
     except CustomException as e:
         error_response = ErrorResponse.from_exception(e,e.status_code)
         return jsonify(error_response.to_dict()), e.status_code
@@ -95,6 +119,7 @@ def get_transaction_by_id(transaction_id):
 
 @transaction_controller.route('/create', methods=['POST'])
 @cross_origin(origins='http://localhost:4200')  # Adjust your CORS policy as needed
+@idempotent()  # Retries with the same Idempotency-Key get the stored response
 def create_transaction():
     """ Create a new transaction from sender to receiver. """
     try:
@@ -103,7 +128,7 @@ def create_transaction():
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user (sender)
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
@@ -120,35 +145,13 @@ def create_transaction():
         if not receiver:
             raise CustomException("Receiver not found", 400) 
 
-        # Check if the sender has enough money
-        if current_user.amount < amount:
-            raise CustomException("Insufficient funds", 400) 
-
         # Check if the credit card exists and belongs to the sender
         credit_card = CreditCard.query.filter_by(number=credit_card_number, user_dni=sender_dni).first()
         if not credit_card:
             return jsonify({"error": "Invalid credit card"}), 400
     
-        # Create the transaction record
-        transaction = Transaction(
-            amount=amount,
-            transaction_type=TransactionTypeEnum.SENT,
-            message=message,
-            sender_dni=sender_dni,
-            receiver_dni=receiver_dni,
-            credit_card_number=credit_card_number,
-            status=RequestStatusEnum.COMPLETED
-        )
-        
-        # Add the transaction to the database
-        TransactionService.create_transaction(transaction)
-        
-        # Update the amounts for both sender and receiver
-        current_user.amount -= amount
-        receiver.amount += amount
-        
-        UserService.update_user(current_user.dni,None,None,None,None,None, current_user.amount)
-        UserService.update_user(receiver.dni,None,None,None,None,None, receiver.amount)
+        # Debit the sender (only if funds are enough), credit the receiver and record the transaction in one commit
+        transaction = TransferService.transfer(sender_dni, receiver_dni, amount, message, credit_card_number)
         
         # Return the transaction data as JSON
         
@@ -163,6 +166,48 @@ def create_transaction():
         error_response = ErrorResponse.from_exception(e, 500)
         return jsonify(error_response.to_dict()), 500
 
+@transaction_controller.route('/batch', methods=['POST'])
+@cross_origin(origins='http://localhost:4200')  # Adjust your CORS policy as needed
+def create_batch_transaction():
+    """ Send money from the current user to several receivers at once, e.g. payroll-style payouts.
+
+    Body: ``{"credit_card_number": ..., "transfers": [{"receiver_dni", "amount", "message"}, ...]}``
+    """
+    try:
+        # Ensure user is authenticated
+        if not hasattr(request, "user"):  # Check if the user is set in the request
+            return jsonify({"error": "Unauthorized"}), 401
+
+        # Get the logged-in user (sender)
+        current_user = g.get("current_user")
+        if not current_user:
+            raise CustomException("User not found", 404)
+
+        data = request.get_json()
+        credit_card_number = data.get("credit_card_number")
+        transfers = data.get("transfers")
+        if not isinstance(transfers, list):
+            raise CustomException("transfers must be a list", 400)
+
+        # Check if the credit card exists and belongs to the sender
+        credit_card = CreditCard.query.filter_by(number=credit_card_number, user_dni=current_user.dni).first()
+        if not credit_card:
+            return jsonify({"error": "Invalid credit card"}), 400
+
+        results = TransferService.batch_transfer(current_user.dni, credit_card_number, transfers)
+        completed = sum(1 for result in results if result["status"] == "COMPLETED")
+        return jsonify({
+            "completed": completed,
+            "failed": len(results) - completed,
+            "results": results
+        }), 201 if completed else 400
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e,e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
+
 @transaction_controller.route('/createrequest', methods=['POST'])
 @cross_origin(origins='http://localhost:4200')  # Adjust your CORS policy as needed
 def request_transaction():
@@ -173,7 +218,7 @@ def request_transaction():
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user (sender)
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
@@ -189,10 +234,11 @@ def request_transaction():
         if not sender:
             raise CustomException("Sender not found", 400)
         
-        if current_user in sender.blocked_users:
+        i_blocked, blocked_me = RelationshipService.block_status(current_user.dni, sender.dni)
+        if blocked_me:
             raise CustomException("Cannot request transaction. You have been blocked by the other user.", 403)
         
-        if sender in current_user.blocked_users:
+        if i_blocked:
             raise CustomException("Cannot request transaction. You have blocked the other user.", 403)
             
         
@@ -217,6 +263,7 @@ def request_transaction():
     
 @transaction_controller.route('/acceptrequest/<int:request_id>', methods=['POST'])
 @cross_origin(origins='http://localhost:4200')  # Adjust your CORS policy as needed
+@idempotent()  # Retries with the same Idempotency-Key get the stored response
 def accept_transaction_request(request_id):
     """ Accept a pending transaction request. """
     try:
@@ -225,7 +272,7 @@ def accept_transaction_request(request_id):
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
@@ -248,27 +295,14 @@ def accept_transaction_request(request_id):
         if current_request.sender_dni != current_user.dni:
             raise CustomException("You are not authorized to accept this request", 403)
         
-        receiver_user = UserService.get_user_by_dni(current_request.receiver_dni)
-        if not receiver_user:
-            raise CustomException("Receiver user not found", 404)
-
-        if current_user.amount < current_request.amount:
-            raise CustomException("Insufficient funds", 400) 
-        
-        current_user.amount -= current_request.amount
-        receiver_user.amount += current_request.amount
-        
-        UserService.update_user(current_user.dni,None,None,None,None,None, current_user.amount)
-        UserService.update_user(receiver_user.dni,None,None,None,None,None, receiver_user.amount)
-        
-        current_request.credit_card_number = card_number
-        
-        TransactionService.accept_transaction_request(current_request)
-        
-        transaction = Transaction.query.get(request_id)
+        # Mark the request as paid and move the money in one commit
+        transaction = TransferService.complete_request(current_request, card_number)
         
         return jsonify(transaction.to_json()), 200
 
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
     except Exception as e:
         error_response = ErrorResponse.from_exception(e, 500)
         return jsonify(error_response.to_dict()), 500
@@ -283,7 +317,7 @@ def reject_transaction_request(request_id):
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
@@ -310,28 +344,14 @@ def get_pending_transaction_requests():
         if not hasattr(request, "user"):
             return jsonify({"error": "Unauthorized"}), 401
 
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
         
-        requests = Transaction.query.filter(
-            Transaction.sender_dni == current_user.dni,
-            Transaction.status == RequestStatusEnum.PENDING
-        ).all()
+        requests = TransactionService.pending_requests_query(current_user.dni).all()
 
         # Añadir el nombre del emisor y receptor a cada solicitud
-        requests_json = []
-        for req in requests:
-            req_json = req.to_json()
-            sender = User.query.filter_by(dni=req.sender_dni).first()
-            
-            # Añadir los nombres de los usuarios
-            req_json["sender_name"] = sender.name if sender else "Unknown"
-            
-            requests_json.append(req_json)
-
-        # Devolver los resultados como JSON
-        return jsonify(requests_json), 200
+        return jsonify(_transactions_with_names(requests)), 200
 
     except Exception as e:
         # Manejar cualquier excepción y devolver una respuesta de error
@@ -339,6 +359,7 @@ def get_pending_transaction_requests():
     
 @transaction_controller.route('/chargefunds', methods=['POST'])
 @cross_origin(origins='http://localhost:4200')  # Adjust your CORS policy as needed
+@idempotent()  # Retries with the same Idempotency-Key get the stored response
 def charge_funds():
     try:
         # Ensure user is authenticated
@@ -346,7 +367,7 @@ def charge_funds():
             return jsonify({"error": "Unauthorized"}), 401
 
         # Get the logged-in user (sender)
-        current_user = UserService.get_user_by_email(request.user.get("email"))
+        current_user = g.get("current_user")
         if not current_user:
             raise CustomException("User not found", 404)
 
@@ -361,15 +382,94 @@ def charge_funds():
         if not credit_card:
             return jsonify({"error": "Invalid credit card"}), 400
         
-        PaypalService.authorize_charge(credit_card.paypal_token, amount)
-
-        current_user.amount += amount
-        # Update the user's amount in the database
-        UserService.update_user(dni=current_user.dni, amount=current_user.amount)
-        return jsonify({"message": "Funds charged successfully"}), 200
+        if amount <= 0:
+            raise CustomException("Amount must be greater than zero", 400)
+
+        # The PayPal charge and the balance update run in the background; poll /jobs/<id> for the result
+        job = JobService.submit(current_user.dni, "charge_funds", {
+            "paypal_token": credit_card.paypal_token,
+            "amount": amount,
+            "paypal_request_id": g.get("paypal_request_id")  # Set when the client sent an Idempotency-Key
+        })
+        return jsonify(job.to_json()), 202, {"Location": f"/jobs/{job.id}"}
     except CustomException as e:
         error_response = ErrorResponse.from_exception(e,e.status_code)
         return jsonify(error_response.to_dict()), e.status_code
     except Exception as e:
         error_response = ErrorResponse.from_exception(e, 500)
-        return jsonify(error_response.to_dict()), 500
\ No newline at end of file
+        return jsonify(error_response.to_dict()), 500
+@transaction_controller.route('/balance', methods=['GET'])
+@cross_origin(origins='http://localhost:4200')
+def get_balance():
+    """ Saldo del usuario actual según el libro mayor, ahora o en ``?at=<fecha ISO 8601, UTC>``. """
+    try:
+        if not hasattr(request, "user"):
+            return jsonify({"error": "Unauthorized"}), 401
+
+        current_user = g.get("current_user")
+        if not current_user:
+            raise CustomException("User not found", 404)
+
+        at = request.args.get("at")
+        if at:
+            try:
+                at = datetime.fromisoformat(at)
+            except ValueError:
+                raise CustomException("at must be an ISO 8601 date", 400)
+            if at.tzinfo:
+                at = at.astimezone(timezone.utc).replace(tzinfo=None)  # Las fechas se guardan en UTC sin zona
+        else:
+            at = datetime.utcnow()
+
+        balance = LedgerService.balance(current_user.dni, at)
+        return jsonify({"dni": current_user.dni, "balance": float(balance), "at": at.isoformat()}), 200
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
+
+@transaction_controller.route('/stats', methods=['GET'])
+@cross_origin(origins='http://localhost:4200')
+def get_stats():
+    """ Totales mensuales del usuario actual (enviado, recibido, número de transacciones y principales contactos).
+
+    ``?from=YYYY-MM&to=YYYY-MM`` (por defecto los últimos 12 meses) y ``?top=<n>`` contactos por mes.
+    """
+    try:
+        if not hasattr(request, "user"):
+            return jsonify({"error": "Unauthorized"}), 401
+
+        current_user = g.get("current_user")
+        if not current_user:
+            raise CustomException("User not found", 404)
+
+        first_month = request.args.get("from")
+        last_month = request.args.get("to")
+        if first_month is not None:
+            RollupService.parse_month(first_month, "from")
+        if last_month is not None:
+            RollupService.parse_month(last_month, "to")
+        top = request.args.get("top", TOP_COUNTERPARTIES_DEFAULT, type=int)
+        if top < 0:
+            raise CustomException("top must not be negative", 400)
+        top = min(top, TOP_COUNTERPARTIES_MAX)
+
+        months = RollupService.get_stats(current_user.dni, first_month, last_month, top)
+
+        # Nombres de todos los contactos en una sola consulta
+        users = UserService.get_users_by_dnis(
+            counterparty["dni"] for month in months for counterparty in month["top_counterparties"]
+        )
+        for month in months:
+            for counterparty in month["top_counterparties"]:
+                user = users.get(counterparty["dni"])
+                counterparty["name"] = user.name if user else "Unknown"
+        return jsonify({"months": months}), 200
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
@@ -1,6 +1,7 @@
 # user_controller.py
-from flask import Blueprint, request, jsonify
-from services.user_service import UserService
+import json
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
+from services.user_service import UserService, LIST_DEFAULT_LIMIT, LIST_MAX_LIMIT, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
 from models.user_model import User
 from datetime import datetime
 from models.errors.error_response_model import ErrorResponse
@@ -33,6 +34,8 @@ def create_user():
     address = data.get('address')
     
     try:
+        fields = UserService.requested_fields(request.args)
+
         # Check if the user already exists
         existing_user = UserService.get_user_by_dni(dni)
         if existing_user:
@@ -49,7 +52,7 @@ def create_user():
         new_user = UserService.create_user(dni, name, email, pwd, birth_date, image, phone, address, amount, administrator)
         
         # Prepare response
-        response = new_user.to_json() 
+        response = new_user.to_json(fields)
         return jsonify(response), 201
 
     except CustomException as e:
@@ -63,9 +66,10 @@ def create_user():
 @user_controller.route('/<dni>', methods=['GET'])
 def get_user(dni):
     try:
+        fields = UserService.requested_fields(request.args)
         user = UserService.get_user_by_dni(dni)
         if user:
-            return jsonify(user.to_json()), 200
+            return jsonify(user.to_json(fields)), 200
         
         raise CustomException(f"User not found", 404) 
     except CustomException as e:
@@ -80,6 +84,7 @@ def get_user(dni):
 @user_controller.route('/<dni>/update', methods=['PUT'])
 def update_user(dni):
     try:
+        fields = UserService.requested_fields(request.args)
         data = request.get_json()
         name = data.get('name')
         birth_date = data.get('birth_date')
@@ -87,9 +92,9 @@ def update_user(dni):
         phone = data.get('phone')
         address = data.get('address')
         
-        user = UserService.update_user(dni,name, phone, address, birth_date, image, None)
+        user = UserService.update_user(dni,name, phone, address, birth_date, image)
         if user:
-            response = user.to_json()
+            response = user.to_json(fields)
             return jsonify(response), 200
         else:
             raise CustomException(f"An error occurred while trying to update the client", 500) 
@@ -170,9 +175,91 @@ def check_password(dni):
 
 @user_controller.route('/all', methods=['GET'])
 def list_users():
-    """ List all users in the database. """
-    users = User.query.all()  # Fetch all users
-    return jsonify([user.to_json() for user in users]), 200
+    """ List users in DNI order. Supports ?fields= / ?include= like the other user endpoints.
+
+    - ``?limit=<n>&cursor=<next_cursor>`` devuelve una página ``{"items", "next_cursor"}`` (keyset sobre el DNI).
+    - ``?format=ndjson`` devuelve todos los usuarios en streaming, uno por línea.
+    - Sin parámetros devuelve la lista completa como un array JSON, también en streaming.
+    """
+    try:
+        fields = UserService.requested_fields(request.args)
+
+        if "limit" in request.args or "cursor" in request.args:
+            limit = request.args.get("limit", LIST_DEFAULT_LIMIT, type=int)
+            if limit < 1:
+                raise CustomException("limit must be a positive integer", 400)
+            limit = min(limit, LIST_MAX_LIMIT)
+
+            users, next_cursor = UserService.get_users_page(fields, request.args.get("cursor"), limit)
+            return jsonify({
+                "items": [user.to_json(fields) for user in users],
+                "next_cursor": next_cursor
+            }), 200
+
+        # Los usuarios se leen por lotes recorriendo el índice de DNI (dni > último DNI del lote anterior, relaciones
+        # cargadas por lote, sesión vaciada entre lotes) y el JSON se escribe a medida. No usar yield_per: con
+        # el resultado abierto no se puede vaciar la sesión y el identity map crece sin límite
+        batches = UserService.iter_user_batches(fields)
+        if request.args.get("format") == "ndjson":
+            def generate():
+                for batch in batches:
+                    yield "".join(json.dumps(user.to_json(fields)) + "\n" for user in batch)
+
+            return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+        def generate():
+            opened = False
+            for batch in batches:
+                yield ("," if opened else "[") + ",".join(json.dumps(user.to_json(fields)) for user in batch)
+                opened = True
+            yield "]" if opened else "[]"
+
+        return Response(stream_with_context(generate()), mimetype="application/json")
+    
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+    
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
+
+
+@user_controller.route('/search', methods=['GET'])
+@cross_origin(origins='http://localhost:4200')
+def search_users():
+    """ Search active users to pay or befriend by part of their name, email or phone.
+
+    ``?q=<at least 3 characters>&limit=<n>&offset=<next_offset>`` returns ``{"items", "next_offset"}``.
+    Users blocked by the current user, or who blocked them, are never returned.
+    """
+    try:
+        if not hasattr(request, "user"):
+            return jsonify({"error": "Unauthorized"}), 401
+
+        current_user = g.get("current_user")
+        if not current_user:
+            raise CustomException("User not found", 404)
+
+        limit = request.args.get("limit", SEARCH_DEFAULT_LIMIT, type=int)
+        offset = request.args.get("offset", 0, type=int)
+        if limit < 1 or offset < 0:
+            raise CustomException("limit must be positive and offset not negative", 400)
+        limit = min(limit, SEARCH_MAX_LIMIT)
+
+        users, next_offset = UserService.search_users(current_user.dni, request.args.get("q"), limit, offset)
+        return jsonify({
+            "items": [user.to_summary_json() for user in users],
+            "next_offset": next_offset
+        }), 200
+
+    except CustomException as e:
+        error_response = ErrorResponse.from_exception(e, e.status_code)
+        return jsonify(error_response.to_dict()), e.status_code
+
+    except Exception as e:
+        error_response = ErrorResponse.from_exception(e, 500)
+        return jsonify(error_response.to_dict()), 500
 
 
 @user_controller.route('/me', methods=['GET'])
@@ -183,11 +270,11 @@ def get_logged_user():
         if not hasattr(request, "user"):  # Ensure user is set
             return jsonify({"error": "Unauthorized"}), 401
 
-        user = UserService.get_user_by_email(request.user.get("email"))
+        user = g.get("current_user")
         if not user:
             raise CustomException("User not found", 404)
 
-        return jsonify(user.to_json()), 200
+        return jsonify(user.to_json(UserService.requested_fields(request.args))), 200
     
     except CustomException as e:
         error_response = ErrorResponse.from_exception(e, e.status_code)
@@ -205,10 +292,11 @@ def upload_image():
         if not hasattr(request, "user"):  # Ensure user is set
             return jsonify({"error": "Unauthorized"}), 401
 
-        user = UserService.get_user_by_email(request.user.get("email"))
+        user = g.get("current_user")
         if not user:
             raise CustomException("User not found", 404)
         
+        fields = UserService.requested_fields(request.args)
         data = request.get_json()
         image = data.get('image')
         
@@ -217,7 +305,7 @@ def upload_image():
 
         user = UserService.update_image_user(user.dni, image)
         if user:
-            response = user.to_json()
+            response = user.to_json(fields)
             return jsonify(response), 200
         else:
             raise CustomException(f"An error occurred while trying to update picture of the client", 500) 
@@ -0,0 +1,62 @@
+"""hash api keys
+
+API keys are stored as their SHA-256 digest instead of in plain text. Existing keys are
+hashed in place, so clients keep working with the keys they already have.
+
+Revision ID: 0003_hash_api_keys
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-18 14:06:31.707773
+
+"""
+import hashlib
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_hash_api_keys'
+down_revision = '0002_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('apikeys', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('key_hash', sa.String(length=64), nullable=True))
+
+    apikeys = sa.table('apikeys', sa.column('id', sa.String), sa.column('api_key', sa.String), sa.column('key_hash', sa.String))
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(apikeys.c.id, apikeys.c.api_key)).all()
+    if rows:
+        connection.execute(
+            apikeys.update().where(apikeys.c.id == sa.bindparam('key_id')).values(key_hash=sa.bindparam('digest')),
+            [{'key_id': key_id, 'digest': hashlib.sha256(api_key.encode('utf-8')).hexdigest()} for key_id, api_key in rows]
+        )
+
+    with op.batch_alter_table('apikeys', schema=None) as batch_op:
+        batch_op.alter_column('key_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.drop_index('ix_apikeys_api_key')
+        batch_op.create_index(batch_op.f('ix_apikeys_key_hash'), ['key_hash'], unique=True)
+        batch_op.drop_column('api_key')
+
+
+def downgrade():
+    # The plain keys cannot be recovered from their digest: every key is replaced by a new random one
+    with op.batch_alter_table('apikeys', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('api_key', sa.String(length=36), nullable=True))
+
+    apikeys = sa.table('apikeys', sa.column('id', sa.String), sa.column('api_key', sa.String))
+    connection = op.get_bind()
+    key_ids = connection.execute(sa.select(apikeys.c.id)).scalars().all()
+    if key_ids:
+        connection.execute(
+            apikeys.update().where(apikeys.c.id == sa.bindparam('key_id')).values(api_key=sa.bindparam('new_key')),
+            [{'key_id': key_id, 'new_key': str(uuid.uuid4())} for key_id in key_ids]
+        )
+
+    with op.batch_alter_table('apikeys', schema=None) as batch_op:
+        batch_op.alter_column('api_key', existing_type=sa.String(length=36), nullable=False)
+        batch_op.drop_index(batch_op.f('ix_apikeys_key_hash'))
+        batch_op.create_index('ix_apikeys_api_key', ['api_key'], unique=True)
+        batch_op.drop_column('key_hash')
@@ -0,0 +1,45 @@
+"""user search
+
+SQLite FTS5 index (trigram tokenizer) over the name, email and phone of every user, used by
+/users/search, and the triggers that keep it in sync with the user table. Other databases
+search with LIKE and get nothing here. Batch migrations of the user table drop its triggers:
+run `flask rebuild-user-search` after them.
+
+Revision ID: 0008_user_search
+Revises: 0007_monthly_rollups
+Create Date: 2026-10-18 14:33:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_user_search'
+down_revision = '0007_monthly_rollups'
+branch_labels = None
+depends_on = None
+
+DELETE_OLD = (
+    "DELETE FROM users_fts WHERE users_fts MATCH 'dni : \"' || replace(old.dni, '\"', '\"\"') || '\"' AND dni = old.dni;"
+)
+INSERT_NEW = "INSERT INTO users_fts (dni, name, email, phone) VALUES (new.dni, new.name, new.email, new.phone);"
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("CREATE VIRTUAL TABLE users_fts USING fts5(dni, name, email, phone, tokenize = 'trigram')")
+    op.execute(f"CREATE TRIGGER users_fts_after_insert AFTER INSERT ON user BEGIN {INSERT_NEW} END")
+    op.execute(f"CREATE TRIGGER users_fts_after_delete AFTER DELETE ON user BEGIN {DELETE_OLD} END")
+    op.execute(f"CREATE TRIGGER users_fts_after_update AFTER UPDATE OF dni, name, email, phone ON user BEGIN {DELETE_OLD} {INSERT_NEW} END")
+    op.execute("INSERT INTO users_fts (dni, name, email, phone) SELECT dni, name, email, phone FROM user")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER users_fts_after_update")
+    op.execute("DROP TRIGGER users_fts_after_delete")
+    op.execute("DROP TRIGGER users_fts_after_insert")
+    op.execute("DROP TABLE users_fts")
@@ -11,3 +11,10 @@ def init_models():
     from .transaction_model import Transaction
     from .credit_card_model import CreditCard
     from .friendship_request_model import FriendshipRequest
+    from .apikey_model import ApiKey
+    from .job_model import Job
+    from .idempotency_key_model import IdempotencyKey
+    from .ledger_model import LedgerEntry, BalanceSnapshot
+    from .rollup_model import MonthlyRollup, MonthlyCounterparty
+    from .user_search_model import users_fts
+    from .friend_suggestion_model import FriendSuggestion
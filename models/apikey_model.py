@@ -1,21 +1,32 @@
-from sqlalchemy import Column, String, ForeignKey, Text
+from sqlalchemy import Column, String, ForeignKey
 from sqlalchemy.orm import relationship
 from models import db
 from datetime import datetime
+import hashlib
 import uuid
 
 class ApiKey(db.Model):
     __tablename__ = 'apikeys'
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))  # ID único para la API key
-    user_dni = Column(String(36), ForeignKey('user.dni'), nullable=False)  # Relación con el usuario
-    api_key = Column(Text, nullable=False, default=lambda: str(uuid.uuid4()))  # API key única
+    user_dni = Column(String(36), ForeignKey('user.dni'), nullable=False, index=True)  # Relación con el usuario
+    key_hash = Column(String(64), nullable=False, unique=True, index=True)  # SHA-256 de la API key (la clave en claro no se guarda)
     name = Column(String(255), nullable=False)  # Nombre de la aplicación
     created_at = Column(db.DateTime, default=datetime.utcnow)  # Fecha de creación
 
     # Relación inversa con el modelo User
     user = relationship('User', back_populates='api_keys')
 
+    @staticmethod
+    def hash_key(api_key):
+        """Digest de longitud fija con el que se guarda y se busca una API key"""
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def set_key(self, api_key):
+        """Asignar una nueva clave: se guarda su hash y la clave en claro solo se devuelve en esta petición"""
+        self.key_hash = ApiKey.hash_key(api_key)
+        self.plain_key = api_key
+
     def to_json(self):
         return {
             "id": self.id,
@@ -28,7 +39,7 @@ class ApiKey(db.Model):
         return {
             "id": self.id,
             "user_dni": self.user_dni,
-            "api_key": self.api_key,
+            "api_key": getattr(self, "plain_key", None),
             "name": self.name,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
\ No newline at end of file
@@ -14,11 +14,12 @@ class CreditCard(db.Model):
     active = Column(Boolean, nullable=False, default=True)
     card_holder_name = Column(String(255), nullable=False)
     paypal_token = Column(String(32), nullable=False, unique=True)
-    created_at = Column(Date, nullable=False, default=datetime.utcnow)
-    updated_at = Column(Date, onupdate=datetime.utcnow)
+    # Indexed for the incremental export (?updated_since=)
+    created_at = Column(Date, nullable=False, default=datetime.utcnow, index=True)
+    updated_at = Column(Date, onupdate=datetime.utcnow, index=True)
     
     # Add foreign key to user
-    user_dni = Column(String(36), ForeignKey('user.dni'), nullable=False)
+    user_dni = Column(String(36), ForeignKey('user.dni'), nullable=False, index=True)
     # Relationship to User
     user = relationship('User', back_populates='credit_cards')
 
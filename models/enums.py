@@ -14,4 +14,22 @@ class RequestStatusEnum(str, Enum):
     REVOKED = "REVOKED"      # Cuando el remitente cancela la solicitud
 
     def __str__(self):
-        return self.value
\ No newline at end of file
+        return self.value
+
+class JobStatusEnum(str, Enum):
+    PENDING = "PENDING"      # Guardado, esperando a un worker
+    RUNNING = "RUNNING"      # Un worker lo ha reclamado y está llamando a PayPal
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CHARGED_NOT_CREDITED = "CHARGED_NOT_CREDITED"  # PayPal cobró pero el saldo no se actualizó: reintentar el abono o reembolsar
+
+    def __str__(self):
+        return self.value
+
+class LedgerEntryKindEnum(str, Enum):
+    TRANSFER = "TRANSFER"    # Envío entre usuarios o solicitud pagada
+    CHARGE = "CHARGE"        # Fondos cargados desde una tarjeta
+    OPENING = "OPENING"      # Saldo con el que se creó el usuario
+
+    def __str__(self):
+        return self.value
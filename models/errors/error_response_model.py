@@ -1,5 +1,8 @@
 from datetime import datetime
 from flask import request, jsonify
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ErrorResponse:
     def __init__(self, status_code: int, message: str, path: str):
@@ -20,7 +23,10 @@ class ErrorResponse:
 
     @staticmethod
     def from_exception(exception: Exception, code: int = 500):
-        print(f"❌ An error occurred: {str(exception)}")
+        if code >= 500:
+            logger.error("Request failed: %s", exception, exc_info=exception, extra={"status": code})
+        else:
+            logger.info("Request rejected: %s", exception, extra={"status": code})
         path = request.path
         return ErrorResponse(
             status_code=code,
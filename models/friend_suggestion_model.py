@@ -0,0 +1,21 @@
+# models/friend_suggestion_model.py
+from sqlalchemy import Column, String, Integer, Index
+from models import db
+
+
+class FriendSuggestion(db.Model):
+    """Amigos en común entre un usuario y alguien que todavía no es su amigo (solo pares con al menos uno).
+
+    Precalculado para /friendship/suggestions: FriendSuggestionService lo rehace para los usuarios cuya lista
+    de amigos cambia, en el mismo commit, y `flask refresh-friend-suggestions` lo recalcula entero.
+    """
+    __tablename__ = 'friend_suggestions'
+    __table_args__ = (
+        # Ranking de un usuario, y los pares de un candidato cuando hay que rehacerlos
+        Index('ix_friend_suggestions_user_mutual', 'user_dni', 'mutual_count', 'candidate_dni'),
+        Index('ix_friend_suggestions_candidate', 'candidate_dni'),
+    )
+
+    user_dni = Column(String(36), primary_key=True)
+    candidate_dni = Column(String(36), primary_key=True)
+    mutual_count = Column(Integer, nullable=False)
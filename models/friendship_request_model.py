@@ -2,7 +2,7 @@
 
 import enum
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Index
 from models import db
 
 class RequestStatusEnum(enum.Enum):
@@ -12,6 +12,9 @@ class RequestStatusEnum(enum.Enum):
 
 class FriendshipRequest(db.Model):
     __tablename__ = 'friendship_request'
+    __table_args__ = (
+        Index('ix_friendship_request_receiver_status', 'receiver_dni', 'status'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     sender_dni = Column(String(36), ForeignKey('user.dni'), nullable=False)
@@ -24,8 +27,8 @@ class FriendshipRequest(db.Model):
     receiver = None  # Placeholder for the receiver user object
 
     def to_json(self):
-        sender_json = self.sender.to_json() if self.sender else None
-        receiver_json = self.receiver.to_json() if self.receiver else None
+        sender_json = self.sender.to_summary_json() if self.sender else None
+        receiver_json = self.receiver.to_summary_json() if self.receiver else None
 
         return {
             "id": self.id,
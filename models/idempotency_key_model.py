@@ -0,0 +1,25 @@
+# models/idempotency_key_model.py
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from models import db
+
+class IdempotencyKey(db.Model):
+    """Respuesta guardada de una petición con cabecera Idempotency-Key, para devolverla en los reintentos"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        UniqueConstraint('owner', 'key', name='uq_idempotency_keys_owner_key'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    owner = Column(String(36), nullable=False)  # DNI del usuario (o del dueño de la API key) que envía la petición
+    key = Column(String(255), nullable=False)  # Valor de la cabecera Idempotency-Key
+    request_hash = Column(String(64), nullable=False)  # SHA-256 de método, ruta y cuerpo: la clave no se puede reutilizar para otra petición
+    response_status = Column(Integer, nullable=True)  # Nulo mientras la petición original se está procesando
+    response_body = Column(Text, nullable=True)
+    response_headers = Column(Text, nullable=True)  # JSON con las cabeceras que se repiten en los reintentos (Location)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    @property
+    def completed(self):
+        return self.response_status is not None
@@ -0,0 +1,32 @@
+# models/job_model.py
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, ForeignKey, Text, DateTime
+from models import db
+from models.enums import JobStatusEnum
+
+class Job(db.Model):
+    """Operación en segundo plano (llamadas a PayPal) cuyo estado consulta el cliente en /jobs/<id>"""
+    __tablename__ = 'jobs'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_dni = Column(String(36), ForeignKey('user.dni'), nullable=False, index=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default=JobStatusEnum.PENDING)
+    payload = Column(Text, nullable=False)  # JSON de entrada, se vacía al terminar (puede contener datos de la tarjeta)
+    result = Column(Text, nullable=True)  # JSON de salida cuando termina bien
+    error = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=True, onupdate=datetime.utcnow)
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": str(self.status),
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "created_at": self.created_at.strftime('%d/%m/%Y %H:%M:%S') if self.created_at else None,
+            "updated_at": self.updated_at.strftime('%d/%m/%Y %H:%M:%S') if self.updated_at else None
+        }
@@ -0,0 +1,49 @@
+# models/ledger_model.py
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, ForeignKey, Index, UniqueConstraint
+from models import db
+
+# Cuentas del sistema: la contrapartida del dinero que entra desde fuera (tarjetas) o sin movimiento previo (saldos iniciales)
+CARD_ACCOUNT = "system:card"
+OPENING_ACCOUNT = "system:opening"
+
+
+class LedgerEntry(db.Model):
+    """Apunte contable de solo inserción: cada movimiento de dinero escribe dos (débito y crédito) que suman cero"""
+    __tablename__ = 'ledger_entries'
+    __table_args__ = (
+        # Saldo de una cuenta en un momento dado: rango por fecha a partir de la última foto de saldo
+        Index('ix_ledger_entries_account_created_at', 'account', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    posting_id = Column(String(64), nullable=False, index=True)  # Agrupa los apuntes de un mismo movimiento
+    account = Column(String(36), nullable=False)  # DNI del usuario o una cuenta del sistema (system:...)
+    amount = Column(DECIMAL(12, 2), nullable=False)  # Positivo = entra en la cuenta, negativo = sale
+    kind = Column(String(20), nullable=False)
+    transaction_id = Column(Integer, ForeignKey('transactions.id'), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)  # Rango de apuntes de cada foto de saldos
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "posting_id": self.posting_id,
+            "account": self.account,
+            "amount": float(self.amount),
+            "kind": self.kind,
+            "transaction_id": self.transaction_id,
+            "created_at": self.created_at.isoformat()
+        }
+
+
+class BalanceSnapshot(db.Model):
+    """Saldo de una cuenta con todos los apuntes hasta taken_at incluidos"""
+    __tablename__ = 'balance_snapshots'
+    __table_args__ = (
+        UniqueConstraint('account', 'taken_at', name='uq_balance_snapshots_account_taken_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    account = Column(String(36), nullable=False)
+    taken_at = Column(DateTime, nullable=False)
+    balance = Column(DECIMAL(12, 2), nullable=False)
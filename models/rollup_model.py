@@ -0,0 +1,37 @@
+# models/rollup_model.py
+from sqlalchemy import Column, String, Integer, DECIMAL
+from models import db
+
+
+class MonthlyRollup(db.Model):
+    """Totales de un usuario en un mes (YYYY-MM), actualizados en el mismo commit que cada transacción COMPLETED"""
+    __tablename__ = 'monthly_rollups'
+
+    user_dni = Column(String(36), primary_key=True)
+    month = Column(String(7), primary_key=True)
+    sent_amount = Column(DECIMAL(14, 2), nullable=False, default=0)
+    sent_count = Column(Integer, nullable=False, default=0)
+    received_amount = Column(DECIMAL(14, 2), nullable=False, default=0)
+    received_count = Column(Integer, nullable=False, default=0)
+
+    def to_json(self):
+        return {
+            "month": self.month,
+            "sent": float(self.sent_amount),
+            "sent_count": self.sent_count,
+            "received": float(self.received_amount),
+            "received_count": self.received_count
+        }
+
+
+class MonthlyCounterparty(db.Model):
+    """Totales de un usuario con otro usuario en un mes, para los principales contactos de /transactions/stats"""
+    __tablename__ = 'monthly_counterparties'
+
+    user_dni = Column(String(36), primary_key=True)
+    month = Column(String(7), primary_key=True)
+    counterparty_dni = Column(String(36), primary_key=True)
+    sent_amount = Column(DECIMAL(14, 2), nullable=False, default=0)
+    sent_count = Column(Integer, nullable=False, default=0)
+    received_amount = Column(DECIMAL(14, 2), nullable=False, default=0)
+    received_count = Column(Integer, nullable=False, default=0)
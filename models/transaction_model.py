@@ -1,10 +1,15 @@
 from datetime import datetime
-from sqlalchemy import Column, String, ForeignKey, DECIMAL, DateTime, Integer, BigInteger
+from sqlalchemy import Column, String, ForeignKey, DECIMAL, DateTime, Integer, BigInteger, Index
 from sqlalchemy.orm import relationship
 from models import db 
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # History and pending lookups filter by one side of the transfer + status and sort by date
+        Index('ix_transactions_sender_status_date', 'sender_dni', 'status', 'date'),
+        Index('ix_transactions_receiver_status_date', 'receiver_dni', 'status', 'date'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     amount = Column(DECIMAL(10, 2), nullable=False, default=0.0)
@@ -33,6 +38,6 @@ class Transaction(db.Model):
             "credit_card_number": str(self.credit_card_number),
             "sender_dni": self.sender_dni,
             "receiver_dni": self.receiver_dni,
-            "sender": self.sender.to_json(),
-            "receiver": self.receiver.to_json()
+            "sender": self.sender.to_summary_json() if self.sender else None,
+            "receiver": self.receiver.to_summary_json() if self.receiver else None
         }
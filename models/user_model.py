@@ -52,8 +52,16 @@ class User(db.Model):
         backref='favourited_by'
     )
     
-    def to_json(self):
-        return {
+    def to_summary_json(self):
+        """Compact representation used when a user is embedded in another resource."""
+        return {"dni": self.dni, "name": self.name, "image": self.image}
+
+    # Keys of to_json() backed by a relationship; each one costs a query when it is not eagerly loaded
+    RELATIONSHIP_FIELDS = ("credit_cards", "friends", "blocked_users", "favourite_users")
+
+    def to_json(self, fields=None):
+        """Serialize the user. `fields` limits the emitted keys (None = every key); relationships not requested are never loaded."""
+        data = {
             "dni": self.dni,
             "name": self.name,
             "email": self.email,
@@ -66,8 +74,17 @@ class User(db.Model):
             "phone": self.phone,
             "created_at": self.created_at.strftime('%d/%m/%Y') if self.created_at else None,
             "updated_at": self.updated_at.strftime('%d/%m/%Y') if self.updated_at else None,
-            "credit_cards": [card.to_json() for card in self.credit_cards],
-            "friends": [{"dni": friend.dni, "name": friend.name, "image": friend.image} for friend in self.friends],
-            "blocked_users": [{"dni": user.dni, "name": user.name, "image": user.image} for user in self.blocked_users],
-            "favourite_users": [{"dni": user.dni, "name": user.name, "image": user.image} for user in self.favourite_users],
         }
+        if fields is not None:
+            data = {key: value for key, value in data.items() if key in fields}
+
+        relationships = {
+            "credit_cards": lambda: [card.to_json() for card in self.credit_cards],
+            "friends": lambda: [friend.to_summary_json() for friend in self.friends],
+            "blocked_users": lambda: [user.to_summary_json() for user in self.blocked_users],
+            "favourite_users": lambda: [user.to_summary_json() for user in self.favourite_users],
+        }
+        for name, serialize in relationships.items():
+            if fields is None or name in fields:
+                data[name] = serialize()
+        return data
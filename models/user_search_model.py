@@ -0,0 +1,43 @@
+# models/user_search_model.py
+from sqlalchemy import DDL, Integer, String, column, event, table
+from models.user_model import User
+
+# Índice de búsqueda de usuarios (solo SQLite): tabla FTS5 con tokenizador trigram sobre nombre, email y teléfono.
+# Guarda su propia copia del texto (no usa el rowid de "user", que VACUUM puede renumerar) y los triggers la
+# mantienen al día en cada INSERT, UPDATE y DELETE de usuarios, también en las inserciones masivas.
+USERS_FTS = "users_fts"
+
+# Borra la fila de un usuario buscándola por su DNI a través del propio índice (la columna dni también es trigram)
+_DELETE_OLD = (
+    "DELETE FROM users_fts WHERE users_fts MATCH 'dni : \"' || replace(old.dni, '\"', '\"\"') || '\"' AND dni = old.dni;"
+)
+_INSERT_NEW = "INSERT INTO users_fts (dni, name, email, phone) VALUES (new.dni, new.name, new.email, new.phone);"
+
+USER_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE users_fts USING fts5(dni, name, email, phone, tokenize = 'trigram')",
+    f"CREATE TRIGGER users_fts_after_insert AFTER INSERT ON user BEGIN {_INSERT_NEW} END",
+    f"CREATE TRIGGER users_fts_after_delete AFTER DELETE ON user BEGIN {_DELETE_OLD} END",
+    f"CREATE TRIGGER users_fts_after_update AFTER UPDATE OF dni, name, email, phone ON user BEGIN {_DELETE_OLD} {_INSERT_NEW} END",
+)
+USER_SEARCH_DROP_DDL = (
+    "DROP TRIGGER IF EXISTS users_fts_after_insert",
+    "DROP TRIGGER IF EXISTS users_fts_after_delete",
+    "DROP TRIGGER IF EXISTS users_fts_after_update",
+    "DROP TABLE IF EXISTS users_fts",
+)
+USER_SEARCH_POPULATE = "INSERT INTO users_fts (dni, name, email, phone) SELECT dni, name, email, phone FROM user"
+
+# Para las consultas: la tabla virtual no forma parte de los metadatos (create_all la crearía como tabla normal)
+users_fts = table(USERS_FTS, column("rowid", Integer), column("dni", String))
+
+
+def include_in_migrations(name, type_, parent_names):
+    """Alembic no debe proponer borrar la tabla FTS5 ni sus tablas internas (users_fts_data, users_fts_idx...)"""
+    return not (type_ == "table" and name.startswith(USERS_FTS))
+
+
+# db.create_all() (CREATE_DB_ON_STARTUP, benchmarks) crea también el índice; en producción lo crea la migración
+for statement in USER_SEARCH_DDL:
+    event.listen(User.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in USER_SEARCH_DROP_DDL:
+    event.listen(User.__table__, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
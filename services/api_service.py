@@ -1,8 +1,38 @@
+from collections import namedtuple
+from sqlalchemy import inspect
 from models import db
 from models.apikey_model import ApiKey
+from configuration.cache import TTLCache
+
+# Owner of an API key, as cached in memory
+ApiKeyPrincipal = namedtuple("ApiKeyPrincipal", ["key_id", "user_dni"])
+
+# Key digest -> ApiKeyPrincipal. Rotations and deletions in this process invalidate the entry,
+# other worker processes see them after at most API_KEY_CACHE_TTL seconds.
+API_KEY_CACHE_MAX_SIZE = 10000
+API_KEY_CACHE_TTL = 300
+api_key_cache = TTLCache(maxsize=API_KEY_CACHE_MAX_SIZE, default_ttl=API_KEY_CACHE_TTL)
   
 class ApiService:
     """Service to handle API requests and responses."""
+    @staticmethod
+    def resolve_api_key(api_key):
+        """Resolve the owner of a raw key sent by a client: one hash, and no SQL on a cache hit"""
+        digest = ApiKey.hash_key(api_key)
+        principal = api_key_cache.get(digest)
+        if principal is None:
+            record = ApiKey.query.filter_by(key_hash=digest).first()
+            if not record:
+                return None
+            principal = ApiKeyPrincipal(record.id, record.user_dni)
+            api_key_cache.set(digest, principal)
+        return principal
+
+    @staticmethod
+    def user_api_keys_query(user_dni):
+        """API keys owned by a user"""
+        return ApiKey.query.filter_by(user_dni=user_dni)
+
     @staticmethod
     def save_api_key(api_key):
         """Save a new API key"""
@@ -18,6 +48,9 @@ class ApiService:
     def update_api_key(api_key):
         """Update an existing API key"""
         try:
+            # Forget the digest of the replaced key, if it was rotated
+            for digest in inspect(api_key).attrs.key_hash.history.deleted:
+                api_key_cache.invalidate(digest)
             db.session.commit()
             return api_key
         except Exception as e:
@@ -28,6 +61,7 @@ class ApiService:
     def delete_api_key(api_key):
         """Delete an API key"""
         try:
+            api_key_cache.invalidate(api_key.key_hash)
             db.session.delete(api_key)
             db.session.commit()
         except Exception as e:
@@ -1,7 +1,21 @@
 # services/credit_card_service.py
 from models.credit_card_model import CreditCard
 from models import db
-from datetime import datetime
+from models.errors.custom_exception_model import CustomException
+from datetime import date, datetime
+from sqlalchemy import or_
+import csv
+from itertools import islice
+import io
+import json
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_BATCH_SIZE = 1000
+# Columns of the CSV export, in the same order and format as CreditCard.to_json()
+EXPORT_COLUMNS = (
+    "number", "type", "expiration_date", "active", "card_holder_name",
+    "paypal_token", "user_dni", "created_at", "updated_at"
+)
 
 class CreditCardService:
 
@@ -26,10 +40,15 @@ class CreditCardService:
             db.session.rollback()
             raise Exception(f"Error creating credit card: {str(e)}")
 
+    @staticmethod
+    def user_credit_cards_query(dni):
+        """Credit cards owned by a user."""
+        return CreditCard.query.filter_by(user_dni=dni)
+
     @staticmethod
     def get_my_credit_cards(dni):
         """Get a single credit card by its number."""
-        return CreditCard.query.filter_by(user_dni=dni).first()
+        return CreditCardService.user_credit_cards_query(dni).first()
 
     @staticmethod
     def get_credit_card(number):
@@ -41,6 +60,68 @@ class CreditCardService:
         """Get all credit cards."""
         return CreditCard.query.all()
 
+    @staticmethod
+    def parse_updated_since(value):
+        """Parse ?updated_since= (YYYY-MM-DD; a full ISO datetime is truncated to its date)."""
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+        except ValueError:
+            raise CustomException("updated_since must be a date in YYYY-MM-DD format", 400)
+
+    @staticmethod
+    def export_query(updated_since=None):
+        """Every credit card in number order or, with `updated_since`, the ones created or updated on or after
+        that day in no particular order (sorting them would make the database walk the whole primary key)."""
+        if updated_since is None:
+            return CreditCard.query.order_by(CreditCard.number)
+        # updated_at is only set by updates and is never before created_at, so this is
+        # coalesce(updated_at, created_at) >= updated_since, with an index for each side of the OR
+        return CreditCard.query.filter(or_(CreditCard.updated_at >= updated_since, CreditCard.created_at >= updated_since))
+
+    @staticmethod
+    def iter_export_batches(updated_since=None, batch_size=EXPORT_BATCH_SIZE):
+        """Iterate over the exported cards in lists of at most batch_size, from a single query read with yield_per.
+
+        Read-only: each batch is expunged from the session once the caller asks for the next one,
+        so memory stays bounded whatever the number of cards.
+        """
+        cards = iter(CreditCardService.export_query(updated_since).yield_per(batch_size))
+        while True:
+            batch = list(islice(cards, batch_size))
+            if not batch:
+                return
+            yield batch
+            for card in batch:
+                db.session.expunge(card)
+
+    @staticmethod
+    def export_chunks(export_format, updated_since=None):
+        """The export as text chunks, one per batch: NDJSON lines or CSV rows (with a header row)."""
+        batches = CreditCardService.iter_export_batches(updated_since)
+        if export_format == "ndjson":
+            for batch in batches:
+                yield "".join(json.dumps(card.to_json()) + "\n" for card in batch)
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(EXPORT_COLUMNS)
+        for batch in batches:
+            for card in batch:
+                data = card.to_json()
+                writer.writerow(data[column] for column in EXPORT_COLUMNS)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():  # Header only: no cards to export
+            yield buffer.getvalue()
+
     @staticmethod
     def update_credit_card(number, card_data):
         """Update a credit card."""
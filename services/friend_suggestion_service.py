@@ -0,0 +1,109 @@
+# services/friend_suggestion_service.py
+from sqlalchemy import and_, delete, exists, func, insert, or_, select
+from models import db
+from models.user_model import User
+from models.user_relations import Friends, Blocked
+from models.friendship_request_model import FriendshipRequest, RequestStatusEnum
+from models.friend_suggestion_model import FriendSuggestion
+
+SUGGESTIONS_DEFAULT_LIMIT = 20
+SUGGESTIONS_MAX_LIMIT = 100
+REFRESH_CHUNK_SIZE = 1000
+SUGGESTION_COLUMNS = ("user_dni", "candidate_dni", "mutual_count")
+
+
+def _mutual_counts(user_filter):
+    """(user, candidate, mutual friends) for every friend of a friend of the users matched by `user_filter`
+    who is not already their friend: the two-hop join over the friends table."""
+    first, second, direct = Friends.alias("first_hop"), Friends.alias("second_hop"), Friends.alias("direct")
+    return (
+        select(first.c.user_dni, second.c.friend_dni, func.count())
+        .select_from(first.join(second, second.c.user_dni == first.c.friend_dni))
+        .where(
+            user_filter(first.c.user_dni),
+            second.c.friend_dni != first.c.user_dni,
+            ~exists().where(direct.c.user_dni == first.c.user_dni, direct.c.friend_dni == second.c.friend_dni)
+        )
+        .group_by(first.c.user_dni, second.c.friend_dni)
+    )
+
+
+class FriendSuggestionService:
+    """People you may know, ranked by friends in common, read from the precomputed friend_suggestions table."""
+
+    @staticmethod
+    def suggestions_query(dni):
+        """Suggested users for `dni` with their mutual friend count, best first. Blocks (in either direction),
+        pending friendship requests (in either direction) and inactive users are left out when reading."""
+        suggestion = FriendSuggestion
+        blocked = exists().where(or_(
+            and_(Blocked.c.user_dni == dni, Blocked.c.blocked_dni == suggestion.candidate_dni),
+            and_(Blocked.c.user_dni == suggestion.candidate_dni, Blocked.c.blocked_dni == dni)
+        ))
+        pending = exists().where(
+            FriendshipRequest.status == RequestStatusEnum.PENDING,
+            or_(
+                and_(FriendshipRequest.sender_dni == dni, FriendshipRequest.receiver_dni == suggestion.candidate_dni),
+                and_(FriendshipRequest.sender_dni == suggestion.candidate_dni, FriendshipRequest.receiver_dni == dni)
+            )
+        )
+        return (
+            db.session.query(User, suggestion.mutual_count)
+            .join(suggestion, suggestion.candidate_dni == User.dni)
+            .filter(suggestion.user_dni == dni, User.active == True, ~blocked, ~pending)
+            # Same order as ix_friend_suggestions_user_mutual read backwards: no sort
+            .order_by(suggestion.mutual_count.desc(), suggestion.candidate_dni.desc())
+        )
+
+    @staticmethod
+    def get_suggestions(dni, limit=SUGGESTIONS_DEFAULT_LIMIT):
+        return [
+            {**user.to_summary_json(), "mutual_friends": mutual_count}
+            for user, mutual_count in FriendSuggestionService.suggestions_query(dni).limit(limit)
+        ]
+
+    @staticmethod
+    def refresh_users(dnis):
+        """Recompute, in the caller's transaction, the suggestions affected by a change to these users' friends.
+
+        Mutual counts only change for pairs that include one of them, and they are symmetric, so their own
+        rows are recomputed with the two-hop join and the rows pointing at them are copied from those.
+        """
+        dnis = sorted(set(dnis))
+        if not dnis:
+            return
+        suggestion = FriendSuggestion
+        db.session.execute(delete(suggestion).where(or_(suggestion.user_dni.in_(dnis), suggestion.candidate_dni.in_(dnis))))
+        db.session.execute(insert(suggestion).from_select(
+            SUGGESTION_COLUMNS, _mutual_counts(lambda user_dni: user_dni.in_(dnis))
+        ))
+        db.session.execute(insert(suggestion).from_select(
+            SUGGESTION_COLUMNS,
+            select(suggestion.candidate_dni, suggestion.user_dni, suggestion.mutual_count)
+            .where(suggestion.user_dni.in_(dnis), suggestion.candidate_dni.not_in(dnis))
+        ))
+
+    @staticmethod
+    def refresh(engine=None, chunk_size=REFRESH_CHUNK_SIZE, progress=None):
+        """Recompute the whole table, `chunk_size` users per commit (each user's suggestions are replaced
+        at once, so /friendship/suggestions keeps answering meanwhile). `progress(users_done)` is called
+        after each chunk. Returns the number of users processed."""
+        engine = engine or db.engine
+        suggestion = FriendSuggestion.__table__
+        done, last_dni = 0, None
+        while True:
+            with engine.begin() as connection:
+                page = select(User.dni).order_by(User.dni).limit(chunk_size)
+                if last_dni is not None:
+                    page = page.where(User.dni > last_dni)
+                dnis = connection.execute(page).scalars().all()
+                if not dnis:
+                    return done
+                first_dni, last_dni = dnis[0], dnis[-1]
+                connection.execute(delete(suggestion).where(suggestion.c.user_dni.between(first_dni, last_dni)))
+                connection.execute(insert(suggestion).from_select(
+                    SUGGESTION_COLUMNS, _mutual_counts(lambda user_dni: user_dni.between(first_dni, last_dni))
+                ))
+            done += len(dnis)
+            if progress:
+                progress(done)
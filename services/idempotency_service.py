@@ -0,0 +1,107 @@
+# services/idempotency_service.py
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.idempotency_key_model import IdempotencyKey
+from models.errors.custom_exception_model import CustomException
+
+IDEMPOTENCY_TTL_HOURS = 24
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# Namespace of the PayPal request ids derived from idempotency keys
+PAYPAL_REQUEST_ID_NAMESPACE = uuid.UUID("6f1c2f6e-3c55-4d0e-9a43-1d2c8c1f7a10")
+# Response headers stored with the body and sent again on replays (202 answers point to their job)
+REPLAYED_HEADERS = ("Location",)
+
+
+class IdempotencyService:
+    """Store the response of requests sent with an Idempotency-Key and replay it to retries."""
+
+    @staticmethod
+    def request_hash(method, path, body):
+        digest = hashlib.sha256()
+        for part in (method.encode("utf-8"), path.encode("utf-8"), body):
+            digest.update(part)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def paypal_request_id(owner, key):
+        """Stable PayPal-Request-Id for a key: retries reuse it, and keys of different users never collide"""
+        return str(uuid.uuid5(PAYPAL_REQUEST_ID_NAMESPACE, f"{owner}:{key}"))
+
+    @staticmethod
+    def begin(owner, key, request_hash):
+        """
+        Reserve a key for a new request. Returns (record, replay): `replay` is True when the
+        record holds the stored response of a previous identical request.
+        """
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise CustomException(f"Idempotency-Key must have between 1 and {IDEMPOTENCY_KEY_MAX_LENGTH} characters", 400)
+
+        now = datetime.utcnow()
+        record = IdempotencyKey.query.filter_by(owner=owner, key=key).first()
+        if record and record.expires_at <= now:
+            db.session.delete(record)
+            db.session.flush()
+            record = None
+
+        if record:
+            if record.request_hash != request_hash:
+                raise CustomException("Idempotency-Key was already used for a different request", 422)
+            if not record.completed:
+                raise CustomException("A request with this Idempotency-Key is still being processed", 409)
+            return record, True
+
+        ttl = timedelta(hours=current_app.config.get("IDEMPOTENCY_TTL_HOURS", IDEMPOTENCY_TTL_HOURS))
+        record = IdempotencyKey(owner=owner, key=key, request_hash=request_hash, created_at=now, expires_at=now + ttl)
+        try:
+            db.session.add(record)
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request with the same key reserved it first
+            db.session.rollback()
+            raise CustomException("A request with this Idempotency-Key is still being processed", 409)
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return record, False
+
+    @staticmethod
+    def complete(record, status_code, body, headers=None):
+        """Store the final response. Server errors release the key instead, so the client can retry."""
+        try:
+            db.session.rollback()  # Never commit what a failed route may have left in the session
+            if status_code >= 500:
+                db.session.delete(record)
+            else:
+                record.response_status = status_code
+                record.response_body = body
+                replayed = {name: headers[name] for name in REPLAYED_HEADERS if headers and name in headers}
+                record.response_headers = json.dumps(replayed) if replayed else None
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def replayed_headers(record):
+        """Headers stored by complete() for a replayed response"""
+        return json.loads(record.response_headers) if record.response_headers else {}
+
+    @staticmethod
+    def purge_expired(batch_size=1000):
+        """Delete expired keys in batches. Returns how many were deleted."""
+        deleted = 0
+        while True:
+            ids = [row.id for row in db.session.query(IdempotencyKey.id)
+                   .filter(IdempotencyKey.expires_at <= datetime.utcnow()).limit(batch_size)]
+            if not ids:
+                return deleted
+            db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+            db.session.commit()
+            deleted += len(ids)
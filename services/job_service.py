@@ -0,0 +1,191 @@
+# services/job_service.py
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from models import db
+from models.job_model import Job
+from models.enums import JobStatusEnum
+from models.errors.custom_exception_model import CustomException
+from services.paypal_service import PaypalService
+from services.credit_card_service import CreditCardService
+from services.transfer_service import TransferService
+
+PAYPAL_WORKERS = 4
+PAYPAL_MAX_PENDING_JOBS = 100
+# PENDING jobs not queued in this process are re-queued when polled after this long (e.g. after a restart)
+JOB_RECOVERY_AFTER = timedelta(seconds=60)
+
+
+class ChargeNotCreditedError(CustomException):
+    """PayPal charged the card but the funds could not be added to the balance: the charge must be retried or refunded"""
+    def __init__(self, charge, cause):
+        super().__init__(f"Charged in PayPal but not credited to the balance: {cause}", 500)
+        self.charge = charge
+
+
+class JobService:
+    """Run slow PayPal calls on a bounded worker pool, tracking each one in the jobs table."""
+
+    _app = None
+    _executor = None
+    _slots = None
+    _inflight = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def init_app(app):
+        """Create the worker pool. Workers are started lazily, on the first submitted job."""
+        JobService._app = app
+        JobService._executor = ThreadPoolExecutor(
+            max_workers=app.config.get("PAYPAL_WORKERS", PAYPAL_WORKERS),
+            thread_name_prefix="paypal-job"
+        )
+        # Bounds the jobs queued or running in this process, so a PayPal outage cannot pile up work forever
+        JobService._slots = threading.BoundedSemaphore(app.config.get("PAYPAL_MAX_PENDING_JOBS", PAYPAL_MAX_PENDING_JOBS))
+
+    @staticmethod
+    def submit(user_dni, kind, payload):
+        """Persist a new PENDING job and queue it. Raises 503 when the pool is saturated."""
+        if kind not in JOB_HANDLERS:
+            raise CustomException(f"Unknown job kind '{kind}'", 500)
+
+        inline = current_app.config.get("PAYPAL_JOBS_INLINE")
+        if not inline:
+            # Take the pool slot first: a saturated pool answers 503 without storing the payload (card data)
+            JobService._reserve_slot()
+
+        job = Job(user_dni=user_dni, kind=kind, status=JobStatusEnum.PENDING, payload=json.dumps(payload))
+        try:
+            db.session.add(job)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if not inline:
+                JobService._slots.release()
+            raise e
+
+        if inline:
+            # Run in the request thread (local development, comparison benchmarks)
+            JobService._run(job.id)
+            db.session.refresh(job)
+            return job
+
+        try:
+            JobService._dispatch(job.id)
+        except Exception as e:
+            # Never leave a stored payload behind for a job that no worker will run
+            job.status = JobStatusEnum.FAILED
+            job.error = f"Could not be queued: {e}"[:255]
+            job.payload = "{}"
+            db.session.commit()
+            raise CustomException("Could not queue the payment operation, try again later", 503)
+        return job
+
+    @staticmethod
+    def get_job(job_id, user_dni):
+        """Return a job owned by the user, re-queuing it if it was orphaned by a previous process."""
+        job = Job.query.filter_by(id=job_id, user_dni=user_dni).first()
+        if job and job.status == JobStatusEnum.PENDING and job.id not in JobService._inflight \
+                and job.created_at < datetime.utcnow() - JOB_RECOVERY_AFTER:
+            JobService._enqueue(job.id)
+        return job
+
+    @staticmethod
+    def _enqueue(job_id):
+        JobService._reserve_slot()
+        JobService._dispatch(job_id)
+
+    @staticmethod
+    def _reserve_slot():
+        if not JobService._slots.acquire(blocking=False):
+            raise CustomException("Too many payment operations in progress, try again later", 503)
+
+    @staticmethod
+    def _dispatch(job_id):
+        """Hand a stored job to the pool, using the slot already reserved for it"""
+        with JobService._lock:
+            JobService._inflight.add(job_id)
+        try:
+            JobService._executor.submit(JobService._work, job_id)
+        except Exception:
+            with JobService._lock:
+                JobService._inflight.discard(job_id)
+            JobService._slots.release()
+            raise
+
+    @staticmethod
+    def _work(job_id):
+        try:
+            with JobService._app.app_context():
+                JobService._run(job_id)
+        finally:
+            with JobService._lock:
+                JobService._inflight.discard(job_id)
+            JobService._slots.release()
+
+    @staticmethod
+    def _run(job_id):
+        # Claim the job: only one worker (in any process) can move it from PENDING to RUNNING
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatusEnum.PENDING)
+            .values(status=JobStatusEnum.RUNNING, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = db.session.get(Job, job_id)
+        try:
+            result = JOB_HANDLERS[job.kind](job.user_dni, json.loads(job.payload))
+            job.status = JobStatusEnum.SUCCEEDED
+            job.result = json.dumps(result)
+        except ChargeNotCreditedError as e:
+            db.session.rollback()
+            job.status = JobStatusEnum.CHARGED_NOT_CREDITED
+            job.result = json.dumps(e.charge)  # What is needed to retry the credit or refund the charge
+            job.error = e.message[:255]
+        except CustomException as e:
+            db.session.rollback()
+            job.status = JobStatusEnum.FAILED
+            job.error = e.message[:255]
+        except Exception as e:
+            db.session.rollback()
+            job.status = JobStatusEnum.FAILED
+            job.error = str(e)[:255]
+        job.payload = "{}"
+        db.session.commit()
+
+    @staticmethod
+    def _validate_card(user_dni, card_data):
+        """Vault the card in PayPal and store it"""
+        card_data["paypal_token"] = PaypalService.validate_card(card_data)
+        card_data["user_dni"] = user_dni
+        return CreditCardService.create_credit_card(card_data).to_json()
+
+    @staticmethod
+    def _charge_funds(user_dni, payload):
+        """Charge the card in PayPal and add the funds to the balance"""
+        # Own request id when the client sent no Idempotency-Key, so the order can still be found in PayPal
+        request_id = payload.get("paypal_request_id") or str(uuid.uuid4())
+        order = PaypalService.authorize_charge(payload["paypal_token"], payload["amount"], request_id)
+        try:
+            TransferService.charge_funds(user_dni, payload["amount"])
+        except Exception as e:
+            raise ChargeNotCreditedError({
+                "amount": payload["amount"],
+                "paypal_request_id": request_id,
+                "paypal_order_id": getattr(getattr(order, "body", None), "id", None)
+            }, e)
+        return {"amount": payload["amount"]}
+
+
+JOB_HANDLERS = {
+    "validate_card": JobService._validate_card,
+    "charge_funds": JobService._charge_funds,
+}
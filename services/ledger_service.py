@@ -0,0 +1,113 @@
+# services/ledger_service.py
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, literal, select, DateTime
+from models import db
+from models.user_model import User
+from models.ledger_model import LedgerEntry, BalanceSnapshot
+
+# Entries are committed a few milliseconds after their created_at; snapshots leave this margin so none is missed
+SNAPSHOT_SETTLE_SECONDS = 60
+
+
+class LedgerService:
+    """Double-entry ledger: every money movement appends two entries that add up to zero.
+
+    User.amount stays as the cached current balance (it is what the conditional debit checks), but it is
+    only written next to ledger entries in the same commit. Balances at any time come from the latest
+    balance snapshot plus the entries after it.
+    """
+
+    @staticmethod
+    def posting(debit_account, credit_account, amount, kind, transaction_id=None, created_at=None):
+        """The two entries of moving `amount` from debit_account to credit_account, as rows for record()."""
+        posting_id = str(uuid.uuid4())
+        created_at = created_at or datetime.utcnow()
+        return [
+            {"posting_id": posting_id, "account": debit_account, "amount": -amount, "kind": kind,
+             "transaction_id": transaction_id, "created_at": created_at},
+            {"posting_id": posting_id, "account": credit_account, "amount": amount, "kind": kind,
+             "transaction_id": transaction_id, "created_at": created_at},
+        ]
+
+    @staticmethod
+    def record(entries):
+        """Insert entries with one executemany in the caller's transaction; the caller commits."""
+        if entries:
+            db.session.execute(insert(LedgerEntry), entries)
+
+    @staticmethod
+    def balance(account, at=None):
+        """Balance of an account at `at` (now by default): latest snapshot not after it plus the entries since."""
+        at = at or datetime.utcnow()
+        snapshot = (
+            BalanceSnapshot.query
+            .filter(BalanceSnapshot.account == account, BalanceSnapshot.taken_at <= at)
+            .order_by(BalanceSnapshot.taken_at.desc())
+            .first()
+        )
+        query = db.session.query(func.coalesce(func.sum(LedgerEntry.amount), 0)).filter(
+            LedgerEntry.account == account,
+            LedgerEntry.created_at <= at
+        )
+        if snapshot:
+            query = query.filter(LedgerEntry.created_at > snapshot.taken_at)
+        return (snapshot.balance if snapshot else 0) + query.scalar()
+
+    @staticmethod
+    def take_snapshots(cutoff=None):
+        """Snapshot every account with entries since the previous snapshots, up to `cutoff`. Returns the count.
+
+        A single INSERT ... SELECT reads only the entries after the previous cutoff.
+        """
+        cutoff = cutoff or datetime.utcnow() - timedelta(seconds=SNAPSHOT_SETTLE_SECONDS)
+        previous_cutoff = db.session.query(func.max(BalanceSnapshot.taken_at)).scalar()
+        if previous_cutoff is not None and previous_cutoff >= cutoff:
+            return 0
+
+        delta = select(LedgerEntry.account, func.sum(LedgerEntry.amount).label("delta")).where(LedgerEntry.created_at <= cutoff)
+        if previous_cutoff is not None:
+            delta = delta.where(LedgerEntry.created_at > previous_cutoff)
+        delta = delta.group_by(LedgerEntry.account).subquery()
+
+        previous_balance = (
+            select(BalanceSnapshot.balance)
+            .where(BalanceSnapshot.account == delta.c.account)
+            .order_by(BalanceSnapshot.taken_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        try:
+            result = db.session.execute(
+                insert(BalanceSnapshot).from_select(
+                    ["account", "taken_at", "balance"],
+                    select(delta.c.account, literal(cutoff, DateTime), func.coalesce(previous_balance, 0) + delta.c.delta)
+                )
+            )
+            db.session.commit()
+            return result.rowcount
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def find_inconsistencies():
+        """Postings that do not add up to zero, and users whose cached amount differs from their ledger balance."""
+        unbalanced = [
+            posting_id for posting_id, in db.session.query(LedgerEntry.posting_id)
+            .group_by(LedgerEntry.posting_id)
+            .having(func.sum(LedgerEntry.amount) != 0)
+        ]
+        ledger = (
+            select(LedgerEntry.account, func.sum(LedgerEntry.amount).label("balance"))
+            .group_by(LedgerEntry.account)
+            .subquery()
+        )
+        ledger_balance = func.coalesce(ledger.c.balance, 0)
+        mismatched = [
+            {"dni": dni, "amount": float(amount), "ledger_balance": float(balance)}
+            for dni, amount, balance in db.session.query(User.dni, User.amount, ledger_balance)
+            .outerjoin(ledger, ledger.c.account == User.dni)
+            .filter(User.amount != ledger_balance)
+        ]
+        return unbalanced, mismatched
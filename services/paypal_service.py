@@ -5,11 +5,9 @@ from paypalserversdk.models.card_brand import CardBrand
 from paypalserversdk.exceptions.error_exception import ErrorException
 from paypalserversdk.exceptions.api_exception import ApiException
 from paypalserversdk.http.auth.o_auth_2 import ClientCredentialsAuthCredentials
-from paypalserversdk.configuration import Environment
+from paypalserversdk.configuration import Configuration, Environment, Server
 import logging
 from paypalserversdk.logging.configuration.api_logging_configuration import LoggingConfiguration
-from paypalserversdk.logging.configuration.api_logging_configuration import RequestLoggingConfiguration
-from paypalserversdk.logging.configuration.api_logging_configuration import ResponseLoggingConfiguration
 from paypalserversdk.paypal_serversdk_client import PaypalServersdkClient
 from paypalserversdk.models.order_request import OrderRequest
 from paypalserversdk.models.checkout_payment_intent import CheckoutPaymentIntent
@@ -18,24 +16,39 @@ from paypalserversdk.models.amount_with_breakdown import AmountWithBreakdown
 from paypalserversdk.models.payment_source import PaymentSource
 from paypalserversdk.models.card_request import CardRequest
 from os import getenv
+from services.paypal_transport import PaypalHttpClient, PaypalSdkLogger, PaypalTransport, PAYPAL_TOKEN_REFRESH_MARGIN
+from services.paypal_transport import SwitchableRequestLoggingConfiguration, SwitchableResponseLoggingConfiguration
 import uuid
 
-client = PaypalServersdkClient(
+class PaypalConfiguration(Configuration):
+    """SDK configuration that can target any PayPal-compatible base URL (e.g. a local stand-in server)."""
+
+    def __init__(self, base_url=None, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def get_base_uri(self, server=Server.DEFAULT):
+        return self.base_url or super().get_base_uri(server)
+
+client = PaypalServersdkClient(config=PaypalConfiguration(
+    base_url=getenv('PAYPAL_BASE_URL'),
+    http_client_instance=PaypalHttpClient(),
     client_credentials_auth_credentials=ClientCredentialsAuthCredentials(
         o_auth_client_id=getenv('PAYPAL_CLIENT_ID', 'your_client_id'),
-        o_auth_client_secret=getenv('PAYPAL_CLIENT_SECRET', 'your_client_secret')
+        o_auth_client_secret=getenv('PAYPAL_CLIENT_SECRET', 'your_client_secret'),
+        o_auth_token_provider=PaypalTransport.provide_token,
+        o_auth_clock_skew=PAYPAL_TOKEN_REFRESH_MARGIN
     ),
     environment=Environment.SANDBOX,
     logging_configuration=LoggingConfiguration(
+        logger=PaypalSdkLogger(),
         log_level=logging.INFO,
-        request_logging_config=RequestLoggingConfiguration(
-            log_body=True
-        ),
-        response_logging_config=ResponseLoggingConfiguration(
+        request_logging_config=SwitchableRequestLoggingConfiguration(),
+        response_logging_config=SwitchableResponseLoggingConfiguration(
             log_headers=True
         )
     )
-)
+))
 
 CARD_BRAND_MAPPING = {
     "visa": CardBrand.VISA,
@@ -66,7 +79,7 @@ class PaypalService:
             )
         }
         try:
-            result =  vault_controller.create_payment_token(collect)
+            result = PaypalTransport.call("create_payment_token", lambda: vault_controller.create_payment_token(collect))
             return result.body.id
         except ErrorException as e: 
             raise e
@@ -74,8 +87,8 @@ class PaypalService:
             raise e
         
     @staticmethod
-    def authorize_charge(card_token, amount):
-        """Authorize the charge of funds to a card."""
+    def authorize_charge(card_token, amount, request_id=None):
+        """Authorize the charge of funds to a card. PayPal answers a repeated `request_id` with the original order."""
         orders_controller = client.orders
         collect = {
             'body': OrderRequest(
@@ -94,11 +107,11 @@ class PaypalService:
                     )
                 )
             ),
-            'paypal_request_id': uuid.uuid4(),
+            'paypal_request_id': request_id or str(uuid.uuid4()),
             'prefer': 'return=minimal'
         }
         try:
-            result = orders_controller.create_order(collect)
+            result = PaypalTransport.call("create_order", lambda: orders_controller.create_order(collect))
             return result
         except ErrorException as e: 
             raise e
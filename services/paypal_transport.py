@@ -0,0 +1,159 @@
+# services/paypal_transport.py
+import logging
+import threading
+import time
+from os import getenv
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+from apimatic_core_interfaces.logger.logger import Logger
+from paypalserversdk.exceptions.api_exception import ApiException
+from paypalserversdk.logging.configuration.api_logging_configuration import RequestLoggingConfiguration
+from paypalserversdk.logging.configuration.api_logging_configuration import ResponseLoggingConfiguration
+from configuration.circuit_breaker import CircuitBreaker
+from models.errors.custom_exception_model import CustomException
+
+PAYPAL_CONNECT_TIMEOUT = float(getenv("PAYPAL_CONNECT_TIMEOUT", 3.05))
+PAYPAL_READ_TIMEOUT = float(getenv("PAYPAL_READ_TIMEOUT", 15))
+# One keep-alive connection per job worker is enough, extra connections are only opened under bursts
+PAYPAL_POOL_SIZE = int(getenv("PAYPAL_POOL_SIZE", getenv("PAYPAL_WORKERS", 4)))
+# The OAuth token is refreshed this many seconds before PayPal expires it
+PAYPAL_TOKEN_REFRESH_MARGIN = int(getenv("PAYPAL_TOKEN_REFRESH_MARGIN", 300))
+PAYPAL_BREAKER_FAILURES = int(getenv("PAYPAL_BREAKER_FAILURES", 5))
+PAYPAL_BREAKER_RESET = float(getenv("PAYPAL_BREAKER_RESET", 30))
+# Request and response bodies carry card data, so they are only logged while debugging
+PAYPAL_LOG_BODIES = getenv("PAYPAL_LOG_BODIES", "False").lower() == "true"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class PaypalHttpClient:
+    """ HTTP client handed to the SDK: a pooled keep-alive session with (connect, read) timeouts. """
+
+    def __init__(self, pool_size=PAYPAL_POOL_SIZE, connect_timeout=PAYPAL_CONNECT_TIMEOUT, read_timeout=PAYPAL_READ_TIMEOUT):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = Session()
+        # No transport retries: payment calls are not blindly repeated
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+
+class PaypalSdkLogger(Logger):
+    """ Send the SDK's request/response logs to the `paypal` logger instead of writing to stdout directly. """
+
+    def __init__(self, name="paypal"):
+        self._logger = logging.getLogger(name)
+
+    def log(self, level, message, params):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message, *params.values())
+
+
+class SwitchableRequestLoggingConfiguration(RequestLoggingConfiguration):
+    """ Request logging whose body logging follows PaypalTransport.log_bodies at call time. """
+
+    @property
+    def log_body(self):
+        return PaypalTransport.log_bodies
+
+
+class SwitchableResponseLoggingConfiguration(ResponseLoggingConfiguration):
+    """ Response logging whose body logging follows PaypalTransport.log_bodies at call time. """
+
+    @property
+    def log_body(self):
+        return PaypalTransport.log_bodies
+
+
+class PaypalTransport:
+    """ Guards every PayPal call: circuit breaker, shared OAuth token and latency metrics. """
+
+    breaker = CircuitBreaker(PAYPAL_BREAKER_FAILURES, PAYPAL_BREAKER_RESET)
+    log_bodies = PAYPAL_LOG_BODIES
+    token_refreshes = 0
+    _token = None
+    _token_lock = threading.Lock()
+    _metrics = {}
+    _metrics_lock = threading.Lock()
+
+    @staticmethod
+    def provide_token(last_token, auth_manager):
+        """ OAuth token provider for the SDK. Only one worker fetches a new token when it is about to expire. """
+        with PaypalTransport._token_lock:
+            token = PaypalTransport._token
+            if token is not None and not auth_manager.is_token_expired(token):
+                return token  # Another worker already refreshed it
+            token = auth_manager.fetch_token()
+            PaypalTransport._token = token
+            PaypalTransport.token_refreshes += 1
+            return token
+
+    @staticmethod
+    def call(operation, fn):
+        """ Run a PayPal SDK call, failing fast with a 503 while the circuit is open. """
+        if not PaypalTransport.breaker.allow():
+            raise CustomException("PayPal is temporarily unavailable, try again later", 503)
+
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except ApiException as e:
+            PaypalTransport._record(operation, time.perf_counter() - started, failed=True)
+            # A 4xx means PayPal is up and rejected the request (e.g. an invalid card)
+            if e.response_code >= 500 or e.response_code == 429:
+                PaypalTransport.breaker.record_failure()
+            else:
+                PaypalTransport.breaker.record_success()
+            raise e
+        except Timeout:
+            PaypalTransport._record(operation, time.perf_counter() - started, failed=True)
+            PaypalTransport.breaker.record_failure()
+            raise CustomException("PayPal did not answer in time", 504)
+        except ConnectionError:
+            PaypalTransport._record(operation, time.perf_counter() - started, failed=True)
+            PaypalTransport.breaker.record_failure()
+            raise CustomException("PayPal is unreachable", 502)
+        except Exception as e:
+            PaypalTransport._record(operation, time.perf_counter() - started, failed=True)
+            PaypalTransport.breaker.record_failure()
+            raise e
+
+        PaypalTransport._record(operation, time.perf_counter() - started, failed=False)
+        PaypalTransport.breaker.record_success()
+        return result
+
+    @staticmethod
+    def set_log_bodies(enabled: bool):
+        PaypalTransport.log_bodies = bool(enabled)
+
+    @staticmethod
+    def _record(operation, seconds, failed):
+        with PaypalTransport._metrics_lock:
+            metric = PaypalTransport._metrics.get(operation)
+            if metric is None:
+                metric = {"count": 0, "errors": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(LATENCY_BUCKETS)}
+                PaypalTransport._metrics[operation] = metric
+            metric["count"] += 1
+            metric["errors"] += int(failed)
+            metric["sum"] += seconds
+            metric["max"] = max(metric["max"], seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    metric["buckets"][i] += 1
+
+    @staticmethod
+    def stats():
+        """ Breaker state and per-operation latency (cumulative histogram buckets, in seconds). """
+        with PaypalTransport._metrics_lock:
+            operations = {
+                name: {**metric, "buckets": dict(zip(LATENCY_BUCKETS, metric["buckets"]))}
+                for name, metric in PaypalTransport._metrics.items()
+            }
+        return {
+            "breaker": PaypalTransport.breaker.stats(),
+            "log_bodies": PaypalTransport.log_bodies,
+            "timeouts": {"connect": PAYPAL_CONNECT_TIMEOUT, "read": PAYPAL_READ_TIMEOUT},
+            "token_refreshes": PaypalTransport.token_refreshes,
+            "operations": operations,
+        }
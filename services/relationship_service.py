@@ -0,0 +1,91 @@
+# services/relationship_service.py
+from flask import g, has_request_context
+from sqlalchemy import and_, exists, or_, select
+from models import db
+from models.user_relations import Friends, Blocked, Favourites
+
+MEMO_KEY = "relationship_memo"
+
+
+class RelationshipService:
+    """Yes/no questions about two users, each answered by an EXISTS on the primary key of the association
+    table instead of loading and scanning relationship lists.
+
+    Inside a request the answers are memoized in flask.g, so a request never asks the same question twice.
+    Anything that changes these tables must call forget() before asking again in the same request.
+    """
+
+    @staticmethod
+    def _memoized(key, compute, memo):
+        if not (memo and has_request_context()):
+            return compute()
+        answers = g.setdefault(MEMO_KEY, {})
+        if key not in answers:
+            answers[key] = compute()
+        return answers[key]
+
+    @staticmethod
+    def exists_query(owner_column, other_column, owner_dni, other_dni):
+        """SELECT EXISTS on one row of an association table, found through its (owner, other) primary key"""
+        return select(exists().where(owner_column == owner_dni, other_column == other_dni))
+
+    @staticmethod
+    def _exists(owner_column, other_column, owner_dni, other_dni):
+        statement = RelationshipService.exists_query(owner_column, other_column, owner_dni, other_dni)
+        return bool(db.session.execute(statement).scalar())
+
+    @staticmethod
+    def forget():
+        """Drop the memoized answers of this request (after blocking, unblocking, befriending...)."""
+        if has_request_context():
+            g.pop(MEMO_KEY, None)
+
+    @staticmethod
+    def has_blocked(user_dni, blocked_dni, memo=True):
+        """Has user_dni blocked blocked_dni?"""
+        return RelationshipService._memoized(
+            ("blocked", user_dni, blocked_dni),
+            lambda: RelationshipService._exists(Blocked.c.user_dni, Blocked.c.blocked_dni, user_dni, blocked_dni),
+            memo
+        )
+
+    @staticmethod
+    def block_status_query(user_dni, other_dni):
+        """Who blocked whom between two users: at most two primary key lookups, in a single query."""
+        return select(Blocked.c.user_dni).where(or_(
+            and_(Blocked.c.user_dni == user_dni, Blocked.c.blocked_dni == other_dni),
+            and_(Blocked.c.user_dni == other_dni, Blocked.c.blocked_dni == user_dni)
+        ))
+
+    @staticmethod
+    def block_status(user_dni, other_dni, memo=True):
+        """(user_dni blocked other_dni, other_dni blocked user_dni), both directions in a single query."""
+        def compute():
+            blockers = db.session.execute(RelationshipService.block_status_query(user_dni, other_dni)).scalars().all()
+            return user_dni in blockers, other_dni in blockers
+
+        status = RelationshipService._memoized(("block_status", user_dni, other_dni), compute, memo)
+        if memo and has_request_context():
+            # Also answers has_blocked() in both directions
+            answers = g.get(MEMO_KEY)
+            answers.setdefault(("blocked", user_dni, other_dni), status[0])
+            answers.setdefault(("blocked", other_dni, user_dni), status[1])
+        return status
+
+    @staticmethod
+    def are_friends(user_dni, friend_dni, memo=True):
+        """Is friend_dni in user_dni's friends? Accepted requests store the friendship in both directions."""
+        return RelationshipService._memoized(
+            ("friends", user_dni, friend_dni),
+            lambda: RelationshipService._exists(Friends.c.user_dni, Friends.c.friend_dni, user_dni, friend_dni),
+            memo
+        )
+
+    @staticmethod
+    def is_favourite(user_dni, favourite_dni, memo=True):
+        """Has user_dni marked favourite_dni as a favourite?"""
+        return RelationshipService._memoized(
+            ("favourite", user_dni, favourite_dni),
+            lambda: RelationshipService._exists(Favourites.c.user_dni, Favourites.c.favourite_dni, user_dni, favourite_dni),
+            memo
+        )
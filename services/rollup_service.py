@@ -0,0 +1,176 @@
+# services/rollup_service.py
+import re
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import and_, delete, func, literal, select
+from models import db
+from models.transaction_model import Transaction
+from models.enums import RequestStatusEnum
+from models.rollup_model import MonthlyRollup, MonthlyCounterparty
+from models.errors.custom_exception_model import CustomException
+
+MONTH_FORMAT = "%Y-%m"
+MONTH_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+ROLLUP_COLUMNS = ("sent_amount", "sent_count", "received_amount", "received_count")
+STATS_DEFAULT_MONTHS = 12
+TOP_COUNTERPARTIES_DEFAULT = 5
+TOP_COUNTERPARTIES_MAX = 20
+REBUILD_CHUNK_SIZE = 50000
+
+
+def _dialect_insert(table, dialect_name):
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.mysql import insert
+    return insert(table)
+
+
+def _add_on_conflict(statement, table, dialect_name):
+    """Turn an INSERT into an upsert that adds the new amounts and counts to the existing row"""
+    if dialect_name == "sqlite":
+        return statement.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={name: table.c[name] + statement.excluded[name] for name in ROLLUP_COLUMNS}
+        )
+    return statement.on_duplicate_key_update({name: table.c[name] + statement.inserted[name] for name in ROLLUP_COLUMNS})
+
+
+def _upsert(table, dialect_name):
+    return _add_on_conflict(_dialect_insert(table, dialect_name), table, dialect_name)
+
+
+def _month_of(column, dialect_name):
+    if dialect_name == "sqlite":
+        return func.strftime(MONTH_FORMAT, column)
+    return func.date_format(column, MONTH_FORMAT)
+
+
+def _shift_month(month, months):
+    year, number = map(int, month.split("-"))
+    index = year * 12 + number - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class RollupService:
+    """Monthly sent/received totals per user and per counterparty, kept up to date by TransferService."""
+
+    @staticmethod
+    def record(transfers):
+        """Add COMPLETED transfers, given as (sender_dni, receiver_dni, amount, date), to their months' rollups.
+
+        Runs in the caller's transaction so the rollups commit (or roll back) with the transfer itself.
+        """
+        rollups = defaultdict(lambda: [0, 0, 0, 0])
+        counterparties = defaultdict(lambda: [0, 0, 0, 0])
+        for sender_dni, receiver_dni, amount, date in transfers:
+            month = date.strftime(MONTH_FORMAT)
+            for totals in (rollups[(sender_dni, month)], counterparties[(sender_dni, month, receiver_dni)]):
+                totals[0] += amount
+                totals[1] += 1
+            for totals in (rollups[(receiver_dni, month)], counterparties[(receiver_dni, month, sender_dni)]):
+                totals[2] += amount
+                totals[3] += 1
+        if not rollups:
+            return
+
+        dialect_name = db.session.get_bind().dialect.name
+        # Always in key order, so concurrent transfers lock the rows in the same order
+        db.session.execute(_upsert(MonthlyRollup.__table__, dialect_name), [
+            {"user_dni": user_dni, "month": month, **dict(zip(ROLLUP_COLUMNS, totals))}
+            for (user_dni, month), totals in sorted(rollups.items())
+        ])
+        db.session.execute(_upsert(MonthlyCounterparty.__table__, dialect_name), [
+            {"user_dni": user_dni, "month": month, "counterparty_dni": counterparty_dni, **dict(zip(ROLLUP_COLUMNS, totals))}
+            for (user_dni, month, counterparty_dni), totals in sorted(counterparties.items())
+        ])
+
+    @staticmethod
+    def parse_month(value, name):
+        if not MONTH_PATTERN.match(value or ""):
+            raise CustomException(f"{name} must be a month in YYYY-MM format", 400)
+        return value
+
+    @staticmethod
+    def get_stats(dni, first_month=None, last_month=None, top=TOP_COUNTERPARTIES_DEFAULT):
+        """Rollups of the months in [first_month, last_month] (the last 12 by default), newest first,
+        each with its `top` counterparties by amount moved."""
+        last_month = last_month or datetime.utcnow().strftime(MONTH_FORMAT)
+        first_month = first_month or _shift_month(last_month, 1 - STATS_DEFAULT_MONTHS)
+        if first_month > last_month:
+            raise CustomException("from must not be after to", 400)
+
+        rollups = (
+            MonthlyRollup.query
+            .filter(MonthlyRollup.user_dni == dni, MonthlyRollup.month.between(first_month, last_month))
+            .order_by(MonthlyRollup.month.desc())
+            .all()
+        )
+        if not rollups:
+            return []
+
+        # Top counterparties of every month in one query: rank them per month with a window function
+        counterparty = MonthlyCounterparty
+        ranked = select(
+            counterparty.month, counterparty.counterparty_dni,
+            counterparty.sent_amount, counterparty.sent_count,
+            counterparty.received_amount, counterparty.received_count,
+            func.row_number().over(
+                partition_by=counterparty.month,
+                order_by=((counterparty.sent_amount + counterparty.received_amount).desc(), counterparty.counterparty_dni)
+            ).label("rank")
+        ).where(
+            counterparty.user_dni == dni,
+            counterparty.month.between(first_month, last_month)
+        ).subquery()
+        top_by_month = defaultdict(list)
+        for row in db.session.execute(select(ranked).where(ranked.c.rank <= top).order_by(ranked.c.month, ranked.c.rank)):
+            top_by_month[row.month].append({
+                "dni": row.counterparty_dni,
+                "sent": float(row.sent_amount),
+                "sent_count": row.sent_count,
+                "received": float(row.received_amount),
+                "received_count": row.received_count
+            })
+
+        return [{**rollup.to_json(), "top_counterparties": top_by_month[rollup.month]} for rollup in rollups]
+
+    @staticmethod
+    def rebuild(engine=None, chunk_size=REBUILD_CHUNK_SIZE, progress=None):
+        """Recompute every rollup from the COMPLETED transactions, `chunk_size` transaction ids per commit.
+
+        Transactions created while it runs are counted once: the rollups are emptied and the last existing id is
+        read in the same write transaction, and newer ones are recorded by TransferService as usual. Old requests
+        paid while it runs can be counted twice, so run it while payments are paused (e.g. right after deploying).
+        `progress(done_id, last_id)` is called after each chunk. Returns the last transaction id included.
+        """
+        engine = engine or db.engine
+        dialect_name = engine.dialect.name
+        with engine.begin() as connection:
+            connection.execute(delete(MonthlyCounterparty))
+            connection.execute(delete(MonthlyRollup))
+            last_id = connection.execute(select(func.max(Transaction.id))).scalar() or 0
+
+        month = _month_of(Transaction.date, dialect_name).label("month")
+        zero = literal(0)
+        for low in range(0, last_id, chunk_size):
+            high = min(low + chunk_size, last_id)
+            in_chunk = and_(Transaction.id > low, Transaction.id <= high, Transaction.status == RequestStatusEnum.COMPLETED)
+            total, count = func.sum(Transaction.amount), func.count()
+            sides = (
+                (Transaction.sender_dni, Transaction.receiver_dni, (total, count, zero, zero)),
+                (Transaction.receiver_dni, Transaction.sender_dni, (zero, zero, total, count)),
+            )
+            with engine.begin() as connection:
+                for user_column, counterparty_column, values in sides:
+                    for table, keys in (
+                        (MonthlyRollup.__table__, (user_column, month)),
+                        (MonthlyCounterparty.__table__, (user_column, month, counterparty_column)),
+                    ):
+                        aggregate = select(*keys, *values).where(in_chunk).group_by(*keys)
+                        columns = [column.name for column in table.primary_key] + list(ROLLUP_COLUMNS)
+                        statement = _dialect_insert(table, dialect_name).from_select(columns, aggregate)
+                        connection.execute(_add_on_conflict(statement, table, dialect_name))
+            if progress:
+                progress(high, last_id)
+        return last_id
@@ -1,10 +1,99 @@
 from models.transaction_model import Transaction
 from models.enums import RequestStatusEnum
+from models.errors.custom_exception_model import CustomException
 from models import db
 from datetime import datetime
+from sqlalchemy import or_, select, union_all
+import base64
+import json
+
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 500
+HISTORY_STREAM_BATCH_SIZE = 500
 
 class TransactionService:
     
+    @staticmethod
+    def encode_cursor(transaction):
+        """Build an opaque keyset cursor pointing right after the given transaction."""
+        raw = json.dumps([transaction.date.isoformat(), transaction.id]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a cursor produced by encode_cursor into a (date, id) tuple."""
+        try:
+            date, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return datetime.fromisoformat(date), int(transaction_id)
+        except Exception:
+            raise CustomException("Invalid cursor", 400)
+
+    @staticmethod
+    def history_query(dni, after=None, limit=None):
+        """COMPLETED transactions sent or received by a user, newest first, keyed on (date, id).
+
+        A UNION ALL of two range scans, one on each (side, status, date) index (the id rides along as the row
+        key), each starting right after `after` (a (date, id) tuple) and stopping at `limit` rows. A page reads
+        at most 2 * limit index entries and sorts only those, instead of an OR over both indexes that sorts the
+        user's whole remaining history.
+        """
+        def side(column, *extra):
+            query = db.session.query(Transaction.id, Transaction.date).filter(
+                column == dni,
+                Transaction.status == RequestStatusEnum.COMPLETED,
+                *extra
+            )
+            if after:
+                date, transaction_id = after
+                # date <= :date bounds the index range; the OR only trims the rows that share that date
+                query = query.filter(
+                    Transaction.date <= date,
+                    or_(Transaction.date < date, Transaction.id < transaction_id)
+                )
+            query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
+            if limit is not None:
+                query = query.limit(limit)
+            return select(query.subquery())
+
+        # A transfer to oneself is only read from the sender side
+        page = union_all(
+            side(Transaction.sender_dni),
+            side(Transaction.receiver_dni, Transaction.sender_dni != dni)
+        ).subquery()
+        query = (
+            Transaction.query
+            .join(page, Transaction.id == page.c.id)
+            .order_by(page.c.date.desc(), page.c.id.desc())
+        )
+        return query.limit(limit) if limit is not None else query
+
+    @staticmethod
+    def pending_requests_query(dni):
+        """PENDING transaction requests the user has been asked to pay."""
+        return Transaction.query.filter(
+            Transaction.sender_dni == dni,
+            Transaction.status == RequestStatusEnum.PENDING
+        )
+
+    @staticmethod
+    def get_history_page(dni, cursor=None, limit=HISTORY_DEFAULT_LIMIT):
+        """Return one page of the user's history and the cursor of the next page (or None)."""
+        after = TransactionService.decode_cursor(cursor) if cursor else None
+        rows = TransactionService.history_query(dni, after, limit + 1).all()
+        next_cursor = TransactionService.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    @staticmethod
+    def iter_history_batches(dni, batch_size=HISTORY_STREAM_BATCH_SIZE):
+        """Iterate over the whole history in lists of at most batch_size rows, one keyset page per batch."""
+        after = None
+        while True:
+            batch = TransactionService.history_query(dni, after, batch_size).all()
+            if not batch:
+                return
+            after = batch[-1].date, batch[-1].id
+            yield batch
+    
     @staticmethod
     def create_transaction(transaction):
         """Get a single credit card by its number."""
@@ -27,17 +116,6 @@ class TransactionService:
             db.session.rollback()
             raise e
         
-    @staticmethod
-    def accept_transaction_request(transaction_request):
-        """Accept a transaction request."""
-        try:
-            transaction_request.status = RequestStatusEnum.COMPLETED
-            transaction_request.responded_at = datetime.utcnow()
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            raise e
-        
     @staticmethod
     def reject_transaction_request(transaction_request):
         """Accept a transaction request."""
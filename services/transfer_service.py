@@ -0,0 +1,235 @@
+# services/transfer_service.py
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import bindparam, update
+from models import db
+from models.user_model import User
+from models.transaction_model import Transaction
+from models.enums import RequestStatusEnum, TransactionTypeEnum, LedgerEntryKindEnum
+from models.errors.custom_exception_model import CustomException
+from models.ledger_model import CARD_ACCOUNT
+from services.ledger_service import LedgerService
+from services.rollup_service import RollupService
+from services.user_service import UserService
+
+MAX_BATCH_TRANSFERS = 100
+
+
+def _parse_amount(value):
+    """Whole amount from a JSON number or numeric string, or None if it is not a whole number (never truncated)."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        amount = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+    if not amount.is_finite() or amount != amount.to_integral_value():
+        return None
+    return int(amount)
+
+
+class TransferService:
+    """Move money between users: every operation is one database transaction with a single commit.
+
+    Each movement updates the cached User.amount, appends its double entry to the ledger and adds the
+    transaction to the monthly rollups in that commit.
+    """
+
+    @staticmethod
+    def _validate_amount(amount):
+        if amount is None or amount <= 0:
+            raise CustomException("Amount must be greater than zero", 400)
+
+    @staticmethod
+    def _debit(dni, amount):
+        """Conditional debit: only succeeds if the user still has enough funds when the row is written."""
+        result = db.session.execute(
+            update(User)
+            .where(User.dni == dni, User.amount >= amount)
+            .values(amount=User.amount - amount)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise CustomException("Insufficient funds", 400)
+
+    @staticmethod
+    def _credit(dni, amount):
+        result = db.session.execute(
+            update(User)
+            .where(User.dni == dni)
+            .values(amount=User.amount + amount)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise CustomException("Receiver not found", 400)
+
+    @staticmethod
+    def transfer(sender_dni, receiver_dni, amount, message, credit_card_number):
+        """Send money and record the COMPLETED transaction atomically."""
+        TransferService._validate_amount(amount)
+        try:
+            TransferService._debit(sender_dni, amount)
+            TransferService._credit(receiver_dni, amount)
+            transaction = Transaction(
+                amount=amount,
+                transaction_type=TransactionTypeEnum.SENT,
+                message=message,
+                sender_dni=sender_dni,
+                receiver_dni=receiver_dni,
+                credit_card_number=credit_card_number,
+                status=RequestStatusEnum.COMPLETED
+            )
+            db.session.add(transaction)
+            db.session.flush()
+            LedgerService.record(LedgerService.posting(
+                sender_dni, receiver_dni, amount, LedgerEntryKindEnum.TRANSFER, transaction.id, transaction.date
+            ))
+            RollupService.record([(sender_dni, receiver_dni, amount, transaction.date)])
+            db.session.commit()
+            return transaction
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def batch_transfer(sender_dni, credit_card_number, items):
+        """Send money to many receivers from the same sender and card with a single commit.
+
+        Items that are not valid (not an object, missing receiver or message, unknown receiver, amount that is
+        not a positive whole number) are reported as FAILED and skipped; the rest are paid together. The batch
+        is rejected as a whole if the total of the valid items exceeds the sender's balance. Returns one result
+        per item, in the same order.
+        """
+        if not items:
+            raise CustomException("At least one transfer is required", 400)
+        if len(items) > MAX_BATCH_TRANSFERS:
+            raise CustomException(f"A batch can contain at most {MAX_BATCH_TRANSFERS} transfers", 400)
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {"index": index, "status": "FAILED", "error": "Each transfer must be an object"}
+                continue
+            receiver_dni = item.get("receiver_dni")
+            amount = _parse_amount(item.get("amount"))
+            if not receiver_dni:
+                results[index] = {"index": index, "status": "FAILED", "error": "Receiver is required"}
+            elif receiver_dni == sender_dni:
+                results[index] = {"index": index, "status": "FAILED", "error": "Cannot send money to yourself"}
+            elif amount is None:
+                results[index] = {"index": index, "status": "FAILED", "error": "Amount must be an integer"}
+            elif amount <= 0:
+                results[index] = {"index": index, "status": "FAILED", "error": "Amount must be greater than zero"}
+            elif not item.get("message"):
+                results[index] = {"index": index, "status": "FAILED", "error": "Message is required"}
+            else:
+                valid.append((index, receiver_dni, amount, item.get("message")))
+
+        # Load every receiver (and the sender) with a single IN query; the entities are reused to serialize the results
+        users = UserService.get_users_by_dnis({receiver_dni for _, receiver_dni, _, _ in valid} | {sender_dni}) if valid else {}
+        transfers = []
+        for index, receiver_dni, amount, message in valid:
+            if receiver_dni in users:
+                transfers.append((index, receiver_dni, amount, message))
+            else:
+                results[index] = {"index": index, "status": "FAILED", "error": "Receiver not found"}
+
+        if not transfers:
+            return results
+
+        try:
+            TransferService._debit(sender_dni, sum(amount for _, _, amount, _ in transfers))
+
+            credits = defaultdict(int)
+            for _, receiver_dni, amount, _ in transfers:
+                credits[receiver_dni] += amount
+            user_table = User.__table__
+            db.session.execute(
+                user_table.update()
+                .where(user_table.c.dni == bindparam("receiver_dni"))
+                .values(amount=user_table.c.amount + bindparam("credit")),
+                [{"receiver_dni": dni, "credit": credit} for dni, credit in credits.items()]
+            )
+
+            created = [
+                (index, Transaction(
+                    amount=amount,
+                    transaction_type=TransactionTypeEnum.SENT,
+                    message=message,
+                    sender_dni=sender_dni,
+                    receiver_dni=receiver_dni,
+                    sender=users[sender_dni],
+                    receiver=users[receiver_dni],
+                    credit_card_number=credit_card_number,
+                    status=RequestStatusEnum.COMPLETED
+                ))
+                for index, receiver_dni, amount, message in transfers
+            ]
+            db.session.add_all([transaction for _, transaction in created])
+            db.session.flush()
+            LedgerService.record([
+                entry
+                for _, transaction in created
+                for entry in LedgerService.posting(
+                    sender_dni, transaction.receiver_dni, transaction.amount, LedgerEntryKindEnum.TRANSFER,
+                    transaction.id, transaction.date
+                )
+            ])
+            RollupService.record([
+                (sender_dni, transaction.receiver_dni, transaction.amount, transaction.date) for _, transaction in created
+            ])
+
+            # Serialize before the commit expires the new rows; sender and receiver come from the IN query above,
+            # so this costs no extra queries
+            for index, transaction in created:
+                results[index] = {"index": index, "status": "COMPLETED", "transaction": transaction.to_json()}
+            db.session.commit()
+            return results
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def complete_request(transaction_request, credit_card_number):
+        """Pay a PENDING transaction request atomically. The status guard stops it from being paid twice."""
+        TransferService._validate_amount(transaction_request.amount)
+        try:
+            result = db.session.execute(
+                update(Transaction)
+                .where(Transaction.id == transaction_request.id, Transaction.status == RequestStatusEnum.PENDING)
+                .values(status=RequestStatusEnum.COMPLETED, credit_card_number=credit_card_number)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                raise CustomException("Request is no longer pending", 400)
+
+            TransferService._debit(transaction_request.sender_dni, transaction_request.amount)
+            TransferService._credit(transaction_request.receiver_dni, transaction_request.amount)
+            LedgerService.record(LedgerService.posting(
+                transaction_request.sender_dni, transaction_request.receiver_dni, transaction_request.amount,
+                LedgerEntryKindEnum.TRANSFER, transaction_request.id
+            ))
+            RollupService.record([(
+                transaction_request.sender_dni, transaction_request.receiver_dni, transaction_request.amount,
+                transaction_request.date
+            )])
+            db.session.commit()
+            return transaction_request
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def charge_funds(dni, amount):
+        """Add funds charged to a card to the user's balance."""
+        TransferService._validate_amount(amount)
+        try:
+            TransferService._credit(dni, amount)
+            LedgerService.record(LedgerService.posting(CARD_ACCOUNT, dni, amount, LedgerEntryKindEnum.CHARGE))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
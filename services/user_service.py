@@ -1,14 +1,117 @@
 # user_service.py
 from models import db
-from models.user_relations import Friends
+from models.user_relations import Friends, Blocked, Favourites
+from models.user_search_model import users_fts
 from models.user_model import User
 from models.friendship_request_model import FriendshipRequest, RequestStatusEnum   
 from datetime import datetime
+import base64
+import json
 from werkzeug.security import generate_password_hash, check_password_hash  # For password hashing
-from sqlalchemy import text
+from sqlalchemy import exists, or_, text
+from sqlalchemy.orm import selectinload
+from models.errors.custom_exception_model import CustomException
+from models.enums import LedgerEntryKindEnum
+from models.ledger_model import OPENING_ACCOUNT
+from services.ledger_service import LedgerService
+from services.relationship_service import RelationshipService
+from services.friend_suggestion_service import FriendSuggestionService
+
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+LIST_STREAM_BATCH_SIZE = 500
+SEARCH_MIN_LENGTH = 3  # The trigram index cannot match shorter strings
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+FRIENDSHIP_BULK_MAX = 500
+
+# Scalar keys of User.to_json(); relationship keys are in User.RELATIONSHIP_FIELDS
+USER_SCALAR_FIELDS = (
+    "dni", "name", "email", "birth_date", "active", "image", "amount",
+    "administrator", "address", "phone", "created_at", "updated_at"
+)
 
 class UserService:
     
+    @staticmethod
+    def requested_fields(args):
+        """Parse ?fields= (keys to return) and ?include= (relationships added to the scalar keys).
+
+        Returns None when neither is given, meaning the full payload.
+        """
+        def parse(name):
+            value = args.get(name)
+            return {field.strip() for field in value.split(",") if field.strip()} if value is not None else None
+
+        fields, include = parse("fields"), parse("include")
+        if fields is None and include is None:
+            return None
+
+        unknown = (include or set()) - set(User.RELATIONSHIP_FIELDS)
+        unknown |= (fields or set()) - set(USER_SCALAR_FIELDS) - set(User.RELATIONSHIP_FIELDS)
+        if unknown:
+            raise CustomException(f"Unknown user fields: {', '.join(sorted(unknown))}", 400)
+
+        return (fields if fields is not None else set(USER_SCALAR_FIELDS)) | (include or set())
+
+    @staticmethod
+    def relationship_load_options(fields):
+        """selectinload options for the relationships needed to serialize several users with these fields.
+        Related users are only summarized (to_summary_json), so only those columns are read for them."""
+        options = []
+        for name in User.RELATIONSHIP_FIELDS:
+            if fields is None or name in fields:
+                option = selectinload(getattr(User, name))
+                if name != "credit_cards":
+                    option = option.load_only(User.dni, User.name, User.image)
+                options.append(option)
+        return options
+
+    @staticmethod
+    def encode_cursor(user):
+        """Opaque keyset cursor pointing right after the given user (users are listed by DNI)."""
+        return base64.urlsafe_b64encode(json.dumps([user.dni]).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            (dni,) = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return str(dni)
+        except Exception:
+            raise CustomException("Invalid cursor", 400)
+
+    @staticmethod
+    def list_query(fields, after_dni=None):
+        """Every user in DNI order, with the relationships needed by these fields eagerly loaded."""
+        query = User.query.options(*UserService.relationship_load_options(fields))
+        if after_dni is not None:
+            query = query.filter(User.dni > after_dni)
+        return query.order_by(User.dni)
+
+    @staticmethod
+    def get_users_page(fields, cursor=None, limit=LIST_DEFAULT_LIMIT):
+        """One page of list_query() and the cursor of the next page (or None)."""
+        after_dni = UserService.decode_cursor(cursor) if cursor else None
+        rows = UserService.list_query(fields, after_dni).limit(limit + 1).all()
+        next_cursor = UserService.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    @staticmethod
+    def iter_user_batches(fields, batch_size=LIST_STREAM_BATCH_SIZE):
+        """Iterate over every user in lists of at most batch_size, walking the DNI index like get_users_page.
+
+        Each batch costs one query plus one selectin query per relationship. Read-only: once the caller asks for
+        the next batch the session is emptied (expunge_all), so memory stays bounded whatever the number of users.
+        """
+        after_dni = None
+        while True:
+            batch = UserService.list_query(fields, after_dni).limit(batch_size).all()
+            if not batch:
+                return
+            after_dni = batch[-1].dni
+            yield batch
+            db.session.expunge_all()
+
     @staticmethod
     def create_user(dni, name, email, pwd, birth_date, image, phone, address, amount=0.0, administrator=False):
         """Create a new user"""
@@ -27,6 +130,9 @@ class UserService:
                 address=address
             )
             db.session.add(new_user)
+            if amount:
+                # El saldo inicial también queda en el libro mayor, para que cuadre con User.amount
+                LedgerService.record(LedgerService.posting(OPENING_ACCOUNT, dni, amount, LedgerEntryKindEnum.OPENING))
             db.session.commit()
             return new_user
         except Exception as e:
@@ -52,76 +158,160 @@ class UserService:
             raise e
         
     @staticmethod
-    def accept_friendship_request(current_user_dni, request_id):
-        """ Accept the friendship request and create mutual friendships """
-        try:
-            # Find the friendship request by its ID
-            friendship_request = FriendshipRequest.query.get(request_id)
-            if not friendship_request:
-                return False, "Friendship request not found"
+    def pending_friendship_requests_query(receiver_dni):
+        """Pending friendship requests received by a user"""
+        return FriendshipRequest.query.filter(
+            FriendshipRequest.receiver_dni == receiver_dni,
+            FriendshipRequest.status == RequestStatusEnum.PENDING
+        )
+        
+    @staticmethod
+    def respond_friendship_requests(current_user_dni, request_ids, accept):
+        """Accept (creating the mutual friendships) or reject several pending requests addressed to the
+        current user, all or nothing, in a single commit. Returns the sender DNIs.
 
-            # Ensure the current user is the receiver of the request
-            if friendship_request.receiver_dni != current_user_dni:
-                return False, "You cannot accept this request"
+        One query checks every request, one UPDATE ... WHERE id IN changes their status and, when accepting,
+        one executemany inserts both directions of every friendship.
+        """
+        request_ids = sorted(set(request_ids))
+        if not request_ids:
+            raise CustomException("At least one friendship request id is required", 400)
+        if len(request_ids) > FRIENDSHIP_BULK_MAX:
+            raise CustomException(f"At most {FRIENDSHIP_BULK_MAX} friendship requests at once", 400)
 
-            # Update the status of the request to 'ACCEPTED'
-            friendship_request.status = RequestStatusEnum.ACCEPTED
-            db.session.commit()
+        requests = db.session.query(
+            FriendshipRequest.id, FriendshipRequest.sender_dni, FriendshipRequest.receiver_dni, FriendshipRequest.status
+        ).filter(FriendshipRequest.id.in_(request_ids)).all()
+        found = {row.id: row for row in requests}
+        verb = "accept" if accept else "reject"
+        problems = (
+            ("Friendship request not found", [i for i in request_ids if i not in found]),
+            (f"You cannot {verb} this request", [i for i in found if found[i].receiver_dni != current_user_dni]),
+            ("Friendship request is not pending", [
+                i for i in found if found[i].receiver_dni == current_user_dni and found[i].status != RequestStatusEnum.PENDING
+            ]),
+        )
+        for message, ids in problems:
+            if ids:
+                raise CustomException(message if len(request_ids) == 1 else f"{message}: {ids}", 400)
 
-            # Create mutual friendships using the 'Friends' association table
-            friendship_1 = Friends.insert().values(user_dni=friendship_request.sender_dni, friend_dni=friendship_request.receiver_dni)
-            friendship_2 = Friends.insert().values(user_dni=friendship_request.receiver_dni, friend_dni=friendship_request.sender_dni)
+        try:
+            updated = db.session.execute(
+                FriendshipRequest.__table__.update()
+                .where(FriendshipRequest.id.in_(request_ids), FriendshipRequest.status == RequestStatusEnum.PENDING)
+                .values(status=RequestStatusEnum.ACCEPTED if accept else RequestStatusEnum.REJECTED, responded_at=datetime.utcnow())
+            ).rowcount
+            if updated != len(request_ids):  # Another request answered some of them meanwhile
+                raise CustomException("Friendship requests changed while answering them, try again", 409)
 
-            db.session.execute(friendship_1)
-            db.session.execute(friendship_2)
+            senders = sorted({row.sender_dni for row in requests})
+            if accept:
+                # Pairs that are already friends (e.g. both sent a request) are skipped instead of failing
+                db.session.execute(
+                    Friends.insert().prefix_with("OR IGNORE", dialect="sqlite").prefix_with("IGNORE", dialect="mysql"),
+                    [
+                        row
+                        for sender_dni in senders
+                        for row in (
+                            {"user_dni": sender_dni, "friend_dni": current_user_dni},
+                            {"user_dni": current_user_dni, "friend_dni": sender_dni}
+                        )
+                    ]
+                )
+                FriendSuggestionService.refresh_users([current_user_dni, *senders])
             db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if accept:
+            RelationshipService.forget()
+        return senders
 
+    @staticmethod
+    def accept_friendship_request(current_user_dni, request_id):
+        """ Accept the friendship request and create mutual friendships """
+        try:
+            UserService.respond_friendship_requests(current_user_dni, [request_id], accept=True)
             return True, "Friendship request accepted, users are now friends."
-        
         except Exception as e:
             # Handle any exception that occurs and return an error message
-            db.session.rollback()
             return False, str(e)
         
     @staticmethod
     def reject_friendship_request(current_user_dni, request_id):
         """ Reject a friendship request """
         try:
-            # Find the friendship request by its ID
-            friendship_request = FriendshipRequest.query.get(request_id)
-            if not friendship_request:
-                return False, "Friendship request not found"
-
-            # Ensure the current user is the receiver of the request
-            if friendship_request.receiver_dni != current_user_dni:
-                return False, "You cannot reject this request"
-
-            # Update the status of the request to 'REJECTED'
-            friendship_request.status = RequestStatusEnum.REJECTED
-            db.session.commit()
-
+            UserService.respond_friendship_requests(current_user_dni, [request_id], accept=False)
             return True, "Friendship request rejected."
-
         except Exception as e:
             # Handle any exception that occurs and return an error message
-            db.session.rollback()
             return False, str(e)
         
     @staticmethod
     def remove_friendship(user_dni: str, friend_dni: str):
+        """Remove the friendship in both directions, and the suggestions it gave, in one commit"""
         db.session.execute(
             Friends.delete().where(
-                (Friends.c.user_dni == user_dni) &
-                (Friends.c.friend_dni == friend_dni)
+                ((Friends.c.user_dni == user_dni) & (Friends.c.friend_dni == friend_dni)) |
+                ((Friends.c.user_dni == friend_dni) & (Friends.c.friend_dni == user_dni))
             )
         )
+        FriendSuggestionService.refresh_users([user_dni, friend_dni])
         db.session.commit()
+        RelationshipService.forget()
 
     @staticmethod
     def get_user_by_dni(dni):
         """Get a user by DNI"""
         return User.query.filter_by(dni=dni).first()
     
+    @staticmethod
+    def get_principal(dni):
+        """Load the authenticated user by primary key, without touching any relationship"""
+        return db.session.get(User, dni)
+    
+    @staticmethod
+    def get_users_by_dnis(dnis):
+        """Load several users with a single IN query, returned as a dict keyed by DNI"""
+        dnis = set(dnis)
+        if not dnis:
+            return {}
+        return {user.dni: user for user in User.query.filter(User.dni.in_(dnis)).all()}
+    
+    @staticmethod
+    def search_query(current_dni, query):
+        """Active users whose name, email or phone contains `query`, excluding the current user and users blocked
+        in either direction."""
+        query = (query or "").strip()
+        if len(query) < SEARCH_MIN_LENGTH:
+            raise CustomException(f"q must have at least {SEARCH_MIN_LENGTH} characters", 400)
+
+        blocked_by_me = exists().where(Blocked.c.user_dni == current_dni, Blocked.c.blocked_dni == User.dni)
+        blocked_me = exists().where(Blocked.c.user_dni == User.dni, Blocked.c.blocked_dni == current_dni)
+        users = User.query.filter(User.active == True, User.dni != current_dni, ~blocked_by_me, ~blocked_me)
+
+        if db.session.get_bind().dialect.name == "sqlite":
+            # Trigram FTS5 index: substring match (prefixes included) on the three columns, in index order
+            phrase = '"' + query.replace('"', '""') + '"'
+            return (
+                users.join(users_fts, users_fts.c.dni == User.dni)
+                .filter(text("users_fts MATCH :match").bindparams(match="{name email phone} : " + phrase))
+                .order_by(users_fts.c.rowid)
+            )
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return users.filter(or_(
+            User.name.ilike(pattern, escape="\\"),
+            User.email.ilike(pattern, escape="\\"),
+            User.phone.ilike(pattern, escape="\\")
+        )).order_by(User.dni)
+
+    @staticmethod
+    def search_users(current_dni, query, limit=SEARCH_DEFAULT_LIMIT, offset=0):
+        """One page of search_query() and the offset of the next page (or None)."""
+        rows = UserService.search_query(current_dni, query).offset(offset).limit(limit + 1).all()
+        next_offset = offset + limit if len(rows) > limit else None
+        return rows[:limit], next_offset
+
     @staticmethod
     def get_user_by_email(email):
         """Check if the given password matches the stored hash"""
@@ -130,8 +320,8 @@ class UserService:
 
 
     @staticmethod
-    def update_user(dni,name=None, phone=None, address=None,  birth_date=None, image=None, amount=None):
-        """Update a user"""
+    def update_user(dni,name=None, phone=None, address=None,  birth_date=None, image=None):
+        """Update a user. The balance is not editable: it only changes through TransferService (and the ledger)"""
         user = User.query.filter_by(dni=dni).first()
         if user:
             if name:
@@ -144,10 +334,6 @@ class UserService:
                 user.phone = phone
             if address is not None:
                 user.address = address
-            if amount is not None:
-                user.amount = amount
-                
-            print(user.name)
             db.session.flush()
             db.session.commit()
             return user
@@ -162,7 +348,6 @@ class UserService:
             if image:
                 user.image = image
                 
-            print(user.name)
             db.session.flush()
             db.session.commit()
             return user
@@ -211,9 +396,10 @@ class UserService:
         user = User.query.filter_by(dni=user_dni).first()
         favourite = User.query.filter_by(dni=favourite_dni).first()
         
-        if user and favourite:
-            user.favourite_users.append(favourite)
+        if user and favourite and not RelationshipService.is_favourite(user_dni, favourite_dni):
+            db.session.execute(Favourites.insert().values(user_dni=user_dni, favourite_dni=favourite_dni))
             db.session.commit()
+            RelationshipService.forget()
             return True
         return False
     
@@ -223,9 +409,12 @@ class UserService:
         user = User.query.filter_by(dni=user_dni).first()
         favourite = User.query.filter_by(dni=favourite_dni).first()
         
-        if user and favourite and favourite in user.favourite_users:
-            user.favourite_users.remove(favourite)
+        if user and favourite and RelationshipService.is_favourite(user_dni, favourite_dni):
+            db.session.execute(Favourites.delete().where(
+                (Favourites.c.user_dni == user_dni) & (Favourites.c.favourite_dni == favourite_dni)
+            ))
             db.session.commit()
+            RelationshipService.forget()
             return True
         return False
     
@@ -236,9 +425,10 @@ class UserService:
         user = User.query.filter_by(dni=user_dni).first()
         blocked_user = User.query.filter_by(dni=blocked_dni).first()
         
-        if user and blocked_user and blocked_user not in user.blocked_users:
-            user.blocked_users.append(blocked_user)
+        if user and blocked_user and not RelationshipService.has_blocked(user_dni, blocked_dni):
+            db.session.execute(Blocked.insert().values(user_dni=user_dni, blocked_dni=blocked_dni))
             db.session.commit()
+            RelationshipService.forget()
             return True
         return False
 
@@ -248,9 +438,12 @@ class UserService:
         user = User.query.filter_by(dni=user_dni).first()
         blocked_user = User.query.filter_by(dni=blocked_dni).first()
         
-        if user and blocked_user and blocked_user in user.blocked_users:
-            user.blocked_users.remove(blocked_user)
+        if user and blocked_user and RelationshipService.has_blocked(user_dni, blocked_dni):
+            db.session.execute(Blocked.delete().where(
+                (Blocked.c.user_dni == user_dni) & (Blocked.c.blocked_dni == blocked_dni)
+            ))
             db.session.commit()
+            RelationshipService.forget()
             return True
         return False
 
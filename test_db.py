@@ -1,14 +1,13 @@
-from app import create_app, db
-
-app = create_app()
+from sqlalchemy import text
+from app import app, db
 
 with app.app_context():
     try:
-        db.session.execute('SELECT 1')
-        print("✅ Conexión a MySQL exitosa")
+        db.session.execute(text('SELECT 1'))
+        print(f"✅ Conexión a {db.engine.dialect.name} exitosa")
     except Exception as e:
         print(f"❌ Error de conexión: {e}")
 
 # Para ejecutar este script, ejecutar el siguiente comando:
 #✅ Conexión a MySQL exitosa
-#python test_db.py
\ No newline at end of file
+#python test_db.py
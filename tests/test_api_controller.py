@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.mark.parametrize("api_key", [123, ["key"], {"key": 1}, ""])
+def test_payment_request_rejects_malformed_api_keys(app, api_key):
+    response = app.test_client().post(
+        "/api/payments/request",
+        json={"api_key": api_key, "sender_dni": "10000000A", "amount": 10, "message": "m"},
+        headers={"Idempotency-Key": "retry-1"},
+    )
+
+    assert response.status_code == 400
+    assert "non-empty string" in response.get_json()["message"]
+
+
+def test_payment_request_without_api_key_is_unauthorized(app):
+    response = app.test_client().post(
+        "/api/payments/request",
+        json={"sender_dni": "10000000A", "amount": 10, "message": "m"},
+        headers={"Idempotency-Key": "retry-1"},
+    )
+
+    assert response.status_code == 401
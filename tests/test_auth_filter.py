@@ -0,0 +1,27 @@
+import os
+import time
+from jwt import encode
+from configuration.auth_filter import TOKEN_CACHE_TTL, token_cache, token_digest, validate_jwt_token
+
+
+def _token(claims):
+    return encode(payload=claims, key=os.environ["SECRET_KEY"], algorithm="HS256")
+
+
+def test_tokens_are_cached_until_their_exp(app):
+    exp = int(time.time()) + 3600
+    token = _token({"dni": "A", "exp": exp})
+
+    assert validate_jwt_token(token, output=True)["dni"] == "A"
+    assert token_cache._entries[token_digest(token)][0] == exp
+
+
+def test_tokens_without_exp_expire_after_the_default_ttl(app):
+    token = _token({"dni": "A"})
+
+    before = time.time()
+    assert validate_jwt_token(token, output=True)["dni"] == "A"
+    expires_at = token_cache._entries[token_digest(token)][0]
+
+    assert expires_at is not None
+    assert before < expires_at <= time.time() + TOKEN_CACHE_TTL
@@ -0,0 +1,79 @@
+import pytest
+from models import db
+from models.user_relations import Friends
+from models.friendship_request_model import FriendshipRequest
+from models.friend_suggestion_model import FriendSuggestion
+from services.friend_suggestion_service import FriendSuggestionService
+from services.user_service import UserService
+
+
+def _befriend(*pairs):
+    db.session.execute(Friends.insert(), [
+        row for a, b in pairs for row in ({"user_dni": a, "friend_dni": b}, {"user_dni": b, "friend_dni": a})
+    ])
+    db.session.commit()
+
+
+def _send(sender_dni, receiver_dni):
+    request = FriendshipRequest(sender_dni=sender_dni, receiver_dni=receiver_dni)
+    db.session.add(request)
+    db.session.commit()
+    return request.id
+
+
+def _suggestions():
+    columns = FriendSuggestion.__table__.columns
+    return sorted(tuple(row) for row in db.session.execute(db.select(*columns)))
+
+
+def _full_refresh():
+    db.session.commit()
+    FriendSuggestionService.refresh(chunk_size=2)
+    return _suggestions()
+
+
+@pytest.fixture
+def users(make_user):
+    return [make_user(dni) for dni in ("A", "B", "C", "D", "E", "F")]
+
+
+def test_refresh_counts_mutual_friends(users):
+    a, b, c, d, e, _ = users
+    _befriend((a, b), (a, c), (b, d), (c, d), (d, e))
+
+    FriendSuggestionService.refresh()
+
+    assert _suggestions() == sorted([
+        (a, d, 2), (d, a, 2), (b, c, 2), (c, b, 2), (b, e, 1), (e, b, 1), (c, e, 1), (e, c, 1)
+    ])
+
+
+def test_friendship_changes_update_suggestions_like_a_full_refresh(users):
+    me, first, second, third, fourth, fifth = users
+    _befriend((first, second), (second, third), (third, fourth), (fourth, fifth))
+    FriendSuggestionService.refresh()
+
+    for sender in (first, third):
+        accepted, message = UserService.accept_friendship_request(me, _send(sender, me))
+        assert accepted, message
+        incremental = _suggestions()
+        assert incremental == _full_refresh()
+    assert (me, second, 2) in incremental  # Through the first and the third user
+
+    UserService.remove_friendship(me, third)
+    incremental = _suggestions()
+    assert incremental == _full_refresh()
+    assert (me, second, 1) in incremental
+
+
+def test_suggestions_leave_out_blocked_and_pending_users(users):
+    me, first, second, third, fourth, _ = users
+    _befriend((me, first), (first, second), (first, third), (first, fourth), (me, fourth), (fourth, second))
+    FriendSuggestionService.refresh()
+
+    assert [s["dni"] for s in FriendSuggestionService.get_suggestions(me)] == [second, third]
+    assert FriendSuggestionService.get_suggestions(me)[0]["mutual_friends"] == 2
+
+    UserService.block_user(second, me)
+    _send(me, third)
+    assert FriendSuggestionService.get_suggestions(me) == []
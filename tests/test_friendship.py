@@ -0,0 +1,92 @@
+import pytest
+from models import db
+from models.user_relations import Friends
+from models.friendship_request_model import FriendshipRequest, RequestStatusEnum
+from models.errors.custom_exception_model import CustomException
+from services.user_service import UserService
+
+
+def _befriend(*pairs):
+    db.session.execute(Friends.insert(), [
+        row for a, b in pairs for row in ({"user_dni": a, "friend_dni": b}, {"user_dni": b, "friend_dni": a})
+    ])
+    db.session.commit()
+
+
+def _send(sender_dni, receiver_dni):
+    request = FriendshipRequest(sender_dni=sender_dni, receiver_dni=receiver_dni)
+    db.session.add(request)
+    db.session.commit()
+    return request.id
+
+
+def _friendships():
+    return sorted(tuple(row) for row in db.session.execute(db.select(Friends.c.user_dni, Friends.c.friend_dni)))
+
+
+def _statuses(ids):
+    db.session.expire_all()
+    return [db.session.get(FriendshipRequest, request_id).status for request_id in ids]
+
+
+@pytest.fixture
+def users(make_user):
+    return [make_user(dni) for dni in ("A", "B", "C", "D", "E")]
+
+
+def test_bulk_accept_creates_every_friendship(users):
+    me, first, second, third, _ = users
+    _befriend((me, third))
+    ids = [_send(first, me), _send(second, me), _send(third, me)]  # Already friends with the third one
+
+    senders = UserService.respond_friendship_requests(me, ids, accept=True)
+
+    assert senders == [first, second, third]
+    assert _statuses(ids) == [RequestStatusEnum.ACCEPTED] * 3
+    assert _friendships() == sorted([
+        (me, first), (first, me), (me, second), (second, me), (me, third), (third, me)
+    ])
+
+
+def test_bulk_reject_creates_no_friendship(users):
+    me, first, second, _, _ = users
+    ids = [_send(first, me), _send(second, me)]
+
+    UserService.respond_friendship_requests(me, ids, accept=False)
+
+    assert _statuses(ids) == [RequestStatusEnum.REJECTED] * 2
+    assert _friendships() == []
+
+
+@pytest.mark.parametrize("accept", [True, False])
+def test_bulk_answer_is_all_or_nothing(users, accept):
+    me, first, second, third, fourth = users
+    mine = [_send(first, me), _send(second, me)]
+    answered = _send(fourth, me)
+    UserService.respond_friendship_requests(me, [answered], accept=False)
+    not_mine = _send(me, third)
+
+    for bad_ids in ([*mine, not_mine], [*mine, answered], [*mine, 999999]):
+        with pytest.raises(CustomException) as error:
+            UserService.respond_friendship_requests(me, bad_ids, accept)
+        assert error.value.status_code == 400
+
+    assert _statuses(mine) == [RequestStatusEnum.PENDING] * 2
+    assert _friendships() == []
+
+
+def test_single_answers_go_through_the_same_checks(users):
+    me, first, second, _, _ = users
+    request_id = _send(first, me)
+
+    assert UserService.accept_friendship_request(second, request_id)[0] is False
+    assert UserService.accept_friendship_request(me, request_id)[0] is True
+    assert UserService.reject_friendship_request(me, request_id)[0] is False  # Already answered
+    assert _statuses([request_id]) == [RequestStatusEnum.ACCEPTED]
+
+
+def test_bulk_answer_limits(users):
+    with pytest.raises(CustomException):
+        UserService.respond_friendship_requests(users[0], [], accept=True)
+    with pytest.raises(CustomException):
+        UserService.respond_friendship_requests(users[0], list(range(1, 502)), accept=True)
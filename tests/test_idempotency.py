@@ -0,0 +1,25 @@
+from flask import jsonify
+from configuration.idempotency import idempotent
+
+
+def test_replay_returns_the_stored_location_header(app):
+    calls = []
+
+    @idempotent(owner=lambda: "10000000A")
+    def submit():
+        calls.append(1)
+        return jsonify({"id": "job-1"}), 202, {"Location": "/jobs/job-1", "X-Other": "not stored"}
+
+    def send():
+        with app.test_request_context("/transactions/chargefunds", method="POST", json={"amount": 10},
+                                      headers={"Idempotency-Key": "retry-1"}):
+            return submit()
+
+    first, replay = send(), send()
+
+    assert calls == [1]
+    assert replay.status_code == first.status_code == 202
+    assert replay.get_json() == {"id": "job-1"}
+    assert replay.headers["Location"] == "/jobs/job-1"
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert "X-Other" not in replay.headers
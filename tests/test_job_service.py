@@ -0,0 +1,61 @@
+import json
+import pytest
+from models.enums import JobStatusEnum
+from models.errors.custom_exception_model import CustomException
+from models.job_model import Job
+from services.job_service import JobService
+from services.paypal_service import PaypalService
+from services.transfer_service import TransferService
+
+CARD = {"number": "4111111111111111", "cvv": "123"}
+
+
+@pytest.fixture
+def pool(app):
+    JobService.init_app(app)
+    yield JobService
+    JobService._executor.shutdown(wait=True)
+    JobService.init_app(app)
+
+
+def test_saturated_pool_stores_no_payload(pool, make_user, monkeypatch):
+    dni = make_user("10000000A")
+    monkeypatch.setattr(JobService._slots, "acquire", lambda blocking=True: False)
+
+    with pytest.raises(CustomException) as error:
+        JobService.submit(dni, "validate_card", CARD)
+
+    assert error.value.status_code == 503
+    assert Job.query.count() == 0
+
+
+def test_job_that_cannot_be_queued_is_failed_and_cleared(pool, make_user, monkeypatch):
+    dni = make_user("10000000A")
+    JobService._executor.shutdown(wait=True)
+
+    with pytest.raises(CustomException) as error:
+        JobService.submit(dni, "validate_card", CARD)
+
+    assert error.value.status_code == 503
+    job = Job.query.one()
+    assert job.status == JobStatusEnum.FAILED
+    assert job.payload == "{}"
+    assert JobService._slots.acquire(blocking=False)  # The reserved slot was given back
+    JobService._slots.release()
+
+
+def test_charge_not_credited_is_recorded_for_retry_or_refund(app, make_user, monkeypatch):
+    dni = make_user("10000000A")
+    monkeypatch.setitem(app.config, "PAYPAL_JOBS_INLINE", True)
+    monkeypatch.setattr(PaypalService, "authorize_charge", lambda token, amount, request_id: None)
+
+    def fail(dni, amount):
+        raise RuntimeError("database is down")
+    monkeypatch.setattr(TransferService, "charge_funds", fail)
+
+    job = JobService.submit(dni, "charge_funds", {"paypal_token": "tok", "amount": 50, "paypal_request_id": "req-1"})
+
+    assert job.status == JobStatusEnum.CHARGED_NOT_CREDITED
+    assert json.loads(job.result) == {"amount": 50, "paypal_request_id": "req-1", "paypal_order_id": None}
+    assert "database is down" in job.error
+    assert job.payload == "{}"
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db
+from models.ledger_model import LedgerEntry, BalanceSnapshot, CARD_ACCOUNT, OPENING_ACCOUNT
+from models.enums import LedgerEntryKindEnum
+from services.ledger_service import LedgerService
+from services.transfer_service import TransferService
+
+
+def test_every_posting_adds_up_to_zero(make_user):
+    first, second = make_user("A"), make_user("B")
+    TransferService.transfer(first, second, 250, "dinner", None)
+    TransferService.batch_transfer(second, None, [{"receiver_dni": first, "amount": 40, "message": "taxi"}])
+    TransferService.charge_funds(first, 500)
+
+    postings = db.session.query(LedgerEntry.posting_id, func.sum(LedgerEntry.amount), func.count()).group_by(LedgerEntry.posting_id).all()
+    assert len(postings) == 5  # two opening balances, two transfers and one charge
+    assert all(total == 0 and count == 2 for _, total, count in postings)
+    assert LedgerService.find_inconsistencies() == ([], [])
+    assert LedgerService.balance(first) == 1000 - 250 + 40 + 500
+    assert LedgerService.balance(CARD_ACCOUNT) == -500
+    assert LedgerService.balance(OPENING_ACCOUNT) == -2000
+
+
+def test_balance_at_a_time_with_and_without_snapshot(make_user):
+    # Opening balances are written now: the history below happens after them
+    first, second = make_user("A", amount=0), make_user("B", amount=0)
+    start = datetime.utcnow() + timedelta(days=1)
+    history = [(start + timedelta(hours=hour), amount) for hour, amount in ((0, 100), (1, 30), (2, 45), (3, 10))]
+    LedgerService.record([
+        entry
+        for created_at, amount in history
+        for entry in LedgerService.posting(second, first, amount, LedgerEntryKindEnum.TRANSFER, created_at=created_at)
+    ])
+    db.session.commit()
+    moments = [start - timedelta(minutes=1)] + [created_at + timedelta(minutes=1) for created_at, _ in history]
+    expected = [0, 100, 130, 175, 185]
+
+    assert [LedgerService.balance(first, at) for at in moments] == expected
+    assert [LedgerService.balance(second, at) for at in moments] == [-amount for amount in expected]
+
+    assert LedgerService.take_snapshots(cutoff=start + timedelta(hours=1, minutes=30)) == 2
+    assert LedgerService.take_snapshots(cutoff=start + timedelta(hours=1)) == 0  # Not after the latest snapshot
+    assert BalanceSnapshot.query.filter_by(account=first).one().balance == 130
+    assert [LedgerService.balance(first, at) for at in moments] == expected
+    assert [LedgerService.balance(second, at) for at in moments] == [-amount for amount in expected]
+
+    # A second snapshot builds on the first one
+    assert LedgerService.take_snapshots(cutoff=start + timedelta(hours=5)) == 2
+    assert [LedgerService.balance(first, at) for at in moments] == expected
+    assert LedgerService.balance(first, start + timedelta(hours=6)) == 185
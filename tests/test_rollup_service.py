@@ -0,0 +1,74 @@
+from datetime import datetime
+from models import db
+from models.transaction_model import Transaction
+from models.rollup_model import MonthlyRollup, MonthlyCounterparty
+from models.enums import RequestStatusEnum, TransactionTypeEnum
+from services.rollup_service import RollupService
+from services.transfer_service import TransferService
+
+
+def _rows(model):
+    columns = model.__table__.columns
+    return sorted(tuple(row) for row in db.session.execute(db.select(*columns)))
+
+
+def _request(sender_dni, receiver_dni, amount, date):
+    request = Transaction(
+        amount=amount, transaction_type=TransactionTypeEnum.REQUEST, message="request", date=date,
+        sender_dni=sender_dni, receiver_dni=receiver_dni, status=RequestStatusEnum.PENDING
+    )
+    db.session.add(request)
+    db.session.commit()
+    return request
+
+
+def test_incremental_rollups_match_a_rebuild(make_user):
+    first, second, third = make_user("A"), make_user("B"), make_user("C")
+    TransferService.transfer(first, second, 100, "one", None)
+    TransferService.transfer(first, second, 20, "two", None)
+    TransferService.batch_transfer(second, None, [
+        {"receiver_dni": first, "amount": 5, "message": "three"},
+        {"receiver_dni": third, "amount": 7, "message": "four"},
+        {"receiver_dni": third, "amount": 8, "message": "five"},
+    ])
+    TransferService.complete_request(_request(third, first, 60, datetime(2025, 3, 10)), None)
+    TransferService.complete_request(_request(first, third, 15, datetime(2025, 3, 31, 23, 59)), None)
+    _request(third, second, 999, datetime(2025, 3, 12))  # Still pending: not in the rollups
+
+    month = datetime.utcnow().strftime("%Y-%m")
+    rollups = {(row.user_dni, row.month): row for row in MonthlyRollup.query}
+    assert set(rollups) == {(first, month), (second, month), (third, month), (first, "2025-03"), (third, "2025-03")}
+    assert (rollups[(first, month)].sent_amount, rollups[(first, month)].sent_count) == (120, 2)
+    assert (rollups[(third, month)].received_amount, rollups[(third, month)].received_count) == (15, 2)
+    assert (rollups[(first, "2025-03")].received_amount, rollups[(first, "2025-03")].sent_amount) == (60, 15)
+
+    incremental = _rows(MonthlyRollup), _rows(MonthlyCounterparty)
+    db.session.commit()
+
+    assert RollupService.rebuild(chunk_size=2) == db.session.query(db.func.max(Transaction.id)).scalar()
+    assert (_rows(MonthlyRollup), _rows(MonthlyCounterparty)) == incremental
+
+
+def test_stats_list_the_top_counterparties(make_user):
+    first, second, third = make_user("A"), make_user("B"), make_user("C")
+    TransferService.transfer(first, second, 100, "one", None)
+    TransferService.transfer(third, first, 30, "two", None)
+    TransferService.transfer(first, third, 5, "three", None)
+
+    [stats] = RollupService.get_stats(first)
+
+    assert (stats["sent"], stats["sent_count"], stats["received"], stats["received_count"]) == (105, 2, 30, 1)
+    assert [counterparty["dni"] for counterparty in stats["top_counterparties"]] == [second, third]
+    assert RollupService.get_stats(first, top=1)[0]["top_counterparties"][0]["sent"] == 100
+
+
+def test_mysql_upsert_adds_to_the_existing_row():
+    # Compiled only: no MySQL server is needed to check the statement the MySQL profile sends
+    from sqlalchemy.dialects import mysql
+    from services.rollup_service import ROLLUP_COLUMNS, _upsert
+
+    sql = str(_upsert(MonthlyCounterparty.__table__, "mysql").compile(dialect=mysql.dialect()))
+
+    assert "ON DUPLICATE KEY UPDATE" in sql
+    for name in ROLLUP_COLUMNS:
+        assert f"{name} = (monthly_counterparties.{name} + VALUES({name}))" in sql
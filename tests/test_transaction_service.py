@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+import pytest
+from models import db
+from models.transaction_model import Transaction
+from models.enums import RequestStatusEnum, TransactionTypeEnum
+from models.errors.custom_exception_model import CustomException
+from services.transaction_service import TransactionService
+
+
+@pytest.fixture
+def history(make_user):
+    """30 transactions of A, sent and received, several sharing a date, plus rows that are not in its history"""
+    me, other, third = make_user("A"), make_user("B"), make_user("C")
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(30):
+        sender, receiver = (me, other) if i % 3 else (other, me)
+        rows.append(Transaction(
+            amount=i + 1, transaction_type=TransactionTypeEnum.SENT, message=f"t{i}",
+            date=start + timedelta(hours=i // 4),  # Four transactions per date
+            sender_dni=sender, receiver_dni=receiver, status=RequestStatusEnum.COMPLETED
+        ))
+    rows.append(Transaction(
+        amount=1, transaction_type=TransactionTypeEnum.REQUEST, message="pending", date=start,
+        sender_dni=me, receiver_dni=other, status=RequestStatusEnum.PENDING
+    ))
+    rows.append(Transaction(
+        amount=1, transaction_type=TransactionTypeEnum.SENT, message="others", date=start,
+        sender_dni=other, receiver_dni=third, status=RequestStatusEnum.COMPLETED
+    ))
+    db.session.add_all(rows)
+    db.session.commit()
+    expected = sorted(rows[:30], key=lambda row: (row.date, row.id), reverse=True)
+    return me, [row.id for row in expected]
+
+
+def test_pages_walk_the_whole_history_in_order(history):
+    me, expected = history
+    seen, cursor = [], None
+    while True:
+        page, cursor = TransactionService.get_history_page(me, cursor, limit=7)
+        assert len(page) <= 7
+        seen += [row.id for row in page]
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_batches_and_full_list_match_the_pages(history):
+    me, expected = history
+
+    assert [row.id for batch in TransactionService.iter_history_batches(me, batch_size=4) for row in batch] == expected
+    assert [row.id for row in TransactionService.history_query(me).all()] == expected
+
+
+def test_a_bad_cursor_is_rejected(history):
+    with pytest.raises(CustomException) as error:
+        TransactionService.get_history_page(history[0], "not-a-cursor")
+
+    assert error.value.status_code == 400
@@ -0,0 +1,181 @@
+import pytest
+from sqlalchemy import event, func
+from models import db
+from models.transaction_model import Transaction
+from models.ledger_model import LedgerEntry
+from models.enums import RequestStatusEnum, TransactionTypeEnum
+from models.errors.custom_exception_model import CustomException
+from services.transfer_service import TransferService
+
+
+def _count(model):
+    return db.session.query(func.count()).select_from(model).scalar()
+
+
+def _request(sender_dni, receiver_dni, amount):
+    request = Transaction(
+        amount=amount, transaction_type=TransactionTypeEnum.REQUEST, message="request",
+        sender_dni=sender_dni, receiver_dni=receiver_dni, status=RequestStatusEnum.PENDING
+    )
+    db.session.add(request)
+    db.session.commit()
+    return request
+
+
+def test_transfer_moves_the_money_and_records_it(make_user, balance_of):
+    sender, receiver = make_user("A"), make_user("B")
+
+    transaction = TransferService.transfer(sender, receiver, 300, "rent", None)
+
+    assert balance_of(sender) == 700
+    assert balance_of(receiver) == 1300
+    assert transaction.status == RequestStatusEnum.COMPLETED
+    assert _count(Transaction) == 1
+    entries = LedgerEntry.query.filter_by(transaction_id=transaction.id).all()
+    assert sorted((entry.account, entry.amount) for entry in entries) == [(sender, -300), (receiver, 300)]
+
+
+def test_transfer_without_enough_funds_changes_nothing(make_user, balance_of):
+    sender, receiver = make_user("A", amount=100), make_user("B")
+    entries = _count(LedgerEntry)
+
+    with pytest.raises(CustomException) as error:
+        TransferService.transfer(sender, receiver, 101, "too much", None)
+
+    assert error.value.status_code == 400
+    assert balance_of(sender) == 100
+    assert balance_of(receiver) == 1000
+    assert _count(Transaction) == 0
+    assert _count(LedgerEntry) == entries
+
+
+def test_transfer_to_unknown_receiver_rolls_back_the_debit(make_user, balance_of):
+    sender = make_user("A")
+
+    with pytest.raises(CustomException):
+        TransferService.transfer(sender, "NOBODY", 100, "lost", None)
+
+    assert balance_of(sender) == 1000
+    assert _count(Transaction) == 0
+
+
+@pytest.mark.parametrize("amount", [0, -5])
+def test_transfer_rejects_non_positive_amounts(make_user, balance_of, amount):
+    sender, receiver = make_user("A"), make_user("B")
+
+    with pytest.raises(CustomException):
+        TransferService.transfer(sender, receiver, amount, "nothing", None)
+
+    assert balance_of(sender) == 1000
+
+
+def test_a_request_is_paid_only_once(make_user, balance_of):
+    payer, requester = make_user("A"), make_user("B")
+    request = _request(payer, requester, 40)
+
+    TransferService.complete_request(request, None)
+    with pytest.raises(CustomException):
+        TransferService.complete_request(request, None)
+
+    assert balance_of(payer) == 960
+    assert balance_of(requester) == 1040
+    assert db.session.get(Transaction, request.id).status == RequestStatusEnum.COMPLETED
+
+
+def test_paying_a_request_without_funds_leaves_it_pending(make_user, balance_of):
+    payer, requester = make_user("A", amount=10), make_user("B")
+    request = _request(payer, requester, 40)
+
+    with pytest.raises(CustomException):
+        TransferService.complete_request(request, None)
+
+    db.session.expire_all()
+    assert db.session.get(Transaction, request.id).status == RequestStatusEnum.PENDING
+    assert balance_of(payer) == 10
+
+
+def test_charge_funds_credits_the_user(make_user, balance_of):
+    user = make_user("A")
+
+    TransferService.charge_funds(user, 250)
+
+    assert balance_of(user) == 1250
+
+
+def test_batch_transfer_reports_every_item(make_user, balance_of):
+    sender, first, second = make_user("A"), make_user("B"), make_user("C")
+    items = [
+        {"receiver_dni": first, "amount": 100, "message": "one"},
+        {"receiver_dni": "NOBODY", "amount": 100, "message": "unknown"},
+        {"receiver_dni": sender, "amount": 100, "message": "myself"},
+        {"receiver_dni": second, "amount": 0, "message": "zero"},
+        {"receiver_dni": second, "amount": 10.7, "message": "fraction"},
+        {"receiver_dni": second, "amount": "ten", "message": "words"},
+        {"receiver_dni": second, "amount": None, "message": "missing"},
+        {"amount": 100, "message": "nobody"},
+        {"receiver_dni": second, "amount": 100},
+        1,
+        {"receiver_dni": second, "amount": "50", "message": "two"},
+        {"receiver_dni": first, "amount": 25.0, "message": "three"},
+        {"receiver_dni": second, "amount": "1e2", "message": "four"},
+    ]
+
+    results = TransferService.batch_transfer(sender, None, items)
+
+    assert [result["index"] for result in results] == list(range(len(items)))
+    assert [result.get("error") for result in results] == [
+        None, "Receiver not found", "Cannot send money to yourself", "Amount must be greater than zero",
+        "Amount must be an integer", "Amount must be an integer", "Amount must be an integer",
+        "Receiver is required", "Message is required", "Each transfer must be an object", None, None, None
+    ]
+    assert [result["status"] for result in results].count("COMPLETED") == 4
+    assert results[10]["transaction"]["receiver"]["name"] == "User C"
+    assert [results[i]["transaction"]["amount"] for i in (0, 10, 11, 12)] == [100, 50, 25, 100]
+    assert balance_of(sender) == 725
+    assert balance_of(first) == 1125
+    assert balance_of(second) == 1150
+    assert _count(Transaction) == 4
+
+
+def test_batch_transfer_loads_the_users_once(make_user):
+    sender = make_user("A")
+    receivers = [make_user(f"R{i}") for i in range(5)]
+    db.session.expunge_all()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        results = TransferService.batch_transfer(sender, None, [{"receiver_dni": dni, "amount": 10, "message": "pay"} for dni in receivers])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    assert all(result["status"] == "COMPLETED" for result in results)
+    user_selects = [s for s in statements if s.lstrip().upper().startswith("SELECT") and "FROM user" in s.replace("`", "")]
+    assert len(user_selects) == 1
+
+
+def test_batch_transfer_over_the_balance_is_rejected_as_a_whole(make_user, balance_of):
+    sender, first, second = make_user("A", amount=150), make_user("B"), make_user("C")
+
+    with pytest.raises(CustomException):
+        TransferService.batch_transfer(sender, None, [
+            {"receiver_dni": first, "amount": 100, "message": "one"},
+            {"receiver_dni": second, "amount": 100, "message": "two"},
+        ])
+
+    assert balance_of(sender) == 150
+    assert balance_of(first) == 1000
+    assert _count(Transaction) == 0
+
+
+@pytest.mark.parametrize("items", [[], [{"receiver_dni": "B", "amount": 1, "message": "m"}] * 101])
+def test_batch_transfer_size_limits(make_user, items):
+    make_user("A")
+
+    with pytest.raises(CustomException) as error:
+        TransferService.batch_transfer("A", None, items)
+
+    assert error.value.status_code == 400
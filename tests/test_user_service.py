@@ -0,0 +1,38 @@
+import pytest
+from models.errors.custom_exception_model import CustomException
+from services.user_service import UserService
+
+
+@pytest.fixture
+def users(make_user):
+    # Real-looking DNIs: the search index finds a user's row by DNI, and trigrams need three characters
+    return [make_user(f"{number}0000000{letter}") for number, letter in zip(range(1, 6), "ABCDE")]
+
+
+def test_search_skips_the_current_and_blocked_users(users):
+    me, first, second, _, _ = users
+    UserService.block_user(second, me)
+
+    found, next_offset = UserService.search_users(me, "User")
+
+    assert [user.dni for user in found] == sorted(set(users) - {me, second})
+    assert next_offset is None
+    assert [user.dni for user in UserService.search_users(me, f"{first.lower()}@test")[0]] == [first]
+    assert UserService.search_users(me, "100%")[0] == []
+
+
+def test_search_pages_and_follows_updates(users):
+    me, first, _, _, _ = users
+    UserService.update_user(first, name="Zebra")
+
+    page, next_offset = UserService.search_users(me, "User", limit=2)
+    assert len(page) == 2 and next_offset == 2
+    assert [user.dni for user in UserService.search_users(me, "zebr")[0]] == [first]
+    assert first not in [user.dni for user in UserService.search_users(me, "User", limit=10)[0]]
+
+
+def test_search_needs_three_characters(users):
+    with pytest.raises(CustomException) as error:
+        UserService.search_users(users[0], "ab")
+
+    assert error.value.status_code == 400